@@ -1,54 +1,167 @@
-with open("abbrevations.txt", "r", encoding="utf-8") as file:
-    abbrevationsFile = file.read()
-
-abbrevations = abbrevationsFile.split()
-
-with open("example_test.txt", "r", encoding="utf-8") as file:
-    text = file.read()
-
-words = text.split()
-sentences = []
-
-sentence = ""
-inQuotation = False
-inParentheses = False
-for i, word in enumerate(words):
-    sentence = sentence + " " + word
-
-    if (inQuotation == True):
-        if word[len(word)-1] == '"':
-            inQuotation = False
-            if (i+1 < len(words)) and words[i+1][0].isupper():
-                sentences.append(sentence)
-                sentence = ""
-    elif (inParentheses == True):
-        if word[len(word)-1] == ')':
-            inParentheses = False
-            if (i+1 < len(words)) and words[i+1][0].isupper():
-                sentences.append(sentence)
-                sentence = ""
-    else: 
-        if word[0] == '"':
-            if word[len(word)-1] == '"':
-                pass
-            else:
-                inQuotation = True
-        if word[0] == '(':
-            if word[len(word)-1] == ')':
-                pass
-            else:
-                inParentheses = True
-
-        if word[len(word)-1] == '.':
-            if word in abbrevations:
-                pass
-            else:
-                sentences.append(sentence)
-                sentence = ""
-
-        if word[len(word)-1] == '?' or word[len(word)-1] == '!':
-            sentences.append(sentence)
-            sentence = ""
-    
-for sentence in sentences:
-    print(sentence)
\ No newline at end of file
+import argparse
+import os
+import re
+from itertools import chain
+
+# Path of the abbreviations list (abbreviations ending with a period, which don't end a sentence)
+ABBREVIATIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "abbrevations.txt")
+
+# Words are the whitespace separated parts of the text
+WORD_PATTERN = re.compile(r"\S+")
+
+# Size (in characters) of the chunks a file is read in
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+def load_abbreviations(path=ABBREVIATIONS_PATH):
+    """
+    Load the abbreviations list into a frozenset. Multiword abbreviations (e.g. "Yrd. Doç.") are split into
+    their words, as the text is checked word by word.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        return frozenset(file.read().split())
+
+
+class SentenceSplitter:
+    """
+    Rule based sentence splitter. The text is checked word by word (whitespace separated parts of the text):
+
+    - A word ending with a period ends the sentence, unless it is an abbreviation.
+    - A word ending with a question or exclamation mark ends the sentence.
+    - Inside quotations and parentheses (opened by a word starting with a quotation mark or a parenthesis), the
+      sentence ends at the word closing the quotation or the parenthesis, if the next word starts with an
+      uppercase letter.
+    """
+
+    def __init__(self, abbreviations=None):
+        self.abbreviations = load_abbreviations() if abbreviations is None else frozenset(abbreviations)
+
+    def split_stream(self, chunks):
+        """
+        Split a text given in chunks into sentences. Only the part of the text from the start of the current
+        sentence is kept in memory (the carry-over of a chunk into the next one), so texts of any size can be
+        split.
+
+        Args:
+            chunks (iterable): Chunks (strings) of the text, in order.
+
+        Yields:
+            start (int): Offset of the first character of the sentence in the text.
+            end (int): Offset after the last character of the sentence in the text.
+            sentence (string): The sentence (text[start:end]).
+        """
+        abbreviations = self.abbreviations
+
+        buffer = ""
+        # Offset of the first character of the buffer in the text
+        buffer_start = 0
+        # Position in the buffer to continue scanning words from
+        position = 0
+        # Offsets of the start of the current sentence (None if it has no words yet) and of the end of its last word
+        sentence_start = None
+        sentence_end = None
+
+        in_quotation = False
+        in_parentheses = False
+        # True if the sentence ends at the last word when the next word starts with an uppercase letter
+        ends_before_uppercase = False
+
+        # None marks the end of the text
+        for chunk in chain(chunks, [None]):
+            is_last_chunk = chunk is None
+            if not is_last_chunk:
+                buffer += chunk
+
+            # A word at the end of the buffer may continue in the next chunk, so it is scanned with the next chunk
+            scan_end = len(buffer)
+            if not is_last_chunk:
+                while scan_end > position and not buffer[scan_end - 1].isspace():
+                    scan_end -= 1
+
+            for match in WORD_PATTERN.finditer(buffer, position, scan_end):
+                word = match.group()
+                word_start, word_end = match.span()
+
+                if ends_before_uppercase:
+                    ends_before_uppercase = False
+                    if word[0].isupper():
+                        yield (sentence_start, sentence_end,
+                               buffer[sentence_start - buffer_start:sentence_end - buffer_start])
+                        sentence_start = None
+
+                if sentence_start is None:
+                    sentence_start = buffer_start + word_start
+                sentence_end = buffer_start + word_end
+
+                ends_sentence = False
+                if in_quotation:
+                    if word[-1] == '"':
+                        in_quotation = False
+                        ends_before_uppercase = True
+                elif in_parentheses:
+                    if word[-1] == ')':
+                        in_parentheses = False
+                        ends_before_uppercase = True
+                else:
+                    # Open a quotation/parenthesis, if it isn't closed in the same word
+                    if word[0] == '"' and word[-1] != '"':
+                        in_quotation = True
+                    if word[0] == '(' and word[-1] != ')':
+                        in_parentheses = True
+
+                    if word[-1] == '.':
+                        ends_sentence = word not in abbreviations
+                    elif word[-1] == '?' or word[-1] == '!':
+                        ends_sentence = True
+
+                if ends_sentence:
+                    yield (sentence_start, sentence_end,
+                           buffer[sentence_start - buffer_start:sentence_end - buffer_start])
+                    sentence_start = None
+
+            position = scan_end
+
+            # Drop the part of the buffer before the current sentence (or before the next word to scan)
+            keep_from = (sentence_start - buffer_start) if sentence_start is not None else position
+            buffer = buffer[keep_from:]
+            buffer_start += keep_from
+            position -= keep_from
+
+        # The rest of the text (a sentence without an ending punctuation)
+        if sentence_start is not None:
+            yield (sentence_start, sentence_end, buffer[sentence_start - buffer_start:sentence_end - buffer_start])
+
+    def split_spans(self, text):
+        """
+        Split a text into sentences.
+
+        Yields:
+            start (int): Offset of the first character of the sentence in the text.
+            end (int): Offset after the last character of the sentence in the text.
+        """
+        for start, end, _ in self.split_stream([text]):
+            yield start, end
+
+    def split_text(self, text):
+        """
+        Split a text into a list of sentences.
+        """
+        return [sentence for _, _, sentence in self.split_stream([text])]
+
+    def split_file(self, file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Split the text in a file into sentences, reading it in chunks (see split_stream for the yielded values,
+        offsets are in characters).
+        """
+        with open(file_path, "r", encoding="utf-8") as file:
+            yield from self.split_stream(iter(lambda: file.read(chunk_size), ""))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Split the text in a file into sentences (one per line).")
+    parser.add_argument("input", help="Text file to split")
+    args = parser.parse_args()
+
+    splitter = SentenceSplitter()
+    for _, _, sentence in splitter.split_file(args.input):
+        print(sentence)
@@ -0,0 +1,38 @@
+import subprocess
+import sys
+import time
+
+# Number of fresh interpreter runs for each measurement
+RUNS = 5
+
+# Imports of the ml based tokenizer before the native inference path (pandas and sklearn modules, pulled in
+# through train_ml_tokenizer), and after it
+IMPORTS_BEFORE = ("import pandas, numpy, joblib; from sklearn.linear_model import LogisticRegression; "
+                  "from sklearn.feature_extraction.text import CountVectorizer; "
+                  "from sklearn.preprocessing import StandardScaler, MinMaxScaler; from sklearn import metrics; "
+                  "import tokenizer.ml_based_tokenizer")
+IMPORTS_AFTER = "import tokenizer.ml_based_tokenizer"
+
+
+def measure_cold_start(statement):
+    """
+    Run a statement in fresh interpreters and return the best wall clock time (in seconds).
+    """
+    best = None
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+if __name__ == "__main__":
+    baseline = measure_cold_start("pass")
+    before = measure_cold_start(IMPORTS_BEFORE)
+    after = measure_cold_start(IMPORTS_AFTER)
+
+    print(f"empty interpreter:           {baseline:.3f} s")
+    print(f"with sklearn/pandas imports: {before:.3f} s")
+    print(f"native inference imports:    {after:.3f} s")
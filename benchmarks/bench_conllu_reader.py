@@ -0,0 +1,83 @@
+import glob
+import os
+import sys
+import time
+from utils.conllu_reader import read_sentences
+from tokenizer.build_token_list import build_token_list
+from stemmer.build_suffix_and_replacement_lexicon import build_suffix_and_replacement_lexicon
+
+# Treebanks whose .conllu files are parsed
+CORPORA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "corpora")
+TREEBANKS = ["UD_Turkish-BOUN", "UD_Turkish-Penn"]
+
+
+def legacy_parse(file_path):
+    """
+    Line loop of the builders before the shared reader (each builder parsed the file on its own this way).
+    Returns the number of token lines.
+    """
+    count = 0
+    with open(file_path, "r", encoding="utf-8") as file:
+        for line in file:
+            if line.strip() == "" or line.startswith("#"):
+                continue
+            columns = line.strip().split("\t")
+            if len(columns) < 10:
+                continue
+            IDs = list(map(lambda x: int(x), columns[0].split("-")))
+            count += len(IDs)
+
+    return count
+
+
+def best_time(function, repeats=3):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def benchmark_reader(file_paths):
+    """
+    Compare the old line loop of the builders with the shared reader (streaming the sentences, as the builders
+    do when given a file path), and the cost of parsing each file once and giving the kept sentences to both
+    the token list and the suffix lexicon builders.
+    """
+    size = sum(os.path.getsize(file_path) for file_path in file_paths)
+
+    def legacy():
+        for file_path in file_paths:
+            legacy_parse(file_path)
+
+    def reader():
+        for file_path in file_paths:
+            for _ in read_sentences(file_path):
+                pass
+
+    def reader_and_builders():
+        for file_path in file_paths:
+            sentences = list(read_sentences(file_path))
+            build_token_list(sentences)
+            build_suffix_and_replacement_lexicon(sentences, {}, {})
+
+    print(f"files: {len(file_paths)}, {size / 1e6:.1f} MB")
+    for name, function in [("legacy line loop", legacy),
+                           ("shared reader (streaming)", reader),
+                           ("parse once + both builders", reader_and_builders)]:
+        elapsed = best_time(function)
+        print(f"{name:<28} {elapsed:>8.3f} s {size / 1e6 / elapsed:>8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    file_paths = []
+    for treebank in TREEBANKS:
+        file_paths += sorted(glob.glob(os.path.join(CORPORA_DIR, treebank, "*.conllu")))
+
+    if not file_paths:
+        sys.exit(f"No .conllu files found (download the corpora first):\n\t{os.path.abspath(CORPORA_DIR)}")
+
+    benchmark_reader(file_paths)
@@ -0,0 +1,79 @@
+import os
+import random
+import shutil
+import tempfile
+import time
+import numpy as np
+from utils.corpus_index import build_corpus_index, get_index_paths, load_offsets, OFFSET_DTYPE
+
+# Pieces the synthetic corpora are made of (line breaks, empty lines, sentence boundaries at line ends and starts,
+# and Turkish uppercase letters, whose encodings are two bytes long)
+PIECES = ["x", "yi", "ev", "Ali", "Çok", "İyi", "Ş", " ", " . ", ".", "\n", "\n\n", "\r\n"]
+
+# Corpus known to have produced a duplicate sentence offset, when a line break was the last byte of a block and
+# the next line started with a sentence boundary
+REGRESSION_CORPUS = b"x\n\xc4\xb0yi \n\xc3\x87ok\xc4\xb0yixAli\n\xc3\x87ok\n.\n\xc3\x87ok\nev\nx "
+
+# Maximum size of the corpus of the timed build (in bytes)
+BENCHMARK_SIZE = 64 * 1024 * 1024
+
+
+def build_offsets(directory, corpus, block_size):
+    """
+    Index a corpus (bytes) with the given block size, in a new copy of the corpus file.
+
+    Returns:
+        line_offsets (np.ndarray): Line start offsets.
+        sentence_offsets (np.ndarray): Sentence start offsets.
+    """
+    corpus_path = os.path.join(directory, f"corpus_{block_size}.txt")
+    # The index of a previous corpus of the same size could be taken as the saved progress of this one
+    for path in get_index_paths(corpus_path):
+        if os.path.exists(path):
+            os.remove(path)
+    with open(corpus_path, "wb") as file:
+        file.write(corpus)
+
+    build_corpus_index(corpus_path, block_size)
+    line_offsets_path, sentence_offsets_path, _ = get_index_paths(corpus_path)
+    return np.array(load_offsets(line_offsets_path)), np.array(load_offsets(sentence_offsets_path))
+
+
+def check_block_sizes(directory, count=300, seed=0):
+    """
+    Check that the index of random corpora is the same for every block size (the offsets of each block must not
+    overlap those of the neighbouring blocks), and that the sentence offsets are strictly increasing.
+    """
+    generator = random.Random(seed)
+    corpora = [REGRESSION_CORPUS] + ["".join(generator.choices(PIECES, k=generator.randint(1, 40))).encode("utf-8")
+                                     for _ in range(count)]
+    for corpus in corpora:
+        expected = build_offsets(directory, corpus, len(corpus))
+        assert np.all(np.diff(expected[1].astype(np.int64)) > 0), corpus
+        for block_size in range(1, min(len(corpus), 12)):
+            offsets = build_offsets(directory, corpus, block_size)
+            assert all(np.array_equal(a, b) for a, b in zip(offsets, expected)), (corpus, block_size)
+
+
+def benchmark_corpus_index():
+    directory = tempfile.mkdtemp()
+    try:
+        check_block_sizes(directory)
+
+        generator = random.Random(0)
+        sentence = "Ali eve geldi . Çok iyi bir gün oldu .\n".encode("utf-8")
+        words = [sentence] + [piece.encode("utf-8") for piece in PIECES]
+        corpus = b"".join(generator.choices(words, k=BENCHMARK_SIZE // 8))[:BENCHMARK_SIZE]
+
+        start = time.perf_counter()
+        line_offsets, sentence_offsets = build_offsets(directory, corpus, 8 * 1024 * 1024)
+        elapsed = time.perf_counter() - start
+        print(f"{len(corpus) / 1e6:.1f} MB: {len(line_offsets)} lines, {len(sentence_offsets)} sentences "
+              f"in {elapsed:.3f} s ({len(corpus) / 1e6 / elapsed:.1f} MB/s, "
+              f"{(len(line_offsets) + len(sentence_offsets)) * OFFSET_DTYPE.itemsize / 1e6:.1f} MB of offsets)")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    benchmark_corpus_index()
@@ -0,0 +1,99 @@
+import os
+import pickle
+import random
+import time
+from collections import deque
+import numpy as np
+from tokenizer.cursor import Cursor
+from tokenizer.ml_based_tokenizer import createLabelMatrix
+from tokenizer.rule_based_tokenizer import tokenize_text
+from benchmarks.bench_rule_based_tokenizer import SAMPLE_TEXT
+
+# Train text of the ml tokenizer and its token list (a synthetic text of about the same size is used if missing)
+TRAIN_TEXT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "corpora", "UD_Turkish-BOUN",
+                               "tr_boun-ud-train.txt")
+TRAIN_TOKENS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tokenizer",
+                                 "token_list_boun_train.pkl")
+
+# Number of characters of the synthetic text
+SYNTHETIC_SIZE = 800000
+
+
+def legacyCreateLabelMatrix(text, tokens):
+    """
+    Labeling before the alignment routine: a cursor object for each position, the next token compared with the
+    text at every position, and the labels collected into an array at the end.
+    """
+    tokenLinkedList = deque(tokens)
+
+    def getNextToken():
+        return tokenLinkedList.popleft() if len(tokenLinkedList) > 0 else None
+
+    nextToken = getNextToken()
+    cursors = []
+    for i in range(len(text) + 1):
+        cursor = Cursor(i)
+        if nextToken is not None:
+            if text[i: i + len(nextToken)] == nextToken:
+                cursor.label = 1
+                nextToken = getNextToken()
+        else:
+            if i == len(text):
+                cursor.label = 1
+        cursors.append(cursor)
+
+    return np.array([cursor.label for cursor in cursors])
+
+
+def loadTrainingData():
+    """
+    Get the train text and its tokens, or a synthetic text (the sample text repeated) tokenized by the rule based
+    tokenizer if the train files aren't available.
+    """
+    if os.path.exists(TRAIN_TEXT_PATH) and os.path.exists(TRAIN_TOKENS_PATH):
+        with open(TRAIN_TEXT_PATH, "r", encoding="utf-8") as file:
+            text = file.read()
+        with open(TRAIN_TOKENS_PATH, "rb") as file:
+            tokens = pickle.load(file)
+        return "tr_boun-ud-train", text, tokens
+
+    text = SAMPLE_TEXT * (SYNTHETIC_SIZE // len(SAMPLE_TEXT) + 1)
+    tokens = [token.text for token in tokenize_text(text, {})]
+    return "synthetic", text, tokens
+
+
+def checkEdgeCases(count=2000, seed=0):
+    """
+    Compare the labels of both implementations on random texts whose token lists have missing, empty, repeated
+    and overlapping tokens.
+    """
+    generator = random.Random(seed)
+    alphabet = "ab .'"
+    for _ in range(count):
+        text = "".join(generator.choices(alphabet, k=generator.randint(0, 30)))
+        tokens = ["".join(generator.choices(alphabet, k=generator.randint(0, 3)))
+                  for _ in range(generator.randint(0, 15))]
+        assert np.array_equal(createLabelMatrix(text, tokens), legacyCreateLabelMatrix(text, tokens)), (text, tokens)
+
+
+def benchmark_label_alignment():
+    checkEdgeCases()
+
+    name, text, tokens = loadTrainingData()
+    print(f"{name}: {len(text)} chars, {len(tokens)} tokens")
+
+    start = time.perf_counter()
+    legacyLabels = legacyCreateLabelMatrix(text, tokens)
+    legacyElapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    labels = createLabelMatrix(text, tokens)
+    elapsed = time.perf_counter() - start
+
+    assert np.array_equal(labels, legacyLabels)
+    print(f"cursor loop:     {legacyElapsed:.3f} s")
+    print(f"str.find align:  {elapsed:.3f} s ({legacyElapsed / elapsed:.0f}x)")
+
+
+if __name__ == "__main__":
+    benchmark_label_alignment()
@@ -0,0 +1,65 @@
+import os
+import random
+import time
+from joblib import load
+from sklearn.linear_model import LogisticRegression
+from tokenizer.ml_based_tokenizer import (createFeatureMatrix, createTokenList, createLabelMatrix, tokenizeBatch,
+                                          getModelNumericalScaling, MODEL_FILE_PATH)
+from tokenizer.rule_based_tokenizer import tokenize_text
+from benchmarks.bench_rule_based_tokenizer import SAMPLE_TEXT
+
+# Number of short documents in the benchmarked batch
+DOCUMENT_COUNT = 20000
+
+
+def getModel():
+    """
+    Get the trained ml tokenizer. If it isn't available, fit a model on the sample text labeled by the rule
+    based tokenizer (predictions are not meaningful then, but the cost of inference is the same).
+    """
+    if os.path.exists(MODEL_FILE_PATH):
+        return load(MODEL_FILE_PATH)
+
+    text = SAMPLE_TEXT * 20
+    tokens = [token.text for token in tokenize_text(text, {})]
+    model = LogisticRegression()
+    model.fit(createFeatureMatrix(text), createLabelMatrix(text, tokens))
+    return model
+
+
+def createDocuments(count, seed=0):
+    """
+    Create short documents (one to three sentences) from the words of the sample text.
+    """
+    words = SAMPLE_TEXT.split()
+    generator = random.Random(seed)
+    return [" ".join(generator.choices(words, k=generator.randint(5, 40))) for _ in range(count)]
+
+
+def benchmark_tokenize_batch():
+    """
+    Compare tokenizing short documents one by one (one feature matrix and one predict call per document) with
+    tokenizing them all at once with tokenizeBatch.
+    """
+    model = getModel()
+    documents = createDocuments(DOCUMENT_COUNT)
+
+    start = time.perf_counter()
+    numericalScaling = getModelNumericalScaling()
+    loopTokens = [createTokenList(document, model.predict(createFeatureMatrix(document, numericalScaling)))
+                  for document in documents]
+    loopElapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batchTokens = tokenizeBatch(documents, model)
+    batchElapsed = time.perf_counter() - start
+
+    assert loopTokens == batchTokens
+    print(f"documents: {len(documents)}")
+    print(f"per document loop: {loopElapsed:.3f} s")
+    print(f"tokenizeBatch:     {batchElapsed:.3f} s")
+    print(f"speedup:           {loopElapsed / batchElapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    benchmark_tokenize_batch()
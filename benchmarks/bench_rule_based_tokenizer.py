@@ -0,0 +1,34 @@
+import time
+from tokenizer.rule_based_tokenizer import tokenize_text
+
+# A short Turkish paragraph containing most of the token types recognized by the rule based tokenizer
+SAMPLE_TEXT = ("Bugün hava oldukça güzel! Sabah 08:30'da kahvaltıdan sonra dışarı çıktım... "
+               "Dr. Ahmet Bey'i 12.05.2023'te gördüm, e-postası ahmet.bey@boun.edu.tr idi. "
+               "Toplantı notları www.boun.edu.tr/cmpe561 adresinde, katılım 1.250 kişi (%3,5 artış) #nlp ")
+
+# Sizes of the benchmarked texts (as multiples of the sample text)
+REPEATS = [250, 500, 1000, 2000, 4000]
+
+
+def benchmark_tokenize_text(mwe_dict):
+    """
+    Tokenize texts of increasing sizes and print the elapsed time and throughput for each size.
+    If the tokenizer scales linearly with the input size, throughput should stay (roughly) constant.
+
+    Args:
+        mwe_dict (dict): The nested hash table that stores MWEs.
+    """
+    print(f"{'chars':>12} {'tokens':>10} {'seconds':>10} {'chars/s':>14}")
+    for repeat in REPEATS:
+        text = SAMPLE_TEXT * repeat
+
+        start = time.perf_counter()
+        tokens = tokenize_text(text, mwe_dict)
+        elapsed = time.perf_counter() - start
+
+        print(f"{len(text):>12} {len(tokens):>10} {elapsed:>10.3f} {len(text) / elapsed:>14.0f}")
+
+
+if __name__ == "__main__":
+    # An empty MWE dictionary isolates the cost of the pattern scanner
+    benchmark_tokenize_text({})
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import time
+from SentenceSplitting.rule_based_sentence_splitting import SentenceSplitter, load_abbreviations
+
+# Example text of the splitter, repeated to make the benchmarked texts
+EXAMPLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "SentenceSplitting", "example_test.txt")
+
+# Numbers of copies of the example text in the benchmarked texts
+REPEATS = [10, 100, 1000]
+
+# Numbers of words of the benchmarked texts without sentence endings (e.g. lists, headlines or badly punctuated web
+# text), where a single sentence grows long
+UNPUNCTUATED_WORDS = [10000, 50000, 100000]
+
+
+def legacy_split(text, abbreviations):
+    """
+    Splitting loop of the script before the splitter API: sentences are built by string concatenation and the
+    abbreviations are looked up in a list.
+    """
+    words = text.split()
+    sentences = []
+
+    sentence = ""
+    in_quotation = False
+    in_parentheses = False
+    for i, word in enumerate(words):
+        sentence = sentence + " " + word
+
+        if in_quotation:
+            if word[-1] == '"':
+                in_quotation = False
+                if (i + 1 < len(words)) and words[i + 1][0].isupper():
+                    sentences.append(sentence)
+                    sentence = ""
+        elif in_parentheses:
+            if word[-1] == ')':
+                in_parentheses = False
+                if (i + 1 < len(words)) and words[i + 1][0].isupper():
+                    sentences.append(sentence)
+                    sentence = ""
+        else:
+            if word[0] == '"' and word[-1] != '"':
+                in_quotation = True
+            if word[0] == '(' and word[-1] != ')':
+                in_parentheses = True
+
+            if word[-1] == '.' and word not in abbreviations:
+                sentences.append(sentence)
+                sentence = ""
+
+            if word[-1] == '?' or word[-1] == '!':
+                sentences.append(sentence)
+                sentence = ""
+
+    return sentences
+
+
+def measure(name, function, chars):
+    start = time.perf_counter()
+    count = len(function())
+    elapsed = time.perf_counter() - start
+    print(f"  {name:<34} {elapsed:>8.3f} s {chars / elapsed / 1e6:>8.2f} M chars/s ({count} sentences)")
+
+
+def benchmark_splitter(example):
+    abbreviations = list(load_abbreviations())
+    splitter = SentenceSplitter(abbreviations)
+
+    for repeats in REPEATS:
+        text = "\n".join([example] * repeats)
+        print(f"{repeats} copies ({len(text)} chars):")
+        measure("legacy (concatenation, list)", lambda: legacy_split(text, abbreviations), len(text))
+        measure("SentenceSplitter.split_text", lambda: splitter.split_text(text), len(text))
+
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".txt", delete=False) as file:
+            file.write(text)
+        try:
+            # Small chunks, so the carry-over between the chunks is exercised
+            measure("SentenceSplitter.split_file (64K)",
+                    lambda: list(splitter.split_file(file.name, chunk_size=1 << 16)), len(text))
+        finally:
+            os.remove(file.name)
+
+    for word_count in UNPUNCTUATED_WORDS:
+        text = " ".join(["kelime"] * word_count)
+        print(f"{word_count} words without sentence endings ({len(text)} chars):")
+        measure("legacy (concatenation, list)", lambda: legacy_split(text, abbreviations), len(text))
+        measure("SentenceSplitter.split_text", lambda: splitter.split_text(text), len(text))
+
+
+if __name__ == "__main__":
+    with open(EXAMPLE_PATH, "r", encoding="utf-8") as file:
+        benchmark_splitter(file.read())
@@ -0,0 +1,66 @@
+import os
+import pickle
+import sys
+import time
+from stemmer.stemmer import detect_suffix, stem_batch, SUFFIX_DICT_PATH
+from stemmer.suffix_automaton import SuffixAutomaton, CachedStemmer
+
+# Test set whose surface forms are stemmed
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "corpora", "UD_Turkish-BOUN",
+                           "tr_boun-ud-test.conllu")
+
+
+def read_surface_forms(file_path):
+    """
+    Read the surface forms (second column) of the token lines in a .conllu file, keeping only the alphabetical
+    ones (as the stemmer does).
+    """
+    surface_forms = []
+    with open(file_path, "r", encoding="utf-8") as file:
+        for line in file:
+            if line.startswith("#") or line.strip() == "":
+                continue
+            columns = line.rstrip("\n").split("\t")
+            if len(columns) >= 10 and columns[1].isalpha():
+                surface_forms.append(columns[1])
+
+    return surface_forms
+
+
+def measure(name, stem, tokens):
+    start = time.perf_counter()
+    for token in tokens:
+        stem(token)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {elapsed:>8.3f} s {len(tokens) / elapsed:>14.0f} stems/s")
+
+
+def benchmark_stemmer(suffix_dict, tokens):
+    """
+    Compare the nested dict walk, the compiled automaton, and the compiled automaton with the stem cache.
+    """
+    automaton = SuffixAutomaton.from_dict(suffix_dict)
+    stemmer = CachedStemmer(automaton)
+
+    print(f"tokens: {len(tokens)}, distinct surface forms: {len(set(tokens))}")
+    measure("nested dict", lambda token: detect_suffix(token, suffix_dict), tokens)
+    measure("compiled automaton", lambda token: detect_suffix(token, automaton), tokens)
+    measure("automaton + stem cache", stemmer.stem, tokens)
+    print(f"cache: {stemmer.cache_stats()}")
+
+    # Deduplicated batch (suffixes replaced with their replacements, if the replacement lexicon is built)
+    start = time.perf_counter()
+    stem_batch(tokens)
+    elapsed = time.perf_counter() - start
+    print(f"{'stem_batch':<28} {elapsed:>8.3f} s {len(tokens) / elapsed:>14.0f} stems/s")
+
+
+if __name__ == "__main__":
+    for path in [SUFFIX_DICT_PATH, CORPUS_PATH]:
+        if not os.path.exists(path):
+            sys.exit(f"Missing file (build the lexicons and download the corpora first):\n\t{path}")
+
+    with open(SUFFIX_DICT_PATH, "rb") as file:
+        suffix_dict = pickle.load(file)
+
+    benchmark_stemmer(suffix_dict, read_surface_forms(CORPUS_PATH))
@@ -0,0 +1,44 @@
+import re
+import time
+from benchmarks.bench_rule_based_tokenizer import SAMPLE_TEXT
+from utils.turkish_text import LETTERS, turkish_lower
+
+# Number of copies of the sample text in the benchmarked text
+REPEATS = 2000
+
+# Case folding with a translate table (mapping the capital i's before the default lower())
+TURKISH_LOWER_TABLE = str.maketrans({"I": "ı", "İ": "i"})
+
+# Letter sequences, as matched by the rule based tokenizer before looking them up in the MWE trie
+LETTER_SEQUENCE = re.compile(rf"[{LETTERS}]{{2,}}\b")
+
+
+def measure(name, function, count, unit):
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<44} {elapsed:>8.3f} s {count / elapsed:>14.0f} {unit}/s")
+
+
+def benchmark_case_folding(text):
+    """
+    Compare the per token str.lower() after a regex match (the approach of the MWE lookup before the Turkish
+    casing rules) with the ways of Turkish case folding.
+    """
+    words = [match.group() for match in LETTER_SEQUENCE.finditer(text)]
+    print(f"chars: {len(text)}, letter sequences: {len(words)}")
+
+    measure("regex match + str.lower (per token)",
+            lambda: [match.group().lower() for match in LETTER_SEQUENCE.finditer(text)], len(words), "tokens")
+    measure("regex match + translate table (per token)",
+            lambda: [match.group().translate(TURKISH_LOWER_TABLE).lower()
+                     for match in LETTER_SEQUENCE.finditer(text)], len(words), "tokens")
+    measure("regex match + turkish_lower (per token)",
+            lambda: [turkish_lower(match.group()) for match in LETTER_SEQUENCE.finditer(text)], len(words), "tokens")
+    measure("translate table (whole text)", lambda: text.translate(TURKISH_LOWER_TABLE).lower(), len(text), "chars")
+    measure("turkish_lower (whole text)", lambda: turkish_lower(text), len(text), "chars")
+
+
+if __name__ == "__main__":
+    # Capital i's are added to the sample text, so the slow path of turkish_lower is measured too
+    benchmark_case_folding((SAMPLE_TEXT + "IŞIK İstanbul'da ILIK ") * REPEATS)
@@ -1,18 +1,27 @@
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import glob
+import os
 import pickle
+import time
+from stemmer.suffix_automaton import SuffixAutomaton, save_replacement_dict, load_suffix_automaton, \
+    load_replacement_dict
+from utils.conllu_reader import iter_sentences
+from utils.turkish_text import turkish_lower
 
 
 def compile_replacement_dict(replacement_dict):
-    def find_most_frequent_string_in_list(list):
-        counts = Counter(list)
-        max_count = max(counts.values())
-        # Retrieve the first string with the maximum count
-        for string in list:
-            if counts[string] == max_count:
-                return string
+    """
+    Replace the counts of the replacements of each suffix with the most frequent replacement (the first seen one
+    among the most frequent replacements).
 
+    Args:
+        replacement_dict (dict): Dictionary that stores suffixes and the Counters of their replacements.
+    """
     for key in replacement_dict.keys():
-        most_frequent_replacement = find_most_frequent_string_in_list(replacement_dict[key])
+        # Counters keep the order replacements were first seen in, and most_common keeps that order for ties
+        most_frequent_replacement = replacement_dict[key].most_common(1)[0][0]
         replacement_dict[key] = most_frequent_replacement
 
 
@@ -21,16 +30,14 @@ def add_replacement_to_dict(replacement_dict, replacement, suffix):
     Add a replacement for a particular suffix to the replacement dictionary.
 
     Args:
-        replacement_dict (dict): Dictionary to store suffixes and corresponding replacements.
+        replacement_dict (dict): Dictionary to store suffixes and the Counters of their replacements.
         replacement (string): The replacement to replace the suffix with.
         suffix (string): Suffix string.
     """
 
     if suffix not in replacement_dict.keys():
-        replacement_dict[suffix] = []
-        replacement_dict[suffix].append(replacement)
-    else:
-        replacement_dict[suffix].append(replacement)
+        replacement_dict[suffix] = Counter()
+    replacement_dict[suffix][replacement] += 1
 
 
 def add_suffix_to_dict(suffix_dict, suffix):
@@ -62,21 +69,50 @@ def add_suffix_to_dict(suffix_dict, suffix):
             current_level["END"] = True
 
 
+def merge_suffix_dicts(suffix_dict, other_suffix_dict):
+    """
+    Merge a suffix dictionary (nested hash table) into another one.
+
+    Args:
+        suffix_dict (dict): The nested hash table that the suffixes are merged into.
+        other_suffix_dict (dict): The nested hash table whose suffixes are added.
+    """
+    for char, next_level in other_suffix_dict.items():
+        if char == "END":
+            suffix_dict["END"] = True
+        elif char not in suffix_dict:
+            # The whole level can be moved, no suffix under it is present in the target dictionary
+            suffix_dict[char] = next_level
+        else:
+            merge_suffix_dicts(suffix_dict[char], next_level)
+
+
+def merge_replacement_dicts(replacement_dict, other_replacement_dict):
+    """
+    Merge the replacement Counters of a replacement dictionary into another one.
+    """
+    for suffix, counts in other_replacement_dict.items():
+        if suffix not in replacement_dict:
+            replacement_dict[suffix] = Counter()
+        replacement_dict[suffix].update(counts)
+
+
 def build_suffix_and_replacement_lexicon(file_path, suffix_dict, replacement_dict):
     """
     Parse a .connlu file, extract suffixes and required replacements from tokens and add them to the dicts.
 
     Args:
-        file_path (string): Path to the .connlu file.
+        file_path (string): Path to the .connlu file (or the already read sentences of the file).
         suffix_dict (dict): The nested hash table that stores suffixes.
-        replacement_dict (dict): The nested hash table that stores replacements.
+        replacement_dict (dict): Dictionary that stores suffixes and the Counters of their replacements.
     """
 
     # Helper function to add suffixes and replacements to the corresponding dicts using surface
     # and lemma form of the token
     def add_to_dicts(surfaceForm, lemmaForm):
-        surfaceForm = surfaceForm.lower()
-        lemmaForm = lemmaForm.lower()
+        # Lowercase with the Turkish casing rules (the default lower() maps "I" to "i", and "İ" to two chars)
+        surfaceForm = turkish_lower(surfaceForm)
+        lemmaForm = turkish_lower(lemmaForm)
 
         suffix = ""
         replacement = ""
@@ -118,149 +154,153 @@ def build_suffix_and_replacement_lexicon(file_path, suffix_dict, replacement_dic
             add_replacement_to_dict(replacement_dict, replacement, suffix)
 
 
-    # Variables to help keeping track of the tokens that span multiple lines in the .connlu file format
-    multiIDToken = False
-    startID = 0
-    endID = 0
-    surfaceToken = ""
-    builtToken = ""
-    lemmaToken = ""
+    for sentence in iter_sentences(file_path):
+        # The reader resolves the tokens that span multiple lines in the .connlu file format (multi ID tokens),
+        # parts holds the lines of the words of a multi ID token
+        for columns, parts in sentence.tokens():
+            # Get second column which holds the token (surface form string)
+            surfaceForm = columns[1]
+
+            # If the surface form of a multi ID token doesn't only constitute of alphabetical characters, its
+            # words are handled as single ID tokens
+            if parts is not None and surfaceForm.isalpha() == False:
+                words = parts
+            # If the current token is a single ID token
+            elif parts is None:
+                words = [columns]
+            # If the current token is a multi ID token
+            else:
+                startColumns = parts[0]
+                endColumns = parts[-1]
 
-    with open(file_path, 'r', encoding='utf-8') as file:
-        # Check each line in the file
-        for line in file:
+                # Build the token from the surface forms of its first and last words, and keep the lemma of the
+                # first word (words whose surface forms aren't alphabetical are skipped)
+                lemmaToken = startColumns[2] if startColumns[1].isalpha() else ""
+                builtToken = startColumns[1] if startColumns[1].isalpha() else ""
 
-            # If line is an empty line or starts with a '#' character, then it either marks the
-            # end of the sentence, or is an id/info line. In that case, move to the next line.
-            if line.strip() == "" or line.startswith("#"):
-                continue
+                if endColumns[1].isalpha():
+                    builtToken += endColumns[1]
+                    # Third column of the last word holds its lemma (an auxiliary or a particle is expected)
+                    endUpos = endColumns[2].lower()
+                    if (builtToken == surfaceForm) and (endUpos in ["aux", "part"]):
+                        add_to_dicts(surfaceForm, lemmaToken)
 
-            # If it is a token line
-            else:
-                # Split token line into columns
-                columns = line.strip().split("\t")
-                # .connlu format should have 10 columns. If otherwise, assume invalid line and continue.
-                if len(columns) < 10:
-                    continue
+                continue
 
-                # Get first column which holds id of token in sentence
-                IDinfo = columns[0]
-                # Some lines start with a single ID (e.g. 8), but some other lines start with a range of ID (e.g. 10-11)
-                # which represent a multi-ID token (holding info in subsequent multiple lines). Get the ID numbers in the
-                # ID info column into a list
-                IDs = list(map(lambda x: int(x), IDinfo.split("-")))
-                # Get second column which holds the token (surface form string) corresponding to the current line
-                surfaceForm = columns[1]
+            for word in words:
+                surfaceForm = word[1]
                 # If the surface form doesn't only constitute of alphabetical characters, skip it
                 if surfaceForm.isalpha() == False:
                     continue
 
-                # In we're not already parsing a multi ID token
-                if multiIDToken == False:
-
-                    # If current line is the start of a multiID (multiline) token
-                    if len(IDs) > 1:
-                        multiIDToken = True
-                        startID = IDs[0]
-                        endID = IDs[-1]
-                        # Keep the surface form of the token
-                        surfaceToken = surfaceForm
-
-                        if len(IDs) > 2:
-                            print(line)
-
-                        continue
-
-                    # If the current line is a single ID token
-                    else:
-                        # Get third column which holds the lemma form of the token
-                        lemmaForm = columns[2]
-                        # If the surface and lemma forms are different, then we have a suffix
-                        if surfaceForm != lemmaForm:
-                            add_to_dicts(surfaceForm, lemmaForm)
-                            continue
+                # Get third column which holds the lemma form of the token
+                lemmaForm = word[2]
+                # If the surface and lemma forms are different, then we have a suffix
+                if surfaceForm != lemmaForm:
+                    add_to_dicts(surfaceForm, lemmaForm)
 
-                # If we're parsing a line of a multiID token
-                else:
-                    tokenID = IDs[0]
-
-                    if (tokenID < startID) or (tokenID > endID):
-                        print(startID, tokenID, endID)
-                        print(line)
-                        raise ValueError("Invalid token ID for multiline token")
-
-                    if tokenID == startID:
-                        startSurface = columns[1]
-                        startLemma = columns[2]
-
-                        lemmaToken = startLemma
-                        builtToken = startSurface
-
-                        continue
-
-                    if tokenID == endID:
-                        endSurface = columns[1]
-                        endUpos = columns[2].lower()
-
-                        builtToken += endSurface
-                        if (builtToken != surfaceToken) or (endUpos not in ["aux", "part"]):
-                            multiIDToken = False
-                            startID = 0
-                            endID = 0
-                            surfaceToken = ""
-                            builtToken = ""
-                            lemmaToken = ""
-
-                            continue
-
-                        else:
-                            add_to_dicts(surfaceToken, lemmaToken)
-
-                            multiIDToken = False
-                            startID = 0
-                            endID = 0
-                            surfaceToken = ""
-                            builtToken = ""
-                            lemmaToken = ""
-
-                            continue
 
+def build_partial_lexicon(file_path):
+    """
+    Build the suffix and replacement dictionaries of a single file (run by the workers of build_lexicons).
 
-# Initialize empty dictionaries
-suffix_dict = {}
-replacement_dict = {}
-
-# Files used to build dictionaries
-boun_train = "../corpora/UD_Turkish-BOUN/tr_boun-ud-train.conllu"
-boun_dev = "../corpora/UD_Turkish-BOUN/tr_boun-ud-dev.conllu"
-# boun_test = "../corpora/UD_Turkish-BOUN/tr_boun-ud-test.conllu"
-penn_train = "../corpora/UD_Turkish-Penn/tr_penn-ud-train.conllu"
-penn_dev = "../corpora/UD_Turkish-Penn/tr_penn-ud-dev.conllu"
-penn_test = "../corpora/UD_Turkish-Penn/tr_penn-ud-test.conllu"
-
-# file_paths = [boun_train, boun_dev, boun_test, penn_train, penn_dev, penn_test]
-file_paths = [boun_train, boun_dev, penn_train, penn_dev, penn_test]
-
-print("Building MWE dictionary using files:")
-for file_path in file_paths:
-    print("\t" + file_path)
-print()
-
-# Build dictionaries from files
-for file_path in file_paths:
-    # print(file_path)
+    Returns:
+        suffix_dict (dict): The nested hash table of the suffixes in the file.
+        replacement_dict (dict): Dictionary of the replacement Counters of the suffixes in the file.
+    """
+    suffix_dict = {}
+    replacement_dict = {}
     build_suffix_and_replacement_lexicon(file_path, suffix_dict, replacement_dict)
+    return suffix_dict, replacement_dict
 
-# Compile replacement dictionary (handles duplicates)
-compile_replacement_dict(replacement_dict)
 
-# Export the dictionaries to files using pickle
-suffix_export_path = "./suffix_dict.pkl"
-with open(suffix_export_path, "wb") as file:
-    pickle.dump(suffix_dict, file)
-    print(f"Build completed, suffix dictionary exported to file:\n\t{suffix_export_path}")
+def build_lexicons(file_paths, workers=None):
+    """
+    Build the suffix and replacement dictionaries of the files in parallel. Each worker process builds the
+    dictionaries of one file, and the partial dictionaries are merged in the order of the files (so the result
+    is the same as building from the files one after another).
+
+    Args:
+        file_paths (list): Paths to the .connlu files.
+        workers (int): Number of worker processes (number of CPUs if None).
 
-replacement_export_path = "./replacement_dict.pkl"
-with open(replacement_export_path, "wb") as file:
-    pickle.dump(replacement_dict, file)
-    print(f"Build completed, replacement dictionary exported to file:\n\t{replacement_export_path}")
\ No newline at end of file
+    Returns:
+        suffix_dict (dict): The nested hash table that stores suffixes.
+        replacement_dict (dict): Dictionary that stores suffixes and the most frequent replacements of them.
+        replacement_counts (dict): Dictionary that stores suffixes and the counts of each of their replacements.
+    """
+    suffix_dict = {}
+    replacement_dict = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for partial_suffix_dict, partial_replacement_dict in executor.map(build_partial_lexicon, file_paths):
+            merge_suffix_dicts(suffix_dict, partial_suffix_dict)
+            merge_replacement_dicts(replacement_dict, partial_replacement_dict)
+
+    # Keep the full frequency table of the replacements, before compiling the replacement dictionary (handles
+    # duplicates)
+    replacement_counts = {suffix: dict(counts) for suffix, counts in replacement_dict.items()}
+    compile_replacement_dict(replacement_dict)
+
+    return suffix_dict, replacement_dict, replacement_counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the suffix and replacement lexicons of the stemmer.")
+    parser.add_argument("--all-treebanks", action="store_true",
+                        help="Build from all .conllu files of all UD_Turkish-* treebanks (including test sets)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Number of worker processes")
+    args = parser.parse_args()
+
+    # Files used to build dictionaries
+    corpora_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "corpora")
+    boun_train = os.path.join(corpora_dir, "UD_Turkish-BOUN", "tr_boun-ud-train.conllu")
+    boun_dev = os.path.join(corpora_dir, "UD_Turkish-BOUN", "tr_boun-ud-dev.conllu")
+    # boun_test = os.path.join(corpora_dir, "UD_Turkish-BOUN", "tr_boun-ud-test.conllu")
+    penn_train = os.path.join(corpora_dir, "UD_Turkish-Penn", "tr_penn-ud-train.conllu")
+    penn_dev = os.path.join(corpora_dir, "UD_Turkish-Penn", "tr_penn-ud-dev.conllu")
+    penn_test = os.path.join(corpora_dir, "UD_Turkish-Penn", "tr_penn-ud-test.conllu")
+
+    # file_paths = [boun_train, boun_dev, boun_test, penn_train, penn_dev, penn_test]
+    file_paths = [boun_train, boun_dev, penn_train, penn_dev, penn_test]
+    if args.all_treebanks:
+        file_paths = sorted(glob.glob(os.path.join(corpora_dir, "UD_Turkish-*", "*.conllu")))
+
+    print("Building suffix and replacement dictionaries using files:")
+    for file_path in file_paths:
+        print("\t" + file_path)
+    print()
+
+    # Build dictionaries from files (in parallel)
+    start = time.perf_counter()
+    suffix_dict, replacement_dict, replacement_counts = build_lexicons(file_paths, args.workers)
+    print(f"Built in {time.perf_counter() - start:.2f} s")
+
+    # Export the dictionaries to files using pickle
+    suffix_export_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "suffix_dict.pkl")
+    with open(suffix_export_path, "wb") as file:
+        pickle.dump(suffix_dict, file)
+        print(f"Build completed, suffix dictionary exported to file:\n\t{suffix_export_path}")
+
+    replacement_export_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replacement_dict.pkl")
+    with open(replacement_export_path, "wb") as file:
+        pickle.dump(replacement_dict, file)
+        print(f"Build completed, replacement dictionary exported to file:\n\t{replacement_export_path}")
+
+    # Binary lexicon files of the compiled suffix automaton and the replacement dictionary, used by the stemmer
+    automaton_export_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "suffix_automaton.bin")
+    SuffixAutomaton.from_dict(suffix_dict).save(automaton_export_path)
+    # The checksums are verified once here (the stemmer doesn't verify them when loading the lexicons)
+    load_suffix_automaton(automaton_export_path, verify=True)
+    print(f"Compiled suffix automaton exported to file:\n\t{automaton_export_path}")
+
+    replacement_lexicon_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replacement_dict.bin")
+    save_replacement_dict(replacement_dict, replacement_lexicon_path)
+    load_replacement_dict(replacement_lexicon_path, verify=True)
+    print(f"Replacement dictionary exported to file:\n\t{replacement_lexicon_path}")
+
+    # The full frequency table lets the stemmer select replacements by their confidence at runtime
+    counts_export_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replacement_counts.pkl")
+    with open(counts_export_path, "wb") as file:
+        pickle.dump(replacement_counts, file)
+        print(f"Build completed, replacement frequency table exported to file:\n\t{counts_export_path}")
@@ -1,6 +1,20 @@
 from tokenizer.ml_based_tokenizer import main2
 from tokenizer.rule_based_tokenizer import InputType
-import pickle
+from stemmer.suffix_automaton import SuffixAutomaton, load_suffix_automaton, load_replacement_dict
+from utils.resource_registry import get_resource
+import numpy as np
+import os
+
+# Paths of the suffix and replacement dictionaries (exported by build_suffix_and_replacement_lexicon.py)
+SUFFIX_DICT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "suffix_dict.pkl")
+REPLACEMENT_DICT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replacement_dict.pkl")
+# Path of the frequency table of the replacements of each suffix (exported by the same builder)
+REPLACEMENT_COUNTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replacement_counts.pkl")
+# Paths of the binary lexicon files of the compiled suffix automaton and the replacement dictionary (exported by
+# the same builder, or converted from the pickle files by utils/convert_lexicons.py), used at runtime
+SUFFIX_AUTOMATON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "suffix_automaton.bin")
+REPLACEMENT_LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replacement_dict.bin")
+
 
 def detect_suffix_and_replacement(token, suffix_dict, replacement_dict):
     """
@@ -72,12 +86,17 @@ def detect_suffix(token, suffix_dict):
 
     Args:
         token (string): Token to be stemmed
-        suffix_dict (dict): The nested hash table that stores suffixes.
+        suffix_dict (dict): The nested hash table that stores suffixes (or its compiled SuffixAutomaton).
 
     Returns:
         suffix (string): Suffix part of the token.
     """
 
+    # If the suffixes are compiled into an automaton, walk its transition table instead of the nested dicts
+    if isinstance(suffix_dict, SuffixAutomaton):
+        suffix_length = suffix_dict.detect_suffix_length(token)
+        return token[len(token) - suffix_length:] if suffix_length > 0 else None
+
     possibleSuffixes = []
 
     traversed = ""
@@ -114,6 +133,69 @@ def detect_suffix(token, suffix_dict):
     return None
 
 
+def select_replacements(replacement_counts, min_confidence=0.0):
+    """
+    Select the replacement of each suffix from the frequency table of the replacements. The most frequent
+    replacement (the first seen one among the most frequent ones) is selected, if its share among all
+    replacements of the suffix is at least min_confidence. Otherwise the suffix gets no replacement.
+
+    Args:
+        replacement_counts (dict): Dictionary that stores suffixes and the counts of each of their replacements.
+        min_confidence (float): Minimum share of the most frequent replacement (0 selects it for every suffix).
+
+    Returns:
+        replacement_dict (dict): Dictionary that stores suffixes and their selected replacements.
+    """
+    replacement_dict = {}
+    for suffix, counts in replacement_counts.items():
+        # max returns the first of the equally frequent replacements (counts keep the order they were seen in)
+        replacement, count = max(counts.items(), key=lambda item: item[1])
+        if count >= min_confidence * sum(counts.values()):
+            replacement_dict[suffix] = replacement
+
+    return replacement_dict
+
+
+def stem_batch(tokens, use_replacements=True, min_confidence=None):
+    """
+    Stem a batch of tokens. The tokens are deduplicated, each distinct surface form is stemmed once (its
+    suffix removed and the replacement of the suffix appended), and the stems are scattered back to the
+    original order of the tokens.
+
+    Args:
+        tokens (list): Tokens to be stemmed.
+        use_replacements (bool): Append the replacements of the removed suffixes to the stems.
+        min_confidence (float): If given, replacements are selected from the frequency table of the
+            replacements with this minimum confidence (see select_replacements), instead of taking the most
+            frequent replacement of each suffix.
+
+    Returns:
+        stems (np.ndarray): Stems of the tokens (object array, in the same order as the tokens).
+        type_ids (np.ndarray): For each token, the index of its surface form among the distinct surface
+            forms (in order of first occurrence).
+    """
+    # Get the compiled suffix automaton and the replacement dictionary (loaded once per process)
+    automaton = get_resource(SUFFIX_AUTOMATON_PATH, load_suffix_automaton)
+    if not use_replacements:
+        replacement_dict = None
+    elif min_confidence is None:
+        replacement_dict = get_resource(REPLACEMENT_LEXICON_PATH, load_replacement_dict)
+    else:
+        replacement_dict = select_replacements(get_resource(REPLACEMENT_COUNTS_PATH), min_confidence)
+
+    # Deduplicate the tokens (assign an id to each distinct surface form)
+    type_indices = {}
+    type_ids = np.fromiter((type_indices.setdefault(token, len(type_indices)) for token in tokens),
+                           dtype=np.int64, count=len(tokens))
+
+    # Stem each distinct surface form once
+    type_stems = np.empty(len(type_indices), dtype=object)
+    type_stems[:] = [automaton.stem(token, replacement_dict) for token in type_indices]
+
+    # Scatter the stems back to the original order
+    return type_stems[type_ids], type_ids
+
+
 def main(input, input_type):
     # If the input is a file path or a string
     if input_type != InputType.LIST:
@@ -133,23 +215,8 @@ def main(input, input_type):
         if token.isalpha():
             tokens.append(token)
 
-    # Load the suffix and replacement dictionaries from the pickle files
-    suffix_dict_path = "/Users/lkk/Documents/BOUN CMPE/CMPE 561-Natural Language Processing/Application Project 1/stemmer/suffix_dict.pkl"
-    replacement_dict_path = "/Users/lkk/Documents/BOUN CMPE/CMPE 561-Natural Language Processing/Application Project 1/stemmer/replacement_dict.pkl"
-    with open(suffix_dict_path, "rb") as file:
-        suffix_dict = pickle.load(file)
-    with open(replacement_dict_path, "rb") as file:
-        replacement_dict = pickle.load(file)
-
-    stems = []
-
-    # Detect the suffix part of the token from the suffix dictionary and remove it
-    for token in tokens:
-        suffix = detect_suffix(token, suffix_dict)
-        if suffix is not None:
-            stems.append(token[:-len(suffix)])
-        else:
-            stems.append(token)
+    # Detect the suffix part of the tokens, and replace it with the corresponding replacement
+    stems, _ = stem_batch(tokens)
 
     for i in range(len(stems)):
         print(f"Surface:{tokens[i]}, Stem:{stems[i]}")
@@ -0,0 +1,241 @@
+import pickle
+from array import array
+from collections import deque
+from functools import lru_cache
+import numpy as np
+from utils.lexicon_file import write_lexicon, read_lexicon, encode_strings, decode_strings, as_memoryview
+
+# Kinds of the binary lexicon files holding suffix automatons and replacement dictionaries
+AUTOMATON_LEXICON_KIND = "suffix_automaton"
+REPLACEMENT_LEXICON_KIND = "replacements"
+
+
+class SuffixAutomaton:
+    """
+    Compiled (array based) form of the nested suffix dictionary built by build_suffix_and_replacement_lexicon.py.
+
+    Characters of the suffixes are mapped to integer codes (index of the char in the alphabet), and the nodes of
+    the reversed suffix trie are numbered in breadth first order (root node is 0). Transitions are kept in a dense
+    table: transitions[node * len(alphabet) + char code] is the next node (-1 if there is no such transition).
+    The terminal bitmap has the bit of node n set if a suffix ends at that node.
+    """
+
+    def __init__(self, alphabet, transitions, terminal):
+        self.alphabet = alphabet
+        self.transitions = transitions
+        self.terminal = terminal
+        self.char_codes = {char: code for code, char in enumerate(alphabet)}
+
+        # The walk indexes the arrays through memoryviews (no copy, so the pages of an automaton mapped from a
+        # binary lexicon file stay shared between the processes through the page cache)
+        self._transitions = as_memoryview(transitions, "i")
+        self._terminal = as_memoryview(terminal, "B")
+
+    @classmethod
+    def from_dict(cls, suffix_dict):
+        """
+        Compile a nested suffix dictionary into a SuffixAutomaton.
+
+        Args:
+            suffix_dict (dict): The nested hash table that stores (reversed) suffixes.
+
+        Returns:
+            automaton (SuffixAutomaton): The compiled automaton.
+        """
+        # Number the levels of the nested dictionary in breadth first order, and collect the alphabet
+        levels = []
+        queue = deque([suffix_dict])
+        chars = set()
+        while queue:
+            level = queue.popleft()
+            levels.append(level)
+            for char, next_level in level.items():
+                if char != "END":
+                    chars.add(char)
+                    queue.append(next_level)
+
+        alphabet = "".join(sorted(chars))
+        char_codes = {char: code for code, char in enumerate(alphabet)}
+        transitions = array("i", [-1]) * (len(levels) * len(alphabet))
+        terminal = bytearray((len(levels) + 7) // 8)
+
+        next_node = 1
+        for node, level in enumerate(levels):
+            if ("END" in level) and (level["END"] == True):
+                terminal[node >> 3] |= 1 << (node & 7)
+            # Children are numbered in the same (breadth first) order they were queued above
+            for char in level.keys():
+                if char != "END":
+                    transitions[node * len(alphabet) + char_codes[char]] = next_node
+                    next_node += 1
+
+        return cls(alphabet, transitions, terminal)
+
+    def save(self, path):
+        """
+        Write the transition table and the terminal bitmap of the automaton to a binary lexicon file (see
+        utils.lexicon_file), with the alphabet kept as the code points of its chars.
+
+        Args:
+            path (string): Path of the file.
+        """
+        write_lexicon(path, AUTOMATON_LEXICON_KIND,
+                      {"alphabet": np.array([ord(char) for char in self.alphabet], dtype=np.uint32),
+                       "transitions": np.asarray(self.transitions, dtype=np.int32),
+                       "terminal": np.frombuffer(bytes(self.terminal), dtype=np.uint8)})
+
+    def suffix_lengths(self, token):
+        """
+        Get the lengths of the suffixes (in the automaton) that the token ends with, from the shortest to the
+        longest.
+        """
+        lengths = []
+        transitions = self._transitions
+        terminal = self._terminal
+        char_codes = self.char_codes
+        alphabet_size = len(self.alphabet)
+
+        node = 0
+        length = 0
+        for char in reversed(token):
+            code = char_codes.get(char)
+            if code is None:
+                break
+            node = transitions[node * alphabet_size + code]
+            if node < 0:
+                break
+            length += 1
+            if (terminal[node >> 3] >> (node & 7)) & 1:
+                lengths.append(length)
+
+        return lengths
+
+    def detect_suffix_length(self, token):
+        """
+        Get the length of the suffix part of a token (0 if the token has no suffix). The longest suffix that
+        leaves a valid stem (longer than one char, or the single char stem "o") is selected.
+        """
+        lengths = self.suffix_lengths(token)
+        for length in reversed(lengths):
+            stem_length = len(token) - length
+            if stem_length > 1 or (stem_length == 1 and token[0] == "o"):
+                return length
+
+        return 0
+
+    def stem(self, token, replacement_dict=None):
+        """
+        Get the stem of a token: the token without its suffix part, with the replacement of the suffix (if there
+        is one in the replacement dictionary) appended. The longest suffix that leaves a valid stem (longer than
+        one char, or the single char stem "o") is selected.
+
+        Args:
+            token (string): Token to be stemmed.
+            replacement_dict (dict): The dictionary that stores replacements for suffixes (no replacements if None).
+
+        Returns:
+            stem (string): Stem of the token (the token itself if it has no suffix).
+        """
+        if replacement_dict is None:
+            return token[:len(token) - self.detect_suffix_length(token)]
+
+        for length in reversed(self.suffix_lengths(token)):
+            stem = token[:len(token) - length] + replacement_dict.get(token[len(token) - length:], "")
+            if len(stem) > 1 or stem == "o":
+                return stem
+
+        return token
+
+
+class CachedStemmer:
+    """
+    Stemmer removing the suffixes detected by a SuffixAutomaton, with a bounded LRU cache of the stems keyed by
+    the surface form of the token (surface forms repeat a lot in Turkish text).
+    """
+
+    def __init__(self, automaton, replacement_dict=None, cache_size=1 << 16):
+        self.automaton = automaton
+        self.replacement_dict = replacement_dict
+        self._cached_stem = lru_cache(maxsize=cache_size)(self._stem)
+
+    def _stem(self, token):
+        return self.automaton.stem(token, self.replacement_dict)
+
+    def stem(self, token):
+        return self._cached_stem(token)
+
+    def cache_stats(self):
+        """
+        Get the counters of the stem cache.
+
+        Returns:
+            stats (dict): Number of hits and misses, hit rate, and current and maximum size of the cache.
+        """
+        info = self._cached_stem.cache_info()
+        lookups = info.hits + info.misses
+        return {"hits": info.hits,
+                "misses": info.misses,
+                "hit_rate": info.hits / lookups if lookups > 0 else 0.0,
+                "size": info.currsize,
+                "max_size": info.maxsize}
+
+    def clear_cache(self):
+        self._cached_stem.cache_clear()
+
+
+def load_suffix_automaton(path, verify=False):
+    """
+    Load a suffix automaton from the binary lexicon file (.bin) exported by build_suffix_and_replacement_lexicon.py,
+    or compile it from the pickle file (.pkl) of the nested suffix dictionary.
+
+    Args:
+        path (string): Path of the file.
+        verify (bool): Check the checksum of the binary lexicon file. It reads the whole file, so it is off at
+            runtime (every process loads the file) and done once when the file is written.
+
+    Returns:
+        automaton (SuffixAutomaton): The suffix automaton.
+    """
+    if path.endswith(".pkl"):
+        with open(path, "rb") as file:
+            return SuffixAutomaton.from_dict(pickle.load(file))
+
+    sections = read_lexicon(path, AUTOMATON_LEXICON_KIND, verify)
+    alphabet = "".join(chr(code) for code in sections["alphabet"].tolist())
+    return SuffixAutomaton(alphabet, sections["transitions"], sections["terminal"])
+
+
+def save_replacement_dict(replacement_dict, path):
+    """
+    Write a replacement dictionary (suffixes and their replacements) to a binary lexicon file, as two string
+    tables.
+    """
+    suffix_offsets, suffix_data = encode_strings(list(replacement_dict.keys()))
+    replacement_offsets, replacement_data = encode_strings(list(replacement_dict.values()))
+    write_lexicon(path, REPLACEMENT_LEXICON_KIND, {"suffix_offsets": suffix_offsets,
+                                                   "suffix_data": suffix_data,
+                                                   "replacement_offsets": replacement_offsets,
+                                                   "replacement_data": replacement_data})
+
+
+def load_replacement_dict(path, verify=False):
+    """
+    Load a replacement dictionary from the binary lexicon file (.bin) written by save_replacement_dict, or from
+    its pickle file (.pkl).
+
+    Args:
+        path (string): Path of the file.
+        verify (bool): Check the checksum of the binary lexicon file. It reads the whole file, so it is off at
+            runtime (every process loads the file) and done once when the file is written.
+
+    Returns:
+        replacement_dict (dict): Suffixes and their replacements.
+    """
+    if path.endswith(".pkl"):
+        with open(path, "rb") as file:
+            return pickle.load(file)
+
+    sections = read_lexicon(path, REPLACEMENT_LEXICON_KIND, verify)
+    suffixes = decode_strings(sections["suffix_offsets"], sections["suffix_data"])
+    replacements = decode_strings(sections["replacement_offsets"], sections["replacement_data"])
+    return dict(zip(suffixes, replacements))
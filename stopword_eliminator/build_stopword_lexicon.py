@@ -0,0 +1,71 @@
+import argparse
+import glob
+import os
+from collections import Counter
+from utils.conllu_reader import iter_sentences
+from utils.turkish_text import turkish_lower
+from stopword_eliminator.static_stopword_eliminator import STOPWORD_LEXICON_PATH, load_stopword_lexicon
+
+# Universal POS tags of the closed class (function) words, whose surface forms are stopword candidates
+FUNCTION_WORD_TAGS = frozenset(["ADP", "AUX", "CCONJ", "DET", "PART", "PRON", "SCONJ"])
+
+
+def count_function_words(file_path, counts):
+    """
+    Parse a .connlu file and count the (Turkish lowercase) surface forms of its function words.
+
+    Args:
+        file_path (string): Path to the .connlu file (or the already read sentences of the file).
+        counts (Counter): Counter that stores the counts of the surface forms.
+    """
+    for sentence in iter_sentences(file_path):
+        for columns in sentence.words:
+            # Fourth column holds the universal pos tag of the word
+            if columns[3] in FUNCTION_WORD_TAGS and columns[1].isalpha():
+                counts[turkish_lower(columns[1])] += 1
+
+
+def build_stopword_lexicon(file_paths, stopwords=(), min_count=20):
+    """
+    Build a stopword lexicon from the function words of the corpora, frequent enough in them.
+
+    Args:
+        file_paths (list): Paths to the .connlu files.
+        stopwords (iterable): Stopwords that are kept in the lexicon (e.g. the current lexicon).
+        min_count (int): Minimum number of occurrences of a function word.
+
+    Returns:
+        stopwords (list): Sorted list of the stopwords.
+    """
+    counts = Counter()
+    for file_path in file_paths:
+        count_function_words(file_path, counts)
+
+    lexicon = set(stopwords)
+    lexicon.update(word for word, count in counts.items() if count >= min_count)
+
+    return sorted(lexicon)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the Turkish stopword lexicon of the static stopword eliminator.")
+    parser.add_argument("--min-count", type=int, default=20, help="Minimum number of occurrences of a function word")
+    args = parser.parse_args()
+
+    # Files used to build the lexicon
+    corpora_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "corpora")
+    file_paths = sorted(glob.glob(os.path.join(corpora_dir, "UD_Turkish-*", "*-train.conllu")))
+
+    print("Building stopword lexicon using files:")
+    for file_path in file_paths:
+        print("\t" + file_path)
+    print()
+
+    # Keep the stopwords of the current lexicon, and add the frequent function words of the corpora
+    current_stopwords = load_stopword_lexicon(STOPWORD_LEXICON_PATH) if os.path.exists(STOPWORD_LEXICON_PATH) else ()
+    stopwords = build_stopword_lexicon(file_paths, current_stopwords, args.min_count)
+
+    with open(STOPWORD_LEXICON_PATH, "w", encoding="utf-8") as file:
+        for stopword in stopwords:
+            file.write(stopword + "\n")
+    print(f"Build completed, {len(stopwords)} stopwords exported to file:\n\t{STOPWORD_LEXICON_PATH}")
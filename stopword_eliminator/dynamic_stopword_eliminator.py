@@ -0,0 +1,263 @@
+import argparse
+import heapq
+import os
+import pickle
+from collections import Counter
+from utils.turkish_text import turkish_lower
+from utils.token_shard import unescape_token
+from stopword_eliminator.static_stopword_eliminator import StaticStopwordEliminator
+
+
+class MisraGries:
+    """
+    Misra-Gries heavy hitters summary, keeping approximate counts of the most frequent items with bounded memory.
+
+    At most 2 * capacity counters are kept. When there are more, the (capacity + 1)th largest count is subtracted
+    from all counters, and the counters that drop to zero are removed. A kept count underestimates the true count
+    of its item by at most total / (capacity + 1), so every item whose share is above 1 / (capacity + 1) is kept.
+    Summaries of different streams can be merged with the same bound.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}
+        # Total count of the items added to the summary
+        self.total = 0
+        # Sum of the counts subtracted by the compactions (a kept count underestimates the true count of its item
+        # by at most this much)
+        self.error = 0
+
+    def update(self, counts):
+        """
+        Add the counts of a batch of items (e.g. a Counter of the tokens of a document) to the summary.
+        """
+        summary = self.counts
+        for item, count in counts.items():
+            summary[item] = summary.get(item, 0) + count
+            self.total += count
+
+        if len(summary) > 2 * self.capacity:
+            self._compact()
+
+    def merge(self, other):
+        """
+        Merge another summary (of a different stream) into this one.
+        """
+        self.update(other.counts)
+        self.error += other.error
+        # The items of the other summary are already counted in its total, not in the sum of its kept counts
+        self.total += other.total - sum(other.counts.values())
+
+    def _compact(self):
+        threshold = heapq.nlargest(self.capacity + 1, self.counts.values())[-1]
+        self.error += threshold
+        self.counts = {item: count - threshold for item, count in self.counts.items() if count > threshold}
+
+    def most_common(self, n=None):
+        """
+        Get the items with the largest (approximate) counts, as (item, count) pairs.
+        """
+        if n is None:
+            return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        return heapq.nlargest(n, self.counts.items(), key=lambda item: item[1])
+
+
+def read_token_shard(path, document_size=1000):
+    """
+    Read a tokenized shard (one escaped token per line, as written by tokenizer/tokenize_corpora.py) as a stream
+    of documents. The shards don't keep document boundaries, so every document_size consecutive tokens form a
+    (pseudo) document.
+
+    Yields:
+        document (list): Tokens of the next document.
+    """
+    document = []
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            token = line.rstrip("\n")
+            if token == "":
+                continue
+            document.append(unescape_token(token))
+            if len(document) == document_size:
+                yield document
+                document = []
+
+    if document:
+        yield document
+
+
+def check_shard_unchanged(path, added_stat, stat):
+    """
+    Check that a shard which was already added has the same size and modification time as when it was added.
+
+    Args:
+        path (string): Absolute path of the shard.
+        added_stat (tuple): Size and modification time (in ns) of the shard when it was added.
+        stat (tuple): Current size and modification time of the shard.
+
+    Raises:
+        ValueError: If the shard changed.
+    """
+    if tuple(added_stat) != tuple(stat):
+        raise ValueError(f"Shard changed after it was added (shards are immutable, rebuild the statistics from "
+                         f"scratch): {path}")
+
+
+class DynamicStopwordEliminator:
+    """
+    Stopword eliminator whose stopwords are derived from the corpus. Term frequencies (number of occurrences) and
+    document frequencies (number of documents a token occurs in) of the (Turkish lowercase) tokens are collected
+    in one streaming pass, into Misra-Gries summaries (so memory doesn't grow with the size of the vocabulary).
+    The statistics can be saved and updated later with new shards. Shards are treated as immutable: the counts
+    of a shard can't be removed from the summaries, so a shard that changed after it was added can't be counted
+    again (build the statistics from scratch instead).
+    """
+
+    def __init__(self, capacity=10000):
+        self.term_frequencies = MisraGries(capacity)
+        self.document_frequencies = MisraGries(capacity)
+        self.document_count = 0
+        # Size and modification time of the shards already added (keyed by their absolute paths), so that a shard
+        # isn't counted twice and a shard that changed since is detected
+        self.shards = {}
+
+    def add_document(self, tokens):
+        """
+        Add the counts of the tokens of a document.
+
+        Args:
+            tokens (list): Tokens of the document (strings).
+        """
+        counts = Counter(turkish_lower(token) for token in tokens)
+        self.term_frequencies.update(counts)
+        self.document_frequencies.update(dict.fromkeys(counts, 1))
+        self.document_count += 1
+
+    def add_shard(self, path, document_size=1000):
+        """
+        Add the documents of a tokenized shard (see read_token_shard). Shards that were already added are skipped.
+
+        Returns:
+            added (bool): False if the shard was skipped.
+
+        Raises:
+            ValueError: If the shard was already added, but its size or modification time changed since (its old
+                counts can't be removed).
+        """
+        stat = os.stat(path)
+        shard_path = os.path.abspath(path)
+        if shard_path in self.shards:
+            check_shard_unchanged(shard_path, self.shards[shard_path], (stat.st_size, stat.st_mtime_ns))
+            return False
+
+        for document in read_token_shard(path, document_size):
+            self.add_document(document)
+        self.shards[shard_path] = (stat.st_size, stat.st_mtime_ns)
+        return True
+
+    def merge(self, other):
+        """
+        Merge the statistics of another eliminator (e.g. built from other shards in another process).
+        """
+        for shard_path, shard_stat in other.shards.items():
+            if shard_path in self.shards:
+                check_shard_unchanged(shard_path, self.shards[shard_path], shard_stat)
+
+        self.term_frequencies.merge(other.term_frequencies)
+        self.document_frequencies.merge(other.document_frequencies)
+        self.document_count += other.document_count
+        self.shards.update(other.shards)
+
+    def stopwords(self, top_k=None, min_document_ratio=None):
+        """
+        Get the stopwords: the tokens occurring in the most documents (ties broken by their term frequencies).
+
+        Args:
+            top_k (int): Number of stopwords (no limit if None).
+            min_document_ratio (float): Minimum ratio of the documents a stopword occurs in (no limit if None).
+                The (lower bounds of the) document frequencies kept by the summary are compared with the ratio,
+                so the selected tokens are guaranteed to occur in that many documents.
+
+        Returns:
+            stopwords (list): Stopwords, from the most to the least frequent.
+        """
+        term_counts = self.term_frequencies.counts
+        candidates = self.document_frequencies.most_common()
+        if min_document_ratio is not None:
+            candidates = [(token, count) for token, count in candidates
+                          if count >= min_document_ratio * self.document_count]
+
+        candidates.sort(key=lambda item: (item[1], term_counts.get(item[0], 0)), reverse=True)
+        if top_k is not None:
+            candidates = candidates[:top_k]
+
+        return [token for token, _ in candidates]
+
+    def eliminator(self, top_k=None, min_document_ratio=None):
+        """
+        Get a static eliminator filtering the current stopwords (see StaticStopwordEliminator).
+        """
+        return StaticStopwordEliminator(self.stopwords(top_k, min_document_ratio))
+
+    def save(self, path):
+        """
+        Save the statistics to a pickle file (as plain containers, so that the file doesn't depend on the import
+        path of this module).
+        """
+        state = {"capacity": self.term_frequencies.capacity,
+                 "term_frequencies": (self.term_frequencies.counts, self.term_frequencies.total,
+                                      self.term_frequencies.error),
+                 "document_frequencies": (self.document_frequencies.counts, self.document_frequencies.total,
+                                          self.document_frequencies.error),
+                 "document_count": self.document_count,
+                 "shards": self.shards}
+        with open(path, "wb") as file:
+            pickle.dump(state, file)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load the statistics saved with save.
+        """
+        with open(path, "rb") as file:
+            state = pickle.load(file)
+
+        eliminator = cls(state["capacity"])
+        for summary, key in [(eliminator.term_frequencies, "term_frequencies"),
+                             (eliminator.document_frequencies, "document_frequencies")]:
+            summary.counts, summary.total, summary.error = state[key]
+        eliminator.document_count = state["document_count"]
+        eliminator.shards = state["shards"]
+        return eliminator
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Derive stopwords from tokenized shards (one token per line).")
+    parser.add_argument("shards", nargs="+", help="Tokenized shard files (e.g. output of tokenizer/tokenize_corpora.py)")
+    parser.add_argument("-s", "--state", required=True,
+                        help="File keeping the statistics (updated incrementally if it exists)")
+    parser.add_argument("-o", "--output", required=True, help="File to write the stopwords to (one per line)")
+    parser.add_argument("-k", "--top-k", type=int, default=None, help="Number of stopwords")
+    parser.add_argument("-r", "--min-document-ratio", type=float, default=None,
+                        help="Minimum ratio of the documents a stopword occurs in")
+    parser.add_argument("-d", "--document-size", type=int, default=1000, help="Number of tokens per document")
+    parser.add_argument("-c", "--capacity", type=int, default=10000, help="Number of counters of the summaries")
+    args = parser.parse_args()
+
+    if os.path.exists(args.state):
+        eliminator = DynamicStopwordEliminator.load(args.state)
+    else:
+        eliminator = DynamicStopwordEliminator(args.capacity)
+
+    for shard in args.shards:
+        if eliminator.add_shard(shard, args.document_size):
+            print(f"Added: {shard}")
+        else:
+            print(f"Skipped (already added): {shard}")
+    eliminator.save(args.state)
+
+    stopwords = eliminator.stopwords(args.top_k, args.min_document_ratio)
+    with open(args.output, "w", encoding="utf-8") as file:
+        for stopword in stopwords:
+            file.write(stopword + "\n")
+    print(f"{len(stopwords)} stopwords ({eliminator.document_count} documents) exported to file:\n\t{args.output}")
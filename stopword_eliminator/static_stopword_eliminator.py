@@ -0,0 +1,128 @@
+import os
+import numpy as np
+from tokenizer.ml_based_tokenizer import main2
+from tokenizer.rule_based_tokenizer import InputType
+from tokenizer.custom_token import Token, TokenBatch
+from utils.resource_registry import get_resource
+from utils.turkish_text import turkish_lower
+
+# Path of the Turkish stopword lexicon (one stopword per line, see build_stopword_lexicon.py)
+STOPWORD_LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stopwords.txt")
+
+
+def load_stopword_lexicon(path):
+    """
+    Load a stopword lexicon (one stopword per line) into a frozenset of Turkish lowercase stopwords.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        return frozenset(turkish_lower(line.strip()) for line in file if line.strip() != "")
+
+
+def intern_tokens(tokens):
+    """
+    Intern the tokens into integer IDs (index of the token in the list of distinct tokens).
+
+    Args:
+        tokens (list): List of tokens (strings).
+
+    Returns:
+        types (list): Distinct tokens, in the order of their first occurrence.
+        token_ids (np.ndarray): ID of each token.
+    """
+    type_ids = {}
+    token_ids = np.fromiter((type_ids.setdefault(token, len(type_ids)) for token in tokens), dtype=np.int64,
+                            count=len(tokens))
+    return list(type_ids), token_ids
+
+
+class StaticStopwordEliminator:
+    """
+    Stopword eliminator using a fixed stopword lexicon. Tokens are compared with the stopwords after Turkish
+    lowercasing (so "İÇİN", "İçin" and "için" are all stopwords).
+    """
+
+    def __init__(self, stopwords):
+        self.stopwords = frozenset(turkish_lower(stopword) for stopword in stopwords)
+
+    @classmethod
+    def from_file(cls, path=STOPWORD_LEXICON_PATH):
+        """
+        Create an eliminator from a stopword lexicon file (the lexicon is loaded once per process).
+        """
+        return cls(get_resource(path, load_stopword_lexicon))
+
+    def is_stopword(self, token):
+        return turkish_lower(token) in self.stopwords
+
+    def filter(self, tokens):
+        """
+        Remove the stopwords from a stream of tokens. The tokens can be strings (e.g. output of the ml based
+        tokenizer) or Token objects (e.g. output of rule_based_tokenizer.tokenize_text).
+
+        Args:
+            tokens (iterable): Tokens to be filtered.
+
+        Yields:
+            token (string or Token): The next token that isn't a stopword.
+        """
+        stopwords = self.stopwords
+        for token in tokens:
+            text = token.text if isinstance(token, Token) else token
+            if turkish_lower(text) not in stopwords:
+                yield token
+
+    def stopword_mask(self, types, token_ids):
+        """
+        Vectorized stopword check of interned tokens (see intern_tokens). Each distinct token is checked once,
+        and the result is spread to the tokens with a single indexing operation.
+
+        Args:
+            types (list): Distinct tokens.
+            token_ids (np.ndarray): ID (index in types) of each token.
+
+        Returns:
+            mask (np.ndarray): Boolean array, True for the tokens that are stopwords.
+        """
+        stopwords = self.stopwords
+        is_stopword = np.fromiter((turkish_lower(token) in stopwords for token in types), dtype=bool,
+                                  count=len(types))
+        return is_stopword[token_ids]
+
+    def filter_batch(self, batch):
+        """
+        Remove the stopwords from a TokenBatch (e.g. output of rule_based_tokenizer.tokenize_text_to_batch or
+        ml_based_tokenizer.createTokenBatch).
+
+        Args:
+            batch (TokenBatch): Tokens to be filtered.
+
+        Returns:
+            batch (TokenBatch): A new batch holding the tokens that aren't stopwords.
+        """
+        types, token_ids = intern_tokens(batch.texts())
+        keep = ~self.stopword_mask(types, token_ids)
+        return TokenBatch(batch.source, batch.starts[keep], batch.ends[keep],
+                          None if batch.types is None else batch.types[keep])
+
+
+def main(input, input_type):
+    # If the input is a file path or a string
+    if input_type != InputType.LIST:
+        # First, tokenize the text in the file/string using the ml based tokenizer.
+        if input_type == InputType.FILE_PATH:
+            tokens = main2(input, InputType.FILE_PATH)
+        else:
+            tokens = main2(input, InputType.STRING)
+
+    # If input is directly provided as a list of tokens, just use it
+    else:
+        tokens = input
+
+    # Remove the stopwords from the tokens
+    eliminator = StaticStopwordEliminator.from_file()
+    filtered_tokens = list(eliminator.filter(tokens))
+
+    for token in filtered_tokens:
+        print(token)
+
+    return filtered_tokens
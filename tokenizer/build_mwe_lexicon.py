@@ -1,4 +1,11 @@
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import os
 import pickle
+import time
+from .mwe_trie import MWETrie, load_mwe_trie
+from utils.conllu_reader import iter_sentences
+from utils.turkish_text import turkish_lower
 
 def add_mwe_to_dict(mwe_dict, mwe):
     """
@@ -30,92 +37,132 @@ def add_mwe_to_dict(mwe_dict, mwe):
             current_level["END"] = True
 
 
+def merge_mwe_dicts(mwe_dict, other_mwe_dict):
+    """
+    Merge an MWE dictionary (nested hash table) into another one.
+
+    Args:
+        mwe_dict (dict): The nested hash table that the MWEs are merged into.
+        other_mwe_dict (dict): The nested hash table whose MWEs are added.
+    """
+    for word, next_level in other_mwe_dict.items():
+        if word == "END":
+            mwe_dict["END"] = True
+        elif word not in mwe_dict:
+            # The whole level can be moved, no MWE under it is present in the target dictionary
+            mwe_dict[word] = next_level
+        else:
+            merge_mwe_dicts(mwe_dict[word], next_level)
+
+
 def extract_MWEs_into_dict(file_path, mwe_dict):
     """
     Parse a .cupt file, extract MWEs from sentences and add them to the MWE dictionary.
 
     Args:
-        file_path (string): Path to the .cupt file.
+        file_path (string): Path to the .cupt file (or the already read sentences of the file).
         mwe_dict (dict): The nested hash table that stores MWEs.
     """
 
-    # Dictionary to store the MWEs in the currently parsed sentence
-    sentence_MWEs = {}
-
-    with open(file_path, 'r', encoding='utf-8') as file:
-        # Check each line in the file
-        for line in file:
-
-            # If line is an empty line or starts with a '#' character, then it either marks the
-            # end of the sentence, or is an id/info line.
-            if line.strip() == "" or line.startswith("#"):
-                # In that case, add the MWEs (if present) in the current sentence to the dictionary
-                if len(sentence_MWEs) > 0:
-                    for mwe in sentence_MWEs.values():
-                        # print(mwe)
-                        add_mwe_to_dict(mwe_dict, mwe)
-
-                # And reset sentence
-                current_mwe = sentence_MWEs.clear()
-
-            # If it is a word line
-            else:
-                # Split word line into columns
-                columns = line.strip().split("\t")
-                # .cupt format should have 11 columns (10 columns from .connlu format + 1 additional
-                # column for mwe info). If otherwise, assume invalid line and continue.
-                if len(columns) < 11:
-                    continue
-
-                # Get last column which holds mwe info
-                mwe_info = columns[10]
-                # Also get the pos tag of the word (because we will ignore "aux" and "punct" types that belong
-                # to MWEs as they're not complete words, they won't be added to dictionary)
-                pos_tag = columns[3].lower()
-
-                # If word is not part of a mwe, or undefined, or ignored type, continue
-                if mwe_info == "*" or mwe_info == "_" or (pos_tag in ["aux", "punct"]):
-                    continue
-                # If word is a valid part of a mwe
-                else:
-                    # It is possible that one word may be part of multiple MWEs, in that case
-                    # the info is separated by a ";", so we split by it to get info of each part (each MWE)
-                    mwe_parts = mwe_info.split(";")
-
-                    for part in mwe_parts:
-                        # Get the id of the mwe part, they can be of the form 1:VID, 2:LVC or just 1, 2 etc.
-                        mwe_id = part.split(":")[0]
-
-                        # If this id appears for the first time in the sentence, then it is the beginning of a new MWE
-                        if mwe_id not in sentence_MWEs.keys():
-                            # Then, add a new list to hold words of mwe with this id
-                            sentence_MWEs[mwe_id] = []
-
-                        # Append the lemma of this word as the next word in the mwe
-                        lemma = columns[2].lower()
-                        sentence_MWEs[mwe_id].append(lemma)
-
-
-# Initialize empty mwe dictionary
-mwe_dict = {}
-
-# Files used to build mwe dictionary
-train_path = "../corpora/PARSEME corpora annotated for verbal multiword expressions (version 1.3)/TR/train.cupt"
-test_path = "../corpora/PARSEME corpora annotated for verbal multiword expressions (version 1.3)/TR/test.cupt"
-dev_path = "../corpora/PARSEME corpora annotated for verbal multiword expressions (version 1.3)/TR/dev.cupt"
-file_paths = [train_path, test_path, dev_path]
-
-print("Building MWE dictionary using files:")
-for file_path in file_paths:
-    print("\t" + file_path)
-print()
-
-# Build dictionary from files
-for file_path in file_paths:
+    # .cupt format should have 11 columns (10 columns from .connlu format + 1 additional column for mwe info),
+    # the reader skips the lines with less columns
+    for sentence in iter_sentences(file_path, min_columns=11):
+        # Dictionary to store the MWEs in the current sentence
+        sentence_MWEs = {}
+
+        for columns in sentence.words:
+            # Get last column which holds mwe info
+            mwe_info = columns[10]
+            # Also get the pos tag of the word (because we will ignore "aux" and "punct" types that belong
+            # to MWEs as they're not complete words, they won't be added to dictionary)
+            pos_tag = columns[3].lower()
+
+            # If word is not part of a mwe, or undefined, or ignored type, continue
+            if mwe_info == "*" or mwe_info == "_" or (pos_tag in ["aux", "punct"]):
+                continue
+
+            # It is possible that one word may be part of multiple MWEs, in that case
+            # the info is separated by a ";", so we split by it to get info of each part (each MWE)
+            for part in mwe_info.split(";"):
+                # Get the id of the mwe part, they can be of the form 1:VID, 2:LVC or just 1, 2 etc.
+                mwe_id = part.split(":")[0]
+
+                # If this id appears for the first time in the sentence, then it is the beginning of a new MWE
+                if mwe_id not in sentence_MWEs:
+                    # Then, add a new list to hold words of mwe with this id
+                    sentence_MWEs[mwe_id] = []
+
+                # Append the lemma of this word (lowercased with the Turkish casing rules) as the next word in the mwe
+                sentence_MWEs[mwe_id].append(turkish_lower(columns[2]))
+
+        # At the end of the sentence, add the MWEs (if present) in the sentence to the dictionary
+        for mwe in sentence_MWEs.values():
+            add_mwe_to_dict(mwe_dict, mwe)
+
+
+def extract_partial_mwe_dict(file_path):
+    """
+    Extract the MWEs of a single file into a new MWE dictionary (run by the workers of build_mwe_dict).
+    """
+    mwe_dict = {}
     extract_MWEs_into_dict(file_path, mwe_dict)
+    return mwe_dict
+
 
-# Export the dictionary to a file using pickle
-export_file_path = "./mwe_dict.pkl"
-with open(export_file_path, "wb") as file:
-    pickle.dump(mwe_dict, file)
-    print(f"Build completed, dictionary exported to file:\n\t{export_file_path}")
+def build_mwe_dict(file_paths, workers=None):
+    """
+    Build the MWE dictionary of the files in parallel. Each worker process extracts the MWEs of one file, and
+    the partial dictionaries are merged in the order of the files (so the result is the same as extracting
+    from the files one after another).
+
+    Args:
+        file_paths (list): Paths to the .cupt files.
+        workers (int): Number of worker processes (number of CPUs if None).
+
+    Returns:
+        mwe_dict (dict): The nested hash table that stores MWEs.
+    """
+    mwe_dict = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for partial_mwe_dict in executor.map(extract_partial_mwe_dict, file_paths):
+            merge_mwe_dicts(mwe_dict, partial_mwe_dict)
+
+    return mwe_dict
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the MWE lexicon of the rule based tokenizer.")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Number of worker processes")
+    args = parser.parse_args()
+
+    # Files used to build mwe dictionary
+    parseme_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "corpora",
+                               "PARSEME corpora annotated for verbal multiword expressions (version 1.3)", "TR")
+    train_path = os.path.join(parseme_dir, "train.cupt")
+    test_path = os.path.join(parseme_dir, "test.cupt")
+    dev_path = os.path.join(parseme_dir, "dev.cupt")
+    file_paths = [train_path, test_path, dev_path]
+
+    print("Building MWE dictionary using files:")
+    for file_path in file_paths:
+        print("\t" + file_path)
+    print()
+
+    # Build dictionary from files (in parallel)
+    start = time.perf_counter()
+    mwe_dict = build_mwe_dict(file_paths, args.workers)
+    print(f"Built in {time.perf_counter() - start:.2f} s")
+
+    # Export the dictionary to a file using pickle
+    export_file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mwe_dict.pkl")
+    with open(export_file_path, "wb") as file:
+        pickle.dump(mwe_dict, file)
+        print(f"Build completed, dictionary exported to file:\n\t{export_file_path}")
+
+    # Also export the compiled (flat array) form of the dictionary, which is used by the tokenizer for lookups
+    trie_export_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mwe_trie.bin")
+    MWETrie.from_dict(mwe_dict).save(trie_export_path)
+    # The checksum is verified once here (the tokenizer doesn't verify it when loading the trie)
+    load_mwe_trie(trie_export_path, verify=True)
+    print(f"Compiled trie exported to file:\n\t{trie_export_path}")
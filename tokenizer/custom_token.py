@@ -1,4 +1,5 @@
 from enum import Enum
+import numpy as np
 
 class TokenType(Enum):
     WORD = 0
@@ -13,13 +14,85 @@ class TokenType(Enum):
     OTHER = 9
 
 class Token:
-    def __init__(self, id, text, token_type):
+    """
+    A token of a text. Besides its id and type, a token keeps its position in the source text (start and end
+    character offsets). If the token is created from a span of the source text, its text isn't copied, but
+    produced (sliced from the source) when requested.
+    """
+    __slots__ = ("id", "token_type", "start", "end", "source", "_text")
+
+    def __init__(self, id, text, token_type, start=None, end=None, source=None):
         self.id = id
-        self.text = text
         self.token_type = token_type
+        self.start = start
+        self.end = end
+        self.source = source
+        self._text = text
+
+    @classmethod
+    def from_span(cls, id, source, start, end, token_type):
+        """
+        Create a token from the span [start, end) of the source text (without copying the text).
+        """
+        return cls(id, None, token_type, start, end, source)
+
+    @property
+    def text(self):
+        if self._text is None:
+            return self.source[self.start:self.end]
+        return self._text
+
+    @text.setter
+    def text(self, text):
+        self._text = text
 
     def __repr__(self):
-        return f"Token(id={self.id}, text='{self.text}', token_type={self.token_type})"
+        return f"Token(id={self.id}, text='{self.text}', token_type={self.token_type}, start={self.start}, end={self.end})"
 
     def __str__(self):
         return f"{self.text}"
+
+class TokenBatch:
+    """
+    Tokens of a text kept as a struct of arrays (start offsets, end offsets and type values of the tokens), for
+    consumers processing a large number of tokens in bulk, without creating a Token object for each of them.
+    """
+    __slots__ = ("source", "starts", "ends", "types")
+
+    def __init__(self, source, starts, ends, types=None):
+        self.source = source
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        # Values of the TokenType of each token (None if the tokens don't have types)
+        self.types = None if types is None else np.asarray(types, dtype=np.int8)
+
+    @classmethod
+    def from_tokens(cls, source, tokens):
+        """
+        Create a batch from a list of Token objects (with offsets) of the source text.
+        """
+        starts = np.fromiter((token.start for token in tokens), dtype=np.int64, count=len(tokens))
+        ends = np.fromiter((token.end for token in tokens), dtype=np.int64, count=len(tokens))
+        types = np.fromiter((token.token_type.value for token in tokens), dtype=np.int8, count=len(tokens))
+        return cls(source, starts, ends, types)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        token_type = None if self.types is None else TokenType(int(self.types[i]))
+        return Token.from_span(i, self.source, int(self.starts[i]), int(self.ends[i]), token_type)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def lengths(self):
+        return self.ends - self.starts
+
+    def texts(self):
+        """
+        Get the texts of the tokens (sliced from the source text) as a list of strings.
+        """
+        source = self.source
+        return [source[start:end] for start, end in zip(self.starts.tolist(), self.ends.tolist())]
@@ -0,0 +1,12 @@
+import os
+from joblib import load
+from .native_model import exportModel
+from .ml_based_tokenizer import MODEL_FILE_PATH, SCALER_FILE_PATH, NATIVE_MODEL_FILE_PATH
+
+# Load the trained ml tokenizer (and the scaler fitted by the training step, if it was saved)
+model = load(MODEL_FILE_PATH)
+scaler = load(SCALER_FILE_PATH) if os.path.exists(SCALER_FILE_PATH) else None
+
+# Export the coefficients, intercept and scaling of the model, so that inference doesn't need sklearn
+exportModel(model, NATIVE_MODEL_FILE_PATH, scaler)
+print(f"Export completed, model exported to file:\n\t{NATIVE_MODEL_FILE_PATH}")
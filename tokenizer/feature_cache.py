@@ -0,0 +1,97 @@
+import hashlib
+import os
+import pickle
+import numpy as np
+from .feature_extraction import createFeatureMatrix, FEATURE_SCHEMA_VERSION
+from .ml_based_tokenizer import createLabelMatrix
+
+# Directory of the cached feature and label matrices of the training texts
+FEATURE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "feature_cache")
+
+# Size of the blocks the token list file is hashed in
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def getCacheKey(text, tokensPath):
+    """
+    Get the cache key of the matrices of a training text: a hash of the feature schema version, the text and the
+    token list file, so that the cached matrices are reused only if none of them has changed.
+
+    Args:
+        text (string): The training text.
+        tokensPath (string): Path of the token list (pickle) of the text.
+
+    Returns:
+        key (string): Hex digest of the hash.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"feature-schema-{FEATURE_SCHEMA_VERSION}\0".encode("utf-8"))
+    digest.update(text.encode("utf-8", "surrogatepass"))
+    digest.update(b"\0")
+    with open(tokensPath, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def getCachePaths(key, cacheDir=FEATURE_CACHE_DIR):
+    """
+    Get the paths of the cached feature and label matrices of a cache key.
+    """
+    return os.path.join(cacheDir, key + ".X.npy"), os.path.join(cacheDir, key + ".y.npy")
+
+
+def saveMatrices(path, array):
+    # Written to a temporary file first, so that an interrupted run doesn't leave a truncated matrix in the cache
+    with open(path + ".tmp", "wb") as file:
+        np.save(file, array)
+    os.replace(path + ".tmp", path)
+
+
+def createRawTrainingMatrices(text, tokens):
+    """
+    Create the unscaled feature matrix and the labels of a training text, in compact types: the binary features
+    and the distances (1 to MAX_DISTANCE) fit in uint8, so the cached matrices are 4 times smaller than the float32
+    feature matrix.
+
+    Returns:
+        X (np.ndarray): uint8 feature matrix of shape (N+1, 24) (numerical features unscaled).
+        y (np.ndarray): uint8 labels.
+    """
+    X = createFeatureMatrix(text, numericalScaling=None).astype(np.uint8)
+    y = createLabelMatrix(text, tokens).astype(np.uint8)
+    return X, y
+
+
+def getTrainingMatrices(text, tokensPath, cacheDir=FEATURE_CACHE_DIR, useCache=True):
+    """
+    Get the unscaled feature matrix and the labels of a training text (see createRawTrainingMatrices), from the
+    cache if they were computed before for the same text, token list and feature schema. Cached matrices are
+    memory-mapped (read only), so runs reusing them (e.g. hyperparameter sweeps) don't compute or copy them.
+
+    Args:
+        text (string): The training text.
+        tokensPath (string): Path of the token list (pickle) of the text (only loaded if the matrices aren't cached).
+        cacheDir (string): Directory of the cache.
+        useCache (bool): If False, the matrices are computed and the cache isn't read or written.
+
+    Returns:
+        X (np.ndarray): uint8 feature matrix.
+        y (np.ndarray): uint8 labels.
+    """
+    if useCache:
+        XPath, yPath = getCachePaths(getCacheKey(text, tokensPath), cacheDir)
+        if os.path.exists(XPath) and os.path.exists(yPath):
+            return np.load(XPath, mmap_mode="r"), np.load(yPath, mmap_mode="r")
+
+    with open(tokensPath, "rb") as file:
+        tokens = pickle.load(file)
+    X, y = createRawTrainingMatrices(text, tokens)
+
+    if useCache:
+        os.makedirs(cacheDir, exist_ok=True)
+        saveMatrices(XPath, X)
+        saveMatrices(yPath, y)
+
+    return X, y
@@ -0,0 +1,208 @@
+import re
+from enum import Enum
+import numpy as np
+from utils.turkish_text import UPPERCASE_LETTERS, LOWERCASE_LETTERS
+
+
+class Patterns(Enum):
+    WHITESPACE = re.compile(r"\s")
+    UPPER_ALPHABETICAL = re.compile(rf"[{UPPERCASE_LETTERS}]")
+    LOWER_ALPHABETICAL = re.compile(rf"[{LOWERCASE_LETTERS}]")
+    NUMBER = re.compile(r"\d")
+    PERIOD = re.compile(r"\.")
+    APOSTROPHE = re.compile(r"\'")
+    OTHER_EOS = re.compile(r'[\!\?…]')
+
+
+# Names of the character classes, in the order in which they are checked (a character belongs to the first
+# class whose pattern matches it, and to the "Other" class if none of the patterns match). Index of the name
+# in this list is the class code of the character.
+CHARACTER_CLASSES = ["Whitespace",
+                     "UpperAlphabetical",
+                     "LowerAlphabetical",
+                     "Number",
+                     "Period",
+                     "Apostrophe",
+                     "OtherEOS",
+                     "Other"]
+WHITESPACE_CLASS = 0
+OTHER_CLASS = len(CHARACTER_CLASSES) - 1
+
+# Names of the columns of the feature matrix (same columns, in the same order, as the Cursor features)
+FEATURE_NAMES = ([f"isLeft{name}" for name in CHARACTER_CLASSES] +
+                 [f"isRight{name}" for name in CHARACTER_CLASSES] +
+                 [f"distanceToLeft{name}" for name in CHARACTER_CLASSES])
+LEFT_FEATURES_OFFSET = 0
+RIGHT_FEATURES_OFFSET = len(CHARACTER_CLASSES)
+NUMERICAL_FEATURES_OFFSET = 2 * len(CHARACTER_CLASSES)
+
+# Numerical (distance) features are limited to this maximum value
+MAX_DISTANCE = 100
+
+# Version of the features (classes, columns and their computation). Cached feature matrices are keyed by it, so it
+# must be increased whenever the features change.
+FEATURE_SCHEMA_VERSION = 1
+
+# Fixed min-max scaling of the numerical features, as (scale, offset) such that the scaled features are
+# features * scale + offset. Distances are between 1 and MAX_DISTANCE, so they are mapped to [0, 1].
+DEFAULT_NUMERICAL_SCALING = (np.full(len(CHARACTER_CLASSES), 1 / (MAX_DISTANCE - 1), dtype=np.float32),
+                             np.full(len(CHARACTER_CLASSES), -1 / (MAX_DISTANCE - 1), dtype=np.float32))
+
+# Lookup table holding the class codes of the characters in the Basic Multilingual Plane (built on first use)
+_bmpClassTable = None
+
+
+def classifyCharacter(char):
+    """
+    Get the class code of a single character by checking the patterns one by one.
+    """
+    for classCode, pattern in enumerate(Patterns):
+        if pattern.value.match(char) is not None:
+            return classCode
+
+    return OTHER_CLASS
+
+
+def getClassTable():
+    """
+    Get the lookup table that maps code points of the Basic Multilingual Plane to class codes.
+
+    Returns:
+        classTable (np.ndarray): uint8 array of size 0x10000.
+    """
+    global _bmpClassTable
+
+    if _bmpClassTable is None:
+        classTable = np.full(0x10000, OTHER_CLASS, dtype=np.uint8)
+        allCharacters = "".join(map(chr, range(0x10000)))
+
+        # Assign the classes in reverse order, so that a character matching multiple patterns gets the class
+        # of the first pattern (as the patterns are checked in order)
+        for classCode, pattern in reversed(list(enumerate(Patterns))):
+            for match in pattern.value.finditer(allCharacters):
+                classTable[match.start()] = classCode
+
+        _bmpClassTable = classTable
+
+    return _bmpClassTable
+
+
+def getCharacterClasses(text):
+    """
+    Map each character of the text to its class code through the lookup table.
+
+    Args:
+        text (string): Text whose characters will be classified.
+
+    Returns:
+        classes (np.ndarray): uint8 array of the class codes (one for each character of the text).
+    """
+    codePoints = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    classes = getClassTable()[np.minimum(codePoints, 0xFFFF)]
+
+    # Characters out of the Basic Multilingual Plane are rare, classify each distinct one separately
+    astralMask = codePoints > 0xFFFF
+    if astralMask.any():
+        for codePoint in np.unique(codePoints[astralMask]):
+            classes[codePoints == codePoint] = classifyCharacter(chr(codePoint))
+
+    return classes
+
+
+def getNumericalScaling(scaler):
+    """
+    Get the scaling of the numerical features from a fitted MinMaxScaler, as (scale, offset) arrays such that
+    the scaled features are features * scale + offset.
+
+    Args:
+        scaler (MinMaxScaler): The scaler fitted to the numerical features of the training text.
+
+    Returns:
+        numericalScaling (tuple): Scale and offset arrays (float32) of the numerical features.
+    """
+    return np.asarray(scaler.scale_, dtype=np.float32), np.asarray(scaler.min_, dtype=np.float32)
+
+
+def createFeatureMatrix(text, numericalScaling=DEFAULT_NUMERICAL_SCALING, rowStarts=None):
+    """
+    Create the feature matrix of a text, having one row for each of the N+1 cursor positions of a text of size N,
+    and the columns in FEATURE_NAMES. Instead of analyzing the cursor positions one by one, the features are
+    computed with vectorized operations over the character classes, and written directly into a preallocated
+    float32 matrix.
+
+    Args:
+        text (string): Text whose feature matrix will be created.
+        numericalScaling (tuple): Scale and offset arrays (as returned by getNumericalScaling) to scale the
+            numerical features with. The same scaling is applied to any text, so that the features of a position
+            don't depend on the rest of the input. If None, the numerical features are left unscaled.
+        rowStarts (np.ndarray): For texts made of multiple documents, the position of the first character of the
+            document each cursor position belongs to (distances don't reach beyond the start of the document).
+            If None, the whole text is a single document.
+
+    Returns:
+        X (np.ndarray): Feature matrix of shape (N+1, 24).
+    """
+    classes = getCharacterClasses(text)
+    n = len(classes)
+    X = np.zeros((n + 1, len(FEATURE_NAMES)), dtype=np.float32)
+
+    # Binary features of the char to the left of each cursor position (start of the text counts as whitespace)
+    X[0, LEFT_FEATURES_OFFSET + WHITESPACE_CLASS] = 1
+    X[np.arange(1, n + 1), LEFT_FEATURES_OFFSET + classes] = 1
+
+    # Binary features of the char to the right of each cursor position (end of the text counts as whitespace)
+    X[np.arange(n), RIGHT_FEATURES_OFFSET + classes] = 1
+    X[n, RIGHT_FEATURES_OFFSET + WHITESPACE_CLASS] = 1
+
+    # Numerical features: distance from each cursor position to the last char of each class on its left
+    positions = np.arange(n, dtype=np.int64)
+    for classCode in range(len(CHARACTER_CLASSES)):
+        # Position of the last char of this class, up to and including each position (-1 if there isn't any)
+        lastPositions = np.where(classes == classCode, positions, -1)
+        np.maximum.accumulate(lastPositions, out=lastPositions)
+
+        # Cursor position i sees the chars up to position i-1 (of its own document)
+        isPresent = lastPositions >= 0 if rowStarts is None else lastPositions >= rowStarts[1:]
+        distances = X[:, NUMERICAL_FEATURES_OFFSET + classCode]
+        distances[0] = MAX_DISTANCE
+        distances[1:] = np.where(isPresent, np.minimum(positions + 1 - lastPositions, MAX_DISTANCE), MAX_DISTANCE)
+
+    # Scale the numerical features (in place)
+    if numericalScaling is not None:
+        scale, offset = numericalScaling
+        numericalFeatures = X[:, NUMERICAL_FEATURES_OFFSET:]
+        numericalFeatures *= scale
+        numericalFeatures += offset
+
+    return X
+
+
+def createBatchFeatureMatrix(texts, numericalScaling=DEFAULT_NUMERICAL_SCALING):
+    """
+    Create the feature matrices of multiple texts (documents) at once, concatenated into a single matrix. The
+    texts are joined with a whitespace separator, so that the cursor position at the end of a document (whose
+    right char is the separator) and the one at the start of the next document (whose left char is the
+    separator) get the same features as in the feature matrix of each document. Distances are limited to the
+    start of each document.
+
+    Args:
+        texts (list): List of texts (strings).
+        numericalScaling (tuple): Scale and offset arrays to scale the numerical features with (see
+            createFeatureMatrix).
+
+    Returns:
+        X (np.ndarray): Concatenated feature matrix (a text of size N has N+1 rows).
+        offsets (np.ndarray): Row offsets of the documents (rows of document i are offsets[i]:offsets[i+1]).
+    """
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    np.cumsum(lengths + 1, out=offsets[1:])
+
+    if len(texts) == 0:
+        return np.zeros((0, len(FEATURE_NAMES)), dtype=np.float32), offsets
+
+    # Rows of a document start at the position of its first char in the joined text
+    rowStarts = np.repeat(offsets[:-1], lengths + 1)
+    X = createFeatureMatrix("\n".join(texts), numericalScaling, rowStarts)
+
+    return X, offsets
@@ -1,138 +1,76 @@
+import os
 import pickle
-from collections import deque
-from enum import Enum
-from .cursor import *
-import re
-import pandas as pd
 import numpy as np
-from sklearn.linear_model import LogisticRegression
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.preprocessing import StandardScaler, MinMaxScaler
-from sklearn import metrics
-from joblib import dump, load
-from .train_ml_tokenizer import Patterns, analyzeEachCursorPosition
+from .native_model import loadModel
+from .custom_token import TokenBatch
+from .feature_extraction import (createFeatureMatrix, createBatchFeatureMatrix, getNumericalScaling, getCharacterClasses,
+                                 DEFAULT_NUMERICAL_SCALING, MAX_DISTANCE, WHITESPACE_CLASS)
 from .rule_based_tokenizer import InputType
+from utils.resource_registry import get_resource
 
+# Path of the trained ml tokenizer
+MODEL_FILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ml_model.joblib")
+# Path of the exported coefficients of the trained ml tokenizer (used without sklearn if it exists)
+NATIVE_MODEL_FILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ml_model.npz")
+# Path of the scaler fitted to the numerical features of the training text (saved together with the model)
+SCALER_FILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ml_scaler.joblib")
 
-def createFeatureMatrix(text):
-    # List to store all cursor objects
-    cursors = []
-
-    # Variables for calculating numerical (distance) features of the cursor
-    lastWhitespacePosition = None
-    lastUpperAlphabeticalPosition = None
-    lastLowerAlphabeticalPosition = None
-    lastNumberPosition = None
-    lastPeriodPosition = None
-    lastApostrophePosition = None
-    lastOtherEOSPosition = None
-    lastOtherPosition = None
-
-    # For each cursor position in the text (if text is of size N, it has N+1 cursor positions)
-    for i in range(len(text) + 1):
-        # Create cursor object
-        cursor = Cursor(i)
-
-        # Check for numerical features (which are limited to a maximum distance of 100)
-        cursor.numericalFeatures["distanceToLeftWhitespace"] = min(i - lastWhitespacePosition,
-                                                                   100) if lastWhitespacePosition is not None else 100
-        cursor.numericalFeatures["distanceToLeftUpperAlphabetical"] = min(i - lastUpperAlphabeticalPosition,
-                                                                          100) if lastUpperAlphabeticalPosition is not None else 100
-        cursor.numericalFeatures["distanceToLeftLowerAlphabetical"] = min(i - lastLowerAlphabeticalPosition,
-                                                                          100) if lastLowerAlphabeticalPosition is not None else 100
-        cursor.numericalFeatures["distanceToLeftNumber"] = min(i - lastNumberPosition,
-                                                               100) if lastNumberPosition is not None else 100
-        cursor.numericalFeatures["distanceToLeftPeriod"] = min(i - lastPeriodPosition,
-                                                               100) if lastPeriodPosition is not None else 100
-        cursor.numericalFeatures["distanceToLeftApostrophe"] = min(i - lastApostrophePosition,
-                                                                   100) if lastApostrophePosition is not None else 100
-        cursor.numericalFeatures["distanceToLeftOtherEOS"] = min(i - lastOtherEOSPosition,
-                                                                 100) if lastOtherEOSPosition is not None else 100
-        cursor.numericalFeatures["distanceToLeftOther"] = min(i - lastOtherPosition,
-                                                              100) if lastOtherPosition is not None else 100
-
-        # Check for binary features of the char to the left of the current cursor position
-        if i < 1:
-            cursor.leftCharBinaryFeatures["isLeftWhitespace"] = 1
-        else:
-            if Patterns.WHITESPACE.value.match(text[i - 1]) is not None:
-                cursor.leftCharBinaryFeatures["isLeftWhitespace"] = 1
-            elif Patterns.UPPER_ALPHABETICAL.value.match(text[i - 1]) is not None:
-                cursor.leftCharBinaryFeatures["isLeftUpperAlphabetical"] = 1
-            elif Patterns.LOWER_ALPHABETICAL.value.match(text[i - 1]) is not None:
-                cursor.leftCharBinaryFeatures["isLeftLowerAlphabetical"] = 1
-            elif Patterns.NUMBER.value.match(text[i - 1]) is not None:
-                cursor.leftCharBinaryFeatures["isLeftNumber"] = 1
-            elif Patterns.PERIOD.value.match(text[i - 1]) is not None:
-                cursor.leftCharBinaryFeatures["isLeftPeriod"] = 1
-            elif Patterns.APOSTROPHE.value.match(text[i - 1]) is not None:
-                cursor.leftCharBinaryFeatures["isLeftApostrophe"] = 1
-            elif Patterns.OTHER_EOS.value.match(text[i - 1]) is not None:
-                cursor.leftCharBinaryFeatures["isLeftOtherEOS"] = 1
-            else:
-                cursor.leftCharBinaryFeatures["isLeftOther"] = 1
-
-        # Check for binary features of the char to the right of the current cursor position
-        if i > len(text) - 1:
-            cursor.rightCharBinaryFeatures["isRightWhitespace"] = 1
-        else:
-            if Patterns.WHITESPACE.value.match(text[i]) is not None:
-                cursor.rightCharBinaryFeatures["isRightWhitespace"] = 1
-                lastWhitespacePosition = i
-            elif Patterns.UPPER_ALPHABETICAL.value.match(text[i]) is not None:
-                cursor.rightCharBinaryFeatures["isRightUpperAlphabetical"] = 1
-                lastUpperAlphabeticalPosition = i
-            elif Patterns.LOWER_ALPHABETICAL.value.match(text[i]) is not None:
-                cursor.rightCharBinaryFeatures["isRightLowerAlphabetical"] = 1
-                lastLowerAlphabeticalPosition = i
-            elif Patterns.NUMBER.value.match(text[i]) is not None:
-                cursor.rightCharBinaryFeatures["isRightNumber"] = 1
-                lastNumberPosition = i
-            elif Patterns.PERIOD.value.match(text[i]) is not None:
-                cursor.rightCharBinaryFeatures["isRightPeriod"] = 1
-                lastPeriodPosition = i
-            elif Patterns.APOSTROPHE.value.match(text[i]) is not None:
-                cursor.rightCharBinaryFeatures["isRightApostrophe"] = 1
-                lastApostrophePosition = i
-            elif Patterns.OTHER_EOS.value.match(text[i]) is not None:
-                cursor.rightCharBinaryFeatures["isRightOtherEOS"] = 1
-                lastOtherEOSPosition = i
-            else:
-                cursor.rightCharBinaryFeatures["isRightOther"] = 1
-                lastOtherPosition = i
-
-        cursors.append(cursor)
-
-    # Create lists of dictionaries (feature lists) to create corresponding dataframes
-    indices = []
-    leftCharFeatures = []
-    rightCharFeatures = []
-    numericalFeatures = []
-
-    # For each cursor position, populate dictionary lists with corresponding features
-    for cursor in cursors:
-        indices.append(cursor.position)
-        leftCharFeatures.append(cursor.leftCharBinaryFeatures)
-        rightCharFeatures.append(cursor.rightCharBinaryFeatures)
-        numericalFeatures.append(cursor.numericalFeatures)
-
-    # Create the dataframes
-    dfLeft = pd.DataFrame(leftCharFeatures, index=indices)
-    dfRight = pd.DataFrame(rightCharFeatures, index=indices)
-    dfNum = pd.DataFrame(numericalFeatures, index=indices)
-
-    # Scale the dfNum dataframe (as it contains numerical features)
-    scaler = MinMaxScaler()
-    scaledValues = scaler.fit_transform(dfNum)
-    dfNumScaled = pd.DataFrame(scaledValues, columns=dfNum.columns)
-
-    # Concatenate all feature dataframes
-    dfAllFeatures = pd.concat([dfLeft, dfRight, dfNumScaled], axis=1)
-
-    # Create numpy arrays for test feature matrice
-    X_test = np.array(dfAllFeatures)
-
-    return X_test
+# Default number of characters read (and tokenized) at once by the streaming tokenizer
+DEFAULT_WINDOW_SIZE = 1 << 20
+
+
+def loadJoblib(path):
+    """
+    Load a joblib file (joblib, and sklearn for the model, are only imported when needed).
+    """
+    from joblib import load
+    return load(path)
+
+
+def loadNumericalScaling(path):
+    """
+    Load the scaler saved by the training step and convert it to (scale, offset) arrays.
+    """
+    return getNumericalScaling(loadJoblib(path))
+
+
+def isNativeModelCurrent():
+    """
+    Check if the exported native model exists and isn't older than the sklearn model (a model retrained after the
+    export would otherwise be ignored in favor of the stale exported coefficients).
+    """
+    if not os.path.exists(NATIVE_MODEL_FILE_PATH):
+        return False
+    if not os.path.exists(MODEL_FILE_PATH):
+        return True
+    return os.stat(NATIVE_MODEL_FILE_PATH).st_mtime_ns >= os.stat(MODEL_FILE_PATH).st_mtime_ns
+
+
+def getModel():
+    """
+    Get the trained ml tokenizer (loaded once per process). If the model has been exported with
+    export_ml_model.py (after it was last trained), its native (NumPy only) form is used, otherwise the sklearn
+    model is loaded.
+    """
+    if isNativeModelCurrent():
+        return get_resource(NATIVE_MODEL_FILE_PATH, loadModel)[0]
+
+    return get_resource(MODEL_FILE_PATH, loadJoblib)
+
+
+def getModelNumericalScaling():
+    """
+    Get the scaling of the numerical features the trained ml tokenizer expects. It is the scaling fitted by the
+    training step if it was saved (or exported with the native model), and the fixed scaling of the distances
+    (from [1, 100] to [0, 1]) otherwise.
+    """
+    if isNativeModelCurrent():
+        return get_resource(NATIVE_MODEL_FILE_PATH, loadModel)[1]
+
+    if os.path.exists(SCALER_FILE_PATH):
+        return get_resource(SCALER_FILE_PATH, loadNumericalScaling)
+
+    return DEFAULT_NUMERICAL_SCALING
 
 
 def createTokenList(text, y):
@@ -142,67 +80,117 @@ def createTokenList(text, y):
     # Variable to keep the index of last token boundary (first character is always a token boundary)
     lastPositiveIndex = 0
 
-    for i in range(1, len(y)):
+    # Positions (other than the first and the last cursor positions) that are predicted as token boundaries
+    positiveIndices = np.flatnonzero(np.asarray(y[1:min(len(y), len(text))]) == 1) + 1
 
-        if i < len(text):
-            if y[i] == 1:
-                tokens.append(text[lastPositiveIndex:i].strip())
-                lastPositiveIndex = i
-            else:
-                continue
-        else:
-            tokens.append(text[lastPositiveIndex:].strip())
-            break
+    for i in positiveIndices:
+        tokens.append(text[lastPositiveIndex:i].strip())
+        lastPositiveIndex = i
+
+    # End of the text ends the last token
+    if 0 < len(text) < len(y):
+        tokens.append(text[lastPositiveIndex:].strip())
 
     return tokens
 
 
+def createTokenBatch(text, y):
+    """
+    Create the same tokens as createTokenList, but as a TokenBatch holding the (whitespace stripped) spans of the
+    tokens in the text, instead of a copied string for each token.
+
+    Args:
+        text (string): The tokenized text.
+        y (np.ndarray): Predictions (token boundaries) for the cursor positions of the text.
+
+    Returns:
+        tokens (TokenBatch): Tokens of the text (without token types).
+    """
+    n = len(text)
+
+    # Spans between the consecutive token boundaries (end of the text ends the last token)
+    positiveIndices = np.flatnonzero(np.asarray(y[1:min(len(y), n)]) == 1) + 1
+    starts = np.concatenate(([0], positiveIndices)).astype(np.int64)
+    ends = np.concatenate((positiveIndices, [n])).astype(np.int64)
+    if not 0 < n < len(y):
+        starts, ends = starts[:-1], ends[:-1]
+
+    # Strip the whitespaces at both ends of the spans: move the starts to the next non whitespace char, and the ends
+    # to the position after the previous non whitespace char
+    isWhitespace = getCharacterClasses(text) == WHITESPACE_CLASS
+    positions = np.arange(n, dtype=np.int64)
+    nextNonWhitespace = np.append(np.minimum.accumulate(np.where(isWhitespace, n, positions)[::-1])[::-1], n)
+    previousNonWhitespaceEnd = np.insert(np.maximum.accumulate(np.where(isWhitespace, 0, positions + 1)), 0, 0)
+    strippedStarts = nextNonWhitespace[starts]
+    strippedEnds = previousNonWhitespaceEnd[ends]
+
+    # Spans of only whitespaces become empty tokens
+    isEmpty = strippedStarts >= strippedEnds
+    strippedStarts[isEmpty] = starts[isEmpty]
+    strippedEnds[isEmpty] = starts[isEmpty]
+
+    return TokenBatch(text, strippedStarts, strippedEnds)
+
+
+def alignTokens(text, tokens):
+    """
+    Find the start offsets of the gold tokens in the text. Tokens are matched in order: each token is searched
+    (with str.find) from the position after the start of the previous token, which gives the same positions as
+    checking text[i:i + len(token)] == token at each cursor position. If a token isn't found, the rest of the tokens
+    are not aligned either.
+
+    Args:
+        text (string): The text.
+        tokens (list): Gold tokens of the text, in order.
+
+    Returns:
+        starts (list): Start offsets of the aligned tokens.
+        complete (bool): True if all tokens were aligned before the end of the text (the cursor position at the
+            end of the text is then a token boundary too).
+    """
+    n = len(text)
+    find = text.find
+    starts = []
+    position = 0
+    for token in tokens:
+        # find returns -1 after the last cursor position (n) too, even for an empty token
+        start = find(token, position)
+        if start < 0:
+            return starts, False
+        starts.append(start)
+        position = start + 1
+
+    return starts, position <= n
+
+
 def createLabelMatrix(text, tokens):
-    # Build a linked list from the token list
-    tokenLinkedList = deque(tokens)
-
-    # Helper function to get the next token from the linked list
-    def getNextToken():
-        return tokenLinkedList.popleft() if len(tokenLinkedList) > 0 else None
-
-    # Next token in the text
-    nextToken = getNextToken()
-    # List to store all cursor objects
-    cursors = []
-
-    # For each cursor position in the text (if text is of size N, it has N+1 cursor positions)
-    for i in range(len(text) + 1):
-        # Create cursor object
-        cursor = Cursor(i)
-
-        # Check for the label (if current cursor position is the start of a new token or not)
-        if nextToken is not None:
-            if text[i: i + len(nextToken)] == nextToken:
-                cursor.label = 1
-                nextToken = getNextToken()
-        else:
-            if i == len(text):
-                cursor.label = 1
-
-        cursors.append(cursor)
-
-    # Create lists for indices and labels
-    indices = []
-    labels = []
-
-    # Populate the lists with info from each cursor position
-    for cursor in cursors:
-        indices.append(cursor.position)
-        labels.append(cursor.label)
-
-    # Create the label dataframe and label matrix
-    dfLabels = pd.DataFrame(labels, index=indices)
-    y = np.array(dfLabels).ravel()
+    """
+    Create the labels of the N+1 cursor positions of a text of size N: 1 for the positions that start a gold token
+    (and for the end of the text, if all tokens were aligned before it), 0 otherwise.
+
+    Args:
+        text (string): The text.
+        tokens (list): Gold tokens of the text, in order.
+
+    Returns:
+        y (np.ndarray): uint8 labels.
+    """
+    starts, complete = alignTokens(text, tokens)
+
+    # Write the labels into a preallocated array
+    y = np.zeros(len(text) + 1, dtype=np.uint8)
+    y[np.array(starts, dtype=np.int64)] = 1
+    if complete:
+        y[len(text)] = 1
 
     return y
 
 
 def computeModelPerformance(text, y_test, ground_truth_path):
+    # Only needed for evaluation, so they aren't imported with the module
+    import pandas as pd
+    from sklearn import metrics
+
     # Load the ground truth token list corresponding to the test text file
     with open(ground_truth_path, "rb") as file:
         tokens_gt = pickle.load(file)
@@ -243,11 +231,10 @@ def main(input, input_type, ground_truth_path=None):
         text = input
 
     # Create the feature matrix for the text to be tokenized
-    X_test = createFeatureMatrix(text)
+    X_test = createFeatureMatrix(text, getModelNumericalScaling())
 
-    # Load the trained ml tokenizer
-    model_file_path = "/Users/lkk/Documents/BOUN CMPE/CMPE 561-Natural Language Processing/Application Project 1/tokenizer/ml_model.joblib"
-    model = load(model_file_path)
+    # Get the trained ml tokenizer (loaded once per process)
+    model = getModel()
 
     # Make predictions
     y_test = model.predict(X_test)
@@ -280,11 +267,10 @@ def main2(input, input_type):
         text = input
 
     # Create the feature matrix for the text to be tokenized
-    X_test = createFeatureMatrix(text)
+    X_test = createFeatureMatrix(text, getModelNumericalScaling())
 
-    # Load the trained ml tokenizer
-    model_file_path = "/Users/lkk/Documents/BOUN CMPE/CMPE 561-Natural Language Processing/Application Project 1/tokenizer/ml_model.joblib"
-    model = load(model_file_path)
+    # Get the trained ml tokenizer (loaded once per process)
+    model = getModel()
 
     # Make predictions
     y_test = model.predict(X_test)
@@ -292,4 +278,109 @@ def main2(input, input_type):
     # Create the token list from the predictions
     tokens = createTokenList(text, y_test)
 
-    return tokens
\ No newline at end of file
+    return tokens
+
+
+def readWindows(input, input_type, windowSize):
+    """
+    Read the input text in windows of (at most) windowSize characters.
+
+    Args:
+        input (string): A file path (file whose text we want to read), or a plain text
+        input_type (InputType): InputType.FILE_PATH or InputType.STRING (based on the type of the provided input)
+        windowSize (int): Number of characters in each window.
+
+    Returns:
+        windows (generator): Generator yielding the windows of the text.
+    """
+    if input_type == InputType.FILE_PATH:
+        with open(input, "r", encoding="utf-8") as file:
+            while True:
+                window = file.read(windowSize)
+                if not window:
+                    break
+                yield window
+    else:
+        for start in range(0, len(input), windowSize):
+            yield input[start:start + windowSize]
+
+
+def tokenizeStream(input, input_type, windowSize=DEFAULT_WINDOW_SIZE, model=None):
+    """
+    Tokenize the input window by window, yielding the tokens as they are completed. Feature matrix of each
+    window is built with the last MAX_DISTANCE characters of the previous window as its left context, and the
+    numerical features are scaled with the saved (input independent) scaling, so the features (and the tokens)
+    are the same as the ones of the whole text, while the memory used stays bounded by the window size.
+
+    Args:
+        input (string): A file path (file whose text we want to tokenize), or a plain text (string to be tokenized)
+        input_type (InputType): InputType.FILE_PATH or InputType.STRING (based on the type of the provided input)
+        windowSize (int): Number of characters read and tokenized at once.
+        model (LogisticRegression): The trained ml tokenizer (taken from the resource registry if not provided).
+
+    Returns:
+        tokens (generator): Generator yielding the same tokens as main2, in order.
+    """
+    if model is None:
+        model = getModel()
+
+    numericalScaling = getModelNumericalScaling()
+
+    # Number of characters before the current window
+    position = 0
+    # Last characters of the previous windows (left context of the current window)
+    contextText = ""
+    # Text from the last token boundary up to the current window
+    pendingText = ""
+
+    for window in readWindows(input, input_type, windowSize):
+        # Create the feature matrix of the window (with its left context), and only keep the rows of the
+        # cursor positions before the characters of the window. The cursor position after the last character
+        # of the text is never needed (end of the text always ends the last token).
+        X = createFeatureMatrix(contextText + window, numericalScaling)[len(contextText):-1]
+        y = model.predict(X)
+
+        # Split the pending text at the token boundaries in the window (first character of the text is
+        # always a token boundary)
+        text = pendingText + window
+        offset = len(pendingText) - position
+        lastPositiveIndex = 0
+        for i in np.flatnonzero(y) + position:
+            if i == 0:
+                continue
+            yield text[lastPositiveIndex:i + offset].strip()
+            lastPositiveIndex = i + offset
+
+        pendingText = text[lastPositiveIndex:]
+        contextText = (contextText + window)[-MAX_DISTANCE:]
+        position += len(window)
+
+    # The last token ends at the end of the text
+    if position > 0:
+        yield pendingText.strip()
+
+
+def tokenizeBatch(texts, model=None):
+    """
+    Tokenize multiple texts (documents) at once. Features of all documents are built into one concatenated
+    matrix, predictions are made with a single call to the model, and the predicted token boundaries are split
+    back into a token list for each document.
+
+    Args:
+        texts (list): List of texts (strings) to be tokenized.
+        model (LogisticRegression): The trained ml tokenizer (taken from the resource registry if not provided).
+
+    Returns:
+        tokenLists (list): List of token lists (one for each text, in the same order).
+    """
+    if model is None:
+        model = getModel()
+    numericalScaling = getModelNumericalScaling()
+
+    # Create the concatenated feature matrix of all documents
+    X, offsets = createBatchFeatureMatrix(texts, numericalScaling)
+
+    # Make predictions for all documents at once
+    y = model.predict(X) if len(X) > 0 else np.zeros(0, dtype=np.int64)
+
+    return [createTokenList(text, y[offsets[i]:offsets[i + 1]]) for i, text in enumerate(texts)]
@@ -0,0 +1,314 @@
+import pickle
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import deque
+import numpy as np
+from utils.turkish_text import turkish_upper
+from utils.lexicon_file import write_lexicon, read_lexicon, encode_strings, decode_strings, \
+    as_memoryview
+
+# Kind of the binary lexicon files holding MWE tries
+LEXICON_KIND = "mwe_trie"
+
+
+class MWETrie:
+    """
+    Compiled (flat array) form of the nested MWE dictionary built by build_mwe_lexicon.py.
+
+    Words of the MWEs are interned into integer IDs (index of the word in a string table: word i is
+    word_data[word_offsets[i]:word_offsets[i + 1]] in UTF-8), and the nodes of the trie are numbered in breadth
+    first order (root node is 0). The children of node n are kept in a CSR-like layout, sorted by word ID:
+    child_words[child_offsets[n]:child_offsets[n + 1]] holds the word IDs of the outgoing edges and
+    child_nodes[child_offsets[n]:child_offsets[n + 1]] holds the corresponding child nodes. The terminal bitmap
+    has the bit of node n set if a MWE ends at that node.
+
+    Words are looked up in word_table, an open addressing hash table of word IDs (-1 for empty slots) with
+    len(word_table) a power of two: the search for a word starts at slot crc32(UTF-8 bytes of the word) &
+    (len(word_table) - 1) and probes the next slots until the word or an empty slot is found. The hash table is
+    stored with the other arrays, so a trie mapped from a binary lexicon file is walked without building any
+    Python objects from its arrays, and its pages stay shared between the processes through the page cache.
+    """
+
+    def __init__(self, word_offsets, word_data, child_offsets, child_words, child_nodes, terminal, word_table):
+        self.word_offsets = word_offsets
+        self.word_data = word_data
+        self.child_offsets = child_offsets
+        self.child_words = child_words
+        self.child_nodes = child_nodes
+        self.terminal = terminal
+        self.word_table = word_table
+
+        # The lookups index the arrays through memoryviews (no copy)
+        self._word_offsets = as_memoryview(word_offsets, "q")
+        self._word_data = as_memoryview(word_data, "B")
+        self._child_offsets = as_memoryview(child_offsets, "I")
+        self._child_words = as_memoryview(child_words, "I")
+        self._child_nodes = as_memoryview(child_nodes, "I")
+        self._terminal = as_memoryview(terminal, "B")
+        self._word_table = as_memoryview(word_table, "i")
+        self._table_mask = len(word_table) - 1
+
+        # Longest word in the lexicon, in bytes (no longer prefix of a matched word needs to be checked)
+        self.max_word_length = int(np.diff(word_offsets).max()) if len(word_offsets) > 1 else 0
+        # First letters of the words that can start a MWE, in both cases (used to reject most positions early,
+        # without lowercasing the text)
+        first_letters = self.get_first_letters()
+        self.initials = frozenset(first_letters) | frozenset(turkish_upper(letter) for letter in first_letters)
+
+    def get_first_letters(self):
+        """
+        Get the distinct first letters of the words of the root edges. The UTF-8 bytes of the first letters are
+        collected with NumPy (up to 4 bytes, packed into an integer per word), so only the distinct letters are
+        decoded.
+
+        Returns:
+            first_letters (list): The first letters.
+        """
+        word_offsets = np.asarray(self._word_offsets)
+        word_data = np.asarray(self._word_data)
+        word_ids = np.asarray(self._child_words[self._child_offsets[0]:self._child_offsets[1]], dtype=np.int64)
+        starts = word_offsets[word_ids]
+        starts = starts[word_offsets[word_ids + 1] > starts]
+        if len(starts) == 0:
+            return []
+
+        # Length of the first letter, from its lead byte
+        lead_bytes = word_data[starts]
+        letter_lengths = 1 + (lead_bytes >= 0xC0) + (lead_bytes >= 0xE0) + (lead_bytes >= 0xF0)
+        keys = np.zeros(len(starts), dtype=np.uint32)
+        for i in range(4):
+            letter_bytes = word_data[np.minimum(starts + i, len(word_data) - 1)].astype(np.uint32)
+            keys |= np.where(i < letter_lengths, letter_bytes, 0) << np.uint32(8 * i)
+
+        first_letters = []
+        for key in np.unique(keys).tolist():
+            lead_byte = key & 0xFF
+            letter_length = 1 + (lead_byte >= 0xC0) + (lead_byte >= 0xE0) + (lead_byte >= 0xF0)
+            first_letters.append(key.to_bytes(4, "little")[:letter_length].decode("utf-8"))
+
+        return first_letters
+
+    @classmethod
+    def from_words(cls, words, child_offsets, child_words, child_nodes, terminal):
+        """
+        Create a MWETrie from a words list and the CSR arrays (whose children don't need to be sorted): the words
+        are encoded into a string table, the children of each node are sorted by word ID and the hash table of
+        the words is built.
+
+        Args:
+            words (list): Words of the edges (word ID is the index of the word).
+            child_offsets (array-like): Start offset of the children of each node (and the end offset).
+            child_words (array-like): Word ID of each edge.
+            child_nodes (array-like): Child node of each edge.
+            terminal (bytes-like): Terminal bitmap.
+
+        Returns:
+            mwe_trie (MWETrie): The compiled trie.
+        """
+        word_offsets, word_data = encode_strings(words)
+
+        child_offsets = np.asarray(child_offsets, dtype=np.uint32)
+        child_words = np.asarray(child_words, dtype=np.uint32)
+        child_nodes = np.asarray(child_nodes, dtype=np.uint32)
+        parents = np.repeat(np.arange(len(child_offsets) - 1), np.diff(child_offsets.astype(np.int64)))
+        order = np.lexsort((child_words, parents))
+
+        word_table = np.full(1 << max(2 * len(words) - 1, 1).bit_length(), -1, dtype=np.int32)
+        mask = len(word_table) - 1
+        word_data_bytes = word_data.tobytes()
+        word_offsets_list = word_offsets.tolist()
+        for word_id in range(len(words)):
+            encoded = word_data_bytes[word_offsets_list[word_id]:word_offsets_list[word_id + 1]]
+            slot = zlib.crc32(encoded) & mask
+            while word_table[slot] >= 0:
+                slot = (slot + 1) & mask
+            word_table[slot] = word_id
+
+        return cls(word_offsets, word_data, child_offsets, child_words[order], child_nodes[order],
+                   np.frombuffer(bytes(terminal), dtype=np.uint8), word_table)
+
+    @classmethod
+    def from_dict(cls, mwe_dict):
+        """
+        Compile a nested MWE dictionary into a MWETrie.
+
+        Args:
+            mwe_dict (dict): The nested hash table that stores MWEs.
+
+        Returns:
+            mwe_trie (MWETrie): The compiled trie.
+        """
+        words = []
+        word_ids = {}
+        child_offsets = array("I", [0])
+        child_words = array("I")
+        child_nodes = array("I")
+        terminal_nodes = []
+
+        # Number the levels of the nested dictionary in breadth first order
+        levels = deque([mwe_dict])
+        node_count = 1
+        node = 0
+        while levels:
+            level = levels.popleft()
+
+            if ("END" in level) and (level["END"] == True):
+                terminal_nodes.append(node)
+
+            for word, next_level in level.items():
+                if word == "END":
+                    continue
+
+                if word not in word_ids:
+                    word_ids[word] = len(words)
+                    words.append(word)
+
+                child_words.append(word_ids[word])
+                child_nodes.append(node_count)
+                levels.append(next_level)
+                node_count += 1
+
+            child_offsets.append(len(child_words))
+            node += 1
+
+        terminal = bytearray((node_count + 7) // 8)
+        for terminal_node in terminal_nodes:
+            terminal[terminal_node >> 3] |= 1 << (terminal_node & 7)
+
+        return cls.from_words(words, child_offsets, child_words, child_nodes, terminal)
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Create a MWETrie from the plain containers returned by to_arrays.
+
+        Args:
+            arrays (dict): Dictionary holding the words list, the CSR arrays and the terminal bitmap.
+
+        Returns:
+            mwe_trie (MWETrie): The compiled trie.
+        """
+        return cls.from_words(arrays["words"], arrays["child_offsets"], arrays["child_words"],
+                              arrays["child_nodes"], arrays["terminal"])
+
+    def to_arrays(self):
+        """
+        Get the flat arrays of the trie as plain (builtin) containers, so that they can be pickled without
+        depending on the import path of this module.
+
+        Returns:
+            arrays (dict): Dictionary holding the words list, the CSR arrays and the terminal bitmap.
+        """
+        return {"words": decode_strings(self.word_offsets, self.word_data),
+                "child_offsets": array("I", self._child_offsets.tolist()),
+                "child_words": array("I", self._child_words.tolist()),
+                "child_nodes": array("I", self._child_nodes.tolist()),
+                "terminal": bytes(self._terminal)}
+
+    def save(self, path):
+        """
+        Write the string table of the words, the flat arrays and the hash table of the trie to a binary lexicon
+        file (see utils.lexicon_file).
+
+        Args:
+            path (string): Path of the file.
+        """
+        write_lexicon(path, LEXICON_KIND, {"word_offsets": np.asarray(self.word_offsets, dtype=np.int64),
+                                           "word_data": np.asarray(self.word_data, dtype=np.uint8),
+                                           "child_offsets": np.asarray(self.child_offsets, dtype=np.uint32),
+                                           "child_words": np.asarray(self.child_words, dtype=np.uint32),
+                                           "child_nodes": np.asarray(self.child_nodes, dtype=np.uint32),
+                                           "terminal": np.frombuffer(bytes(self.terminal), dtype=np.uint8),
+                                           "word_table": np.asarray(self.word_table, dtype=np.int32)})
+
+    def get_word(self, word_id):
+        """
+        Get the word with the given ID.
+        """
+        return bytes(self._word_data[self._word_offsets[word_id]:self._word_offsets[word_id + 1]]).decode("utf-8")
+
+    def is_terminal(self, node):
+        """
+        Check if a MWE ends at the given node.
+        """
+        return (self._terminal[node >> 3] >> (node & 7)) & 1 == 1
+
+    def get_children(self, node, word):
+        """
+        Get the children of a node whose edge words are prefixes of the given (lowercase) word. As the words
+        of a MWE are kept in their lemma form, a word in the text matches an edge if it starts with the
+        word of the edge.
+
+        Args:
+            node (int): Node of the trie.
+            word (string): Lowercase word from the text.
+
+        Returns:
+            children (list): List of the matching child nodes.
+        """
+        children = []
+        start = self._child_offsets[node]
+        end = self._child_offsets[node + 1]
+        if start == end:
+            return children
+
+        word_offsets = self._word_offsets
+        word_data = self._word_data
+        word_table = self._word_table
+        child_words = self._child_words
+        mask = self._table_mask
+
+        # Each prefix of the word (in UTF-8, so the prefixes are cut at the first byte of a char) is looked up in
+        # the hash table, and its edge is searched among the (sorted) edges of the node
+        encoded = word.encode("utf-8", "surrogatepass")
+        for length in range(1, min(len(encoded), self.max_word_length) + 1):
+            if length < len(encoded) and 0x80 <= encoded[length] < 0xC0:
+                continue
+            prefix = encoded[:length]
+
+            slot = zlib.crc32(prefix) & mask
+            word_id = word_table[slot]
+            while word_id >= 0:
+                word_start = word_offsets[word_id]
+                if (word_offsets[word_id + 1] - word_start == length
+                        and word_data[word_start:word_start + length] == prefix):
+                    break
+                slot = (slot + 1) & mask
+                word_id = word_table[slot]
+
+            if word_id >= 0:
+                index = bisect_left(child_words, word_id, start, end)
+                if index < end and child_words[index] == word_id:
+                    children.append(self._child_nodes[index])
+
+        return children
+
+
+def load_mwe_trie(path, verify=False):
+    """
+    Load a compiled MWE trie from the binary lexicon file (.bin) exported by build_mwe_lexicon.py, or from the
+    pickle file (.pkl) of the arrays of the trie.
+
+    Args:
+        path (string): Path of the file.
+        verify (bool): Check the checksum of the binary lexicon file. It reads the whole file, so it is off at
+            runtime (every process loads the file) and done once when the file is written.
+
+    Returns:
+        mwe_trie (MWETrie): The compiled trie.
+    """
+    if path.endswith(".pkl"):
+        with open(path, "rb") as file:
+            return MWETrie.from_arrays(pickle.load(file))
+
+    sections = read_lexicon(path, LEXICON_KIND, verify)
+    if "word_table" not in sections:
+        # Files written before the hash table was added (their children aren't sorted by word ID either), the
+        # trie is rebuilt in memory
+        return MWETrie.from_words(decode_strings(sections["word_offsets"], sections["word_data"]),
+                                  sections["child_offsets"], sections["child_words"], sections["child_nodes"],
+                                  sections["terminal"])
+
+    return MWETrie(sections["word_offsets"], sections["word_data"], sections["child_offsets"],
+                   sections["child_words"], sections["child_nodes"], sections["terminal"], sections["word_table"])
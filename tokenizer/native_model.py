@@ -0,0 +1,52 @@
+import numpy as np
+from .feature_extraction import DEFAULT_NUMERICAL_SCALING, getNumericalScaling
+
+
+class LinearModel:
+    """
+    Inference only replacement of the trained LogisticRegression model. Predictions are made with the decision
+    function of the model (a dot product with the coefficients plus the intercept, thresholded at 0), so neither
+    sklearn nor pandas are needed at runtime.
+    """
+
+    def __init__(self, coef, intercept, classes):
+        # Coefficients are kept in float64 (as in sklearn), so that the decisions are the same as the model's
+        self.coef = np.asarray(coef, dtype=np.float64).ravel()
+        self.intercept = float(np.asarray(intercept).ravel()[0])
+        self.classes = np.asarray(classes)
+
+    def decision_function(self, X):
+        return X @ self.coef + self.intercept
+
+    def predict(self, X):
+        return self.classes[(self.decision_function(X) > 0).astype(np.intp)]
+
+
+def exportModel(model, path, scaler=None):
+    """
+    Export the coefficients and the intercept of a trained (binary) LogisticRegression model, together with the
+    scaling of the numerical features, to a .npz file.
+
+    Args:
+        model (LogisticRegression): The trained ml tokenizer.
+        path (string): Path of the .npz file.
+        scaler (MinMaxScaler): The scaler fitted by the training step (fixed scaling is exported if None).
+    """
+    scale, offset = DEFAULT_NUMERICAL_SCALING if scaler is None else getNumericalScaling(scaler)
+    np.savez(path, coef=model.coef_, intercept=model.intercept_, classes=model.classes_, scale=scale,
+             offset=offset)
+
+
+def loadModel(path):
+    """
+    Load a model exported with exportModel.
+
+    Returns:
+        model (LinearModel): The model.
+        numericalScaling (tuple): Scale and offset arrays of the numerical features.
+    """
+    with np.load(path) as arrays:
+        model = LinearModel(arrays["coef"], arrays["intercept"], arrays["classes"])
+        numericalScaling = (arrays["scale"].astype(np.float32), arrays["offset"].astype(np.float32))
+
+    return model, numericalScaling
@@ -1,7 +1,15 @@
-import pickle
+import os
 import re
+from array import array
 from enum import Enum
 from .custom_token import *
+from .mwe_trie import MWETrie, load_mwe_trie
+from utils.resource_registry import get_resource
+from utils.turkish_text import LETTERS, LOWERCASE_LETTERS, turkish_lower
+
+# Path of the compiled MWE trie (exported by build_mwe_lexicon.py)
+MWE_TRIE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mwe_trie.bin")
+
 
 class InputType(Enum):
     FILE_PATH = 0
@@ -12,213 +20,219 @@ class Patterns(Enum):
     WHITESPACE = re.compile(r'\s+')
     EMAIL = re.compile(r'[a-zA-Z0-9]+([\._-]?[a-zA-Z0-9]+)*@([a-zA-Z]+\.)+[a-zA-Z]{2,}\b')
     URL = re.compile(r'(https?://)?(www\.)?([a-zA-Z0-9]+\.)+[a-zA-Z]{2,}(/[a-zA-Z0-9=&%+-_\?\.]*)*\b')
-    DATE = re.compile(r'(0?[1-9]|[12][0-9]|3[01])([\.-/])(0?[1-9]|1[0-2])\2(\d{4})(\'[ûâçğıöşüa-z]+)?\b')
-    TIME = re.compile(r'([01]?[0-9]|2[0-3]):[0-5][0-9](:[0-5][0-9])?(\'[ûâçğıöşüa-z]+)?\b')
-    NUMBER = re.compile(r'\d{1,3}(([.,]\d{3})*|\d+)*([.,]\d+)?(\'[ûâçğıöşüa-z]+)?\b')
-    HASHTAG = re.compile(r'#[ûâçğıöşüÇĞİÖŞÜa-zA-Z0-9_]+\b')
+    DATE = re.compile(rf'(0?[1-9]|[12][0-9]|3[01])(?P<date_separator>[\.-/])(0?[1-9]|1[0-2])(?P=date_separator)(\d{{4}})(\'[{LOWERCASE_LETTERS}]+)?\b')
+    TIME = re.compile(rf'([01]?[0-9]|2[0-3]):[0-5][0-9](:[0-5][0-9])?(\'[{LOWERCASE_LETTERS}]+)?\b')
+    NUMBER = re.compile(rf'\d{{1,3}}(([.,]\d{{3}})*|\d+)*([.,]\d+)?(\'[{LOWERCASE_LETTERS}]+)?\b')
+    HASHTAG = re.compile(rf'#[{LETTERS}0-9_]+\b')
     # WORD = re.compile(r'[ûâçğıöşüÇĞİÖŞÜa-zA-Z]+((\'[ûâçğıöşüa-z]+)?|(-[ûâçğıöşüÇĞİÖŞÜa-zA-Z]+)*)\b')
-    WORD = re.compile(r'[ûâçğıöşüÇĞİÖŞÜa-zA-Z]+(-[ûâçğıöşüÇĞİÖŞÜa-zA-Z]+)*(\'[ûâçğıöşüa-z]+)?\b')
+    WORD = re.compile(rf'[{LETTERS}]+(-[{LETTERS}]+)*(\'[{LOWERCASE_LETTERS}]+)?\b')
     END_OF_SENTENCE_PUNCTUATION = re.compile(r'\.\.\.|[\.\!\?…]')
-    ONLY_LETTER_SEQUENCE = re.compile(r'[ûâçğıöşüÇĞİÖŞÜa-zA-Z]{2,}\b')
+    ONLY_LETTER_SEQUENCE = re.compile(rf'[{LETTERS}]{{2,}}\b')
+
+
+# Token types that are searched at the current cursor position (after checking for a MWE), in the
+# order of priority in which they are tried
+SCANNED_TOKEN_TYPES = [TokenType.EMAIL,
+                       TokenType.URL,
+                       TokenType.DATE,
+                       TokenType.TIME,
+                       TokenType.NUMBER,
+                       TokenType.HASHTAG,
+                       TokenType.WORD,
+                       TokenType.END_OF_SENTENCE_PUNCTUATION]
 
 
-def check_MWE(text, mwe_dict):
+def build_scanner_pattern(token_types):
     """
-    Check if the start of a text matches a MWE.
+    Combine the patterns of the given token types into a single compiled alternation. Each alternative
+    is kept in a named group (named after its token type), so that the type of a match can be retrieved
+    from the lastgroup attribute of the match object. As the alternatives are tried from left to right,
+    the first pattern that matches wins, which is the same as trying the patterns one after another.
 
     Args:
-        text (string): Text to be searched for MWE.
-        mwe_dict (dict): The nested hash table that stores MWEs.
+        token_types (list): List of TokenType values (each one having a pattern with the same name in Patterns).
 
     Returns:
-        is_MWE (bool): True if the text matches a MWE, False otherwise.
-        text_MWE (string): Part of text that matches the MWE.
+        scanner_pattern (re.Pattern): The compiled alternation of the patterns.
     """
-    traversed = ""
-    current_levels = [mwe_dict]
+    alternatives = []
+    for token_type in token_types:
+        pattern = Patterns[token_type.name].value.pattern
+        alternatives.append(f"(?P<{token_type.name}>{pattern})")
 
-    while True:
-        # Detect whitespaces from the head of the text, and traverse that part of the text
-        whitespace_match = Patterns.WHITESPACE.value.match(text[len(traversed):])
-        if whitespace_match is not None:
-            traversed += whitespace_match.group()
+    return re.compile("|".join(alternatives))
 
-        # MWEs can only consist of multiple words (alphabetical characters only)
-        # Match an alphabetical sequence (of length 2 or more for a valid Turkish word) from text
-        match = Patterns.ONLY_LETTER_SEQUENCE.value.match(text[len(traversed):])
 
-        # If no such match is found
-        if match is None:
+SCANNER_PATTERN = build_scanner_pattern(SCANNED_TOKEN_TYPES)
 
-            # If match is absent before any text has been traversed, then there is no MWE
-            if len(traversed) == 0:
-                return (False, None)
 
-            # If match is absent after some text has been traversed
-            else:
+def check_MWE(text, mwe_trie, position=0):
+    """
+    Check if the text at a given position matches a MWE.
+
+    Args:
+        text (string): Text to be searched for MWE.
+        mwe_trie (MWETrie): The compiled trie that stores MWEs (compile a nested MWE dictionary once with
+            MWETrie.from_dict, or let scan_token_spans compile it).
+        position (int): Position in the text to start searching from (text is not sliced, patterns are
+            matched in place).
+
+    Returns:
+        is_MWE (bool): True if the text matches a MWE, False otherwise.
+        text_MWE (string): Part of text that matches the MWE.
+
+    Raises:
+        TypeError: If mwe_trie isn't a MWETrie (compiling a dictionary here would repeat it at every position).
+    """
+    if not isinstance(mwe_trie, MWETrie):
+        raise TypeError(f"check_MWE expects a compiled MWETrie, not {type(mwe_trie).__name__} (compile the MWE "
+                        f"dictionary once with MWETrie.from_dict)")
 
-                # Check current levels to see if any of them yields to a valid MWE
-                for level in current_levels:
-                    # If we've reached the end of a valid MWE
-                    if ("END" in level) and (level["END"] == True):
-                        # Then, there is a MWE, traversed text is the MWE text
-                        return (True, traversed)
+    traversed_end = position
+    # Start from the root node of the trie
+    current_nodes = [0]
 
-                # If no level yielded to the end of a valid MWE, there is no MWE
-                return (False, None)
+    # Detect whitespaces from the head of the text, and traverse that part of the text
+    whitespace_match = Patterns.WHITESPACE.value.match(text, traversed_end)
+    if whitespace_match is not None:
+        traversed_end = whitespace_match.end()
 
-        # If a match for a letter only word is found
-        else:
-            # Create a new empty list to hold the potential new levels
-            new_levels = []
-            # Get text of the match object and convert to lowercase
-            match_lower = match.group().lower()
-
-            # Check the keys of every relevant level of the MWE dictionary
-            for level in current_levels:
-                for key in level.keys():
-                    # If the matched text starts with a key from the current level, it contains
-                    # a word that is an element of a MWE (Also check if it starts with the key except
-                    # key's last letter. As keys, words of a MWE, are kept in their lemma form, the last
-                    # letter may get inflected as a result of attached suffix in the text)
-                    # if match_lower.startswith(key) or match_lower.startswith(key[:-1]):
-                    # Changed it to exact match as it created too many incorrect MWE tokens
-                    if match_lower.startswith(key):
-                        # Append the value of this key to the new_levels
-                        new_levels.append(level[key])
-
-            # If the match text didn't produce any new levels
-            if len(new_levels) == 0:
-                # Check current levels to see if any of them yields to a valid MWE
-                for level in current_levels:
-                    # If we've reached the end of a valid MWE
-                    if ("END" in level) and (level["END"] == True):
-                        # Then, there is a MWE, traversed text is the MWE text
-                        return (True, traversed)
-
-                # If no level yielded to the end of a valid MWE, there is no MWE
+    # Exit early if the first character can't start any MWE (which is the case for most positions). The initials
+    # of the trie hold both cases of the first letters, so the character isn't lowercased here.
+    if (traversed_end >= len(text)) or (text[traversed_end] not in mwe_trie.initials):
+        return (False, None)
+
+    while True:
+        # MWEs can only consist of multiple words (alphabetical characters only)
+        # Match an alphabetical sequence (of length 2 or more for a valid Turkish word) from text
+        match = Patterns.ONLY_LETTER_SEQUENCE.value.match(text, traversed_end)
+
+        # If a match for a letter only word is found, get the child nodes whose words are prefixes of the
+        # match text (converted to lowercase, with the Turkish casing rules)
+        if match is not None:
+            new_nodes = []
+            match_lower = turkish_lower(match.group())
+            for node in current_nodes:
+                new_nodes.extend(mwe_trie.get_children(node, match_lower))
+
+        # If no such match is found, or the match text didn't produce any new nodes
+        if (match is None) or (len(new_nodes) == 0):
+            # If nothing has been traversed (only possible at the root), then there is no MWE
+            if current_nodes == [0]:
                 return (False, None)
 
-            # If match text produced new levels
-            else:
-                # Traverse the match text
-                traversed += match.group()
+            # Check current nodes to see if any of them yields to a valid MWE
+            for node in current_nodes:
+                # If we've reached the end of a valid MWE
+                if mwe_trie.is_terminal(node):
+                    # Then, there is a MWE, traversed text is the MWE text
+                    return (True, text[position:traversed_end])
 
-                # Update current levels
-                current_levels = new_levels
+            # If no node yielded to the end of a valid MWE, there is no MWE
+            return (False, None)
 
-                # And continue checking the rest of the text
-                continue
+        # If match text produced new nodes, traverse the match text and update current nodes
+        traversed_end = match.end()
+        current_nodes = new_nodes
 
+        # Detect whitespaces after the traversed word, and traverse that part of the text too
+        whitespace_match = Patterns.WHITESPACE.value.match(text, traversed_end)
+        if whitespace_match is not None:
+            traversed_end = whitespace_match.end()
 
-def tokenize_text(text, mwe_dict):
+
+def scan_token_spans(text, mwe_dict):
     """
-    Separate a given text into tokens by continuously checking if a specific
-    token type occurs (matches) at the current cursor position.
+    Scan a given text for tokens by continuously checking if a specific token type occurs (matches)
+    at the current cursor position, and yield the position (span) and type of each token.
+
+    The text is never sliced, all patterns are matched in place (at the cursor position), and the
+    token types other than MWE are matched with a single scan of the combined SCANNER_PATTERN.
+    So, the cost of tokenization grows linearly with the size of the text.
 
     Args:
         text (string): Text to be tokenized.
-        mwe_dict (dict): The nested hash table that stores MWEs.
+        mwe_dict (dict): The nested hash table that stores MWEs (or the already compiled MWETrie).
 
     Returns:
-        tokens (list): A list of tokens (kept as custom_token objects)
+        spans (generator): Generator yielding (start, end, token_type) of each token.
     """
-    tokens = []
-    next_token_id = 0
+    # Compile the MWE dictionary once for the whole text
+    mwe_trie = mwe_dict if isinstance(mwe_dict, MWETrie) else MWETrie.from_dict(mwe_dict)
+
     cursor = 0
     text_length = len(text)
 
+    whitespace_pattern = Patterns.WHITESPACE.value
+
     while cursor < text_length:
         # Remove leading whitespaces
-        whitespace_match = Patterns.WHITESPACE.value.match(text[cursor:])
+        whitespace_match = whitespace_pattern.match(text, cursor)
         if whitespace_match is not None:
-            cursor += len(whitespace_match.group())
+            cursor = whitespace_match.end()
 
         if cursor >= text_length:
             break
 
         # Check for MWE match
-        is_MWE, text_MWE = check_MWE(text[cursor:], mwe_dict)
+        is_MWE, text_MWE = check_MWE(text, mwe_trie, cursor)
         if is_MWE:
+            # MWE text may end with whitespaces, they are not part of the token
+            yield cursor, cursor + len(text_MWE.rstrip()), TokenType.MWE
             cursor += len(text_MWE)
-            tokens.append(Token(next_token_id, text_MWE.strip(), TokenType.MWE))
-            next_token_id += 1
             continue
 
-        # Check for email match
-        email_match = Patterns.EMAIL.value.match(text[cursor:])
-        if email_match:
-            cursor += len(email_match.group())
-            tokens.append(Token(next_token_id, email_match.group(), TokenType.EMAIL))
-            next_token_id += 1
+        # Check for email, URL, date, time, number, hashtag, word and end of sentence punctuation
+        # matches (in this order) all at once
+        scanner_match = SCANNER_PATTERN.match(text, cursor)
+        if scanner_match:
+            yield cursor, scanner_match.end(), TokenType[scanner_match.lastgroup]
+            cursor = scanner_match.end()
             continue
 
-        # Check for URL match
-        url_match = Patterns.URL.value.match(text[cursor:])
-        if url_match:
-            cursor += len(url_match.group())
-            tokens.append(Token(next_token_id, url_match.group(), TokenType.URL))
-            next_token_id += 1
-            continue
+        # If none of the previous patterns matched, just take one character and
+        # save it as a token of type "OTHER" (probably any other type of punctuation/special character)
+        yield cursor, cursor + 1, TokenType.OTHER
+        cursor += 1
 
-        # Check for date match
-        date_match = Patterns.DATE.value.match(text[cursor:])
-        if date_match:
-            cursor += len(date_match.group())
-            tokens.append(Token(next_token_id, date_match.group(), TokenType.DATE))
-            next_token_id += 1
-            continue
 
-        # Check for time match
-        time_match = Patterns.TIME.value.match(text[cursor:])
-        if time_match:
-            cursor += len(time_match.group())
-            tokens.append(Token(next_token_id, time_match.group(), TokenType.TIME))
-            next_token_id += 1
-            continue
+def tokenize_text(text, mwe_dict):
+    """
+    Separate a given text into tokens (see scan_token_spans). Tokens keep their offsets in the
+    text, and their texts are sliced from it when requested.
 
-        # Check for number match
-        number_match = Patterns.NUMBER.value.match(text[cursor:])
-        if number_match:
-            cursor += len(number_match.group())
-            tokens.append(Token(next_token_id, number_match.group(), TokenType.NUMBER))
-            next_token_id += 1
-            continue
+    Args:
+        text (string): Text to be tokenized.
+        mwe_dict (dict): The nested hash table that stores MWEs (or the already compiled MWETrie).
 
-        # Check for hashtag match
-        hashtag_match = Patterns.HASHTAG.value.match(text[cursor:])
-        if hashtag_match:
-            cursor += len(hashtag_match.group())
-            tokens.append(Token(next_token_id, hashtag_match.group(), TokenType.HASHTAG))
-            next_token_id += 1
-            continue
+    Returns:
+        tokens (list): A list of tokens (kept as custom_token objects)
+    """
+    return [Token.from_span(token_id, text, start, end, token_type)
+            for token_id, (start, end, token_type) in enumerate(scan_token_spans(text, mwe_dict))]
 
-        # Check for word match
-        word_match = Patterns.WORD.value.match(text[cursor:])
-        if word_match:
-            cursor += len(word_match.group())
-            tokens.append(Token(next_token_id, word_match.group(), TokenType.WORD))
-            next_token_id += 1
-            continue
 
-        # Check for end of sentence puncuation match
-        eos_punc_match = Patterns.END_OF_SENTENCE_PUNCTUATION.value.match(text[cursor:])
-        if eos_punc_match:
-            cursor += len(eos_punc_match.group())
-            tokens.append(Token(next_token_id, eos_punc_match.group(), TokenType.END_OF_SENTENCE_PUNCTUATION))
-            next_token_id += 1
-            continue
+def tokenize_text_to_batch(text, mwe_dict):
+    """
+    Separate a given text into tokens (see scan_token_spans), and keep them in a TokenBatch (arrays
+    of offsets and types) instead of creating a Token object for each of them.
 
-        # If none of the previous patterns matched, just take one character and
-        # save it as a token of type "OTHER" (probably any other type of punctuation/special character)
-        other_match = text[cursor]
-        if len(other_match) > 0:
-            cursor += len(other_match)
-            tokens.append(Token(next_token_id, other_match, TokenType.OTHER))
-            next_token_id += 1
-            continue
+    Args:
+        text (string): Text to be tokenized.
+        mwe_dict (dict): The nested hash table that stores MWEs (or the already compiled MWETrie).
 
-    return tokens
+    Returns:
+        tokens (TokenBatch): Tokens of the text.
+    """
+    starts = array("q")
+    ends = array("q")
+    types = array("b")
+    for start, end, token_type in scan_token_spans(text, mwe_dict):
+        starts.append(start)
+        ends.append(end)
+        types.append(token_type.value)
+
+    return TokenBatch(text, starts, ends, types)
 
 
 def main(input, input_type):
@@ -230,10 +244,8 @@ def main(input, input_type):
         input (string): A file path (file whose text we want to tokenize), or a plain text (string to be tokenized)
         input_type (InputType): InputType.FILE_PATH or InputType.STRING (based on the type of the provided input)
     """
-    # Load the MWE dictionary from the pickle file
-    mwe_dict_path = "/Users/lkk/Documents/BOUN CMPE/CMPE 561-Natural Language Processing/Application Project 1/tokenizer/mwe_dict.pkl"
-    with open(mwe_dict_path, "rb") as file:
-        mwe_dict = pickle.load(file)
+    # Get the compiled MWE trie (loaded once per process)
+    mwe_trie = get_resource(MWE_TRIE_PATH, load_mwe_trie)
 
     # Get the text to tokenize (either from a file path or directly as input)
     if input_type == InputType.FILE_PATH:
@@ -244,7 +256,7 @@ def main(input, input_type):
         text_to_tokenize = input
 
     # Tokenize text
-    tokens = tokenize_text(text_to_tokenize, mwe_dict)
+    tokens = tokenize_text(text_to_tokenize, mwe_trie)
 
     for token in tokens:
         print(token)
@@ -254,10 +266,8 @@ def main2(input, input_type):
     """
     eturn token list instead of printing each token.
     """
-    # Load the MWE dictionary from the pickle file
-    mwe_dict_path = "/Users/lkk/Documents/BOUN CMPE/CMPE 561-Natural Language Processing/Application Project 1/tokenizer/mwe_dict.pkl"
-    with open(mwe_dict_path, "rb") as file:
-        mwe_dict = pickle.load(file)
+    # Get the compiled MWE trie (loaded once per process)
+    mwe_trie = get_resource(MWE_TRIE_PATH, load_mwe_trie)
 
     # Get the text to tokenize (either from a file path or directly as input)
     if input_type == InputType.FILE_PATH:
@@ -268,6 +278,6 @@ def main2(input, input_type):
         text_to_tokenize = input
 
     # Tokenize text
-    tokens = tokenize_text(text_to_tokenize, mwe_dict)
+    tokens = tokenize_text(text_to_tokenize, mwe_trie)
 
     return tokens
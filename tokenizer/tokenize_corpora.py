@@ -0,0 +1,155 @@
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .rule_based_tokenizer import tokenize_text, InputType, MWE_TRIE_PATH
+from .mwe_trie import load_mwe_trie
+from .ml_based_tokenizer import tokenizeStream, getModel
+from utils.resource_registry import get_resource
+from utils.token_shard import escape_token
+
+# Resources of the tokenizer used by the current worker process (set by initialize_worker)
+_worker_tokenizer = None
+_worker_resource = None
+
+
+def initialize_worker(tokenizer_name):
+    """
+    Initializer of the worker processes. Loads the MWE trie (rule based tokenizer) or the trained model
+    (ml based tokenizer) once per worker, so that it isn't loaded again for each input file.
+
+    Args:
+        tokenizer_name (string): "rule" or "ml".
+    """
+    global _worker_tokenizer, _worker_resource
+
+    _worker_tokenizer = tokenizer_name
+    if tokenizer_name == "rule":
+        _worker_resource = get_resource(MWE_TRIE_PATH, load_mwe_trie)
+    else:
+        _worker_resource = getModel()
+
+
+def tokenize_file(input_path, output_path):
+    """
+    Tokenize a file with the tokenizer of the worker, and write the tokens (one per line, with their line breaks
+    escaped, see utils.token_shard) to the output file.
+
+    Args:
+        input_path (string): Path of the file to be tokenized.
+        output_path (string): Path of the output (shard) file.
+
+    Returns:
+        input_bytes (int): Size of the input file in bytes.
+        token_count (int): Number of tokens written.
+    """
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    token_count = 0
+
+    with open(output_path, "w", encoding="utf-8") as output_file:
+        if _worker_tokenizer == "rule":
+            with open(input_path, "r", encoding="utf-8") as input_file:
+                text = input_file.read()
+            for token in tokenize_text(text, _worker_resource):
+                output_file.write(escape_token(token.text) + "\n")
+                token_count += 1
+        else:
+            # The ml based tokenizer streams the file, so memory stays bounded for large files
+            for token in tokenizeStream(input_path, InputType.FILE_PATH, model=_worker_resource):
+                output_file.write(escape_token(token) + "\n")
+                token_count += 1
+
+    return os.path.getsize(input_path), token_count
+
+
+def collect_jobs(input_paths, output_dir, pattern):
+    """
+    Expand the input paths into (input file, output shard) pairs. Files in the input directories are searched
+    recursively. The output shards keep the path of their input file relative to the common parent directory of
+    the input paths (e.g. a/train.txt and b/train.txt are written to output_dir/a/train.txt.tokens and
+    output_dir/b/train.txt.tokens), so that files with the same name don't overwrite each other's shards. A file
+    given more than once is tokenized once.
+
+    Args:
+        input_paths (list): Paths of files or directories.
+        output_dir (string): Directory where the output shards will be stored.
+        pattern (string): Glob pattern of the files to be tokenized in the input directories.
+
+    Returns:
+        jobs (list): List of (input path, output path) pairs.
+    """
+    file_paths = []
+    for input_path in input_paths:
+        if os.path.isdir(input_path):
+            file_paths.extend(sorted(glob.glob(os.path.join(input_path, "**", pattern), recursive=True)))
+        else:
+            file_paths.append(input_path)
+    if not file_paths:
+        return []
+
+    # Output paths are relative to the common parent of the input paths (with a single input file or directory,
+    # its own name is the first part of the relative path)
+    base_dir = os.path.commonpath([os.path.dirname(os.path.abspath(os.path.normpath(input_path)))
+                                   for input_path in input_paths])
+
+    jobs = []
+    seen_paths = set()
+    for file_path in file_paths:
+        absolute_path = os.path.abspath(file_path)
+        if absolute_path in seen_paths:
+            continue
+        seen_paths.add(absolute_path)
+        jobs.append((file_path, os.path.join(output_dir, os.path.relpath(absolute_path, base_dir) + ".tokens")))
+
+    return jobs
+
+
+def tokenize_corpora(input_paths, output_dir, tokenizer_name="rule", workers=None, pattern="*.txt"):
+    """
+    Tokenize the files (or the files in the directories) in parallel, writing one output shard per input file,
+    and print the throughput.
+
+    Args:
+        input_paths (list): Paths of files or directories (e.g. the corpora directories, or the TS-Corpus chunks).
+        output_dir (string): Directory where the output shards will be stored.
+        tokenizer_name (string): "rule" or "ml".
+        workers (int): Number of worker processes (number of CPUs if None).
+        pattern (string): Glob pattern of the files to be tokenized in the input directories.
+
+    Returns:
+        total_bytes (int): Total size of the input files in bytes.
+        total_tokens (int): Total number of tokens.
+    """
+    jobs = collect_jobs(input_paths, output_dir, pattern)
+    total_bytes = 0
+    total_tokens = 0
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=initialize_worker,
+                             initargs=(tokenizer_name,)) as executor:
+        futures = [executor.submit(tokenize_file, input_path, output_path) for input_path, output_path in jobs]
+        for (input_path, output_path), future in zip(jobs, futures):
+            input_bytes, token_count = future.result()
+            total_bytes += input_bytes
+            total_tokens += token_count
+            print(f"Tokenized: {input_path} -> {output_path} ({token_count} tokens)")
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{len(jobs)} files, {total_bytes / 1e6:.1f} MB, {total_tokens} tokens in {elapsed:.2f} s")
+    if elapsed > 0:
+        print(f"Throughput: {total_bytes / 1e6 / elapsed:.2f} MB/s, {total_tokens / elapsed:.0f} tokens/s")
+
+    return total_bytes, total_tokens
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tokenize corpus files in parallel, one output shard per input file.")
+    parser.add_argument("inputs", nargs="+", help="Files or directories to tokenize (e.g. corpora/UD_Turkish-BOUN)")
+    parser.add_argument("-o", "--output-dir", required=True, help="Directory to write the output shards to")
+    parser.add_argument("-t", "--tokenizer", choices=["rule", "ml"], default="rule", help="Tokenizer to use")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("-p", "--pattern", default="*.txt", help="Glob pattern of the files in input directories")
+    args = parser.parse_args()
+
+    tokenize_corpora(args.inputs, args.output_dir, args.tokenizer, args.workers, args.pattern)
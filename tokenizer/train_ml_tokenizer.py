@@ -1,202 +1,261 @@
-import pickle
-from collections import deque
-from enum import Enum
-from .cursor import *
-import re
-import pandas as pd
+import argparse
+import glob
+import os
+from itertools import islice
 import numpy as np
-from sklearn.linear_model import LogisticRegression
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.preprocessing import StandardScaler, MinMaxScaler
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.preprocessing import MinMaxScaler
 from joblib import dump, load
+from .feature_extraction import (createBatchFeatureMatrix, DEFAULT_NUMERICAL_SCALING, MAX_DISTANCE,
+                                 NUMERICAL_FEATURES_OFFSET, FEATURE_NAMES)
+from .ml_based_tokenizer import createLabelMatrix, MODEL_FILE_PATH, SCALER_FILE_PATH, NATIVE_MODEL_FILE_PATH
+from .native_model import exportModel
+from .feature_cache import getTrainingMatrices, FEATURE_CACHE_DIR
+from utils.conllu_reader import read_sentences
 
-class Patterns(Enum):
-    WHITESPACE = re.compile(r"\s")
-    UPPER_ALPHABETICAL = re.compile(r"[ÇĞİÖŞÜA-Z]")
-    LOWER_ALPHABETICAL = re.compile(r"[ûâçğıöşüa-z]")
-    NUMBER = re.compile(r"\d")
-    PERIOD = re.compile(r"\.")
-    APOSTROPHE = re.compile(r"\'")
-    OTHER_EOS = re.compile(r'[\!\?…]')
-
-
-def analyzeEachCursorPosition(text, tokens):
-    # Build a linked list from the token list
-    tokenLinkedList = deque(tokens)
-
-    # Helper function to get the next token from the linked list
-    def getNextToken():
-        return tokenLinkedList.popleft() if len(tokenLinkedList) > 0 else None
-
-    # Next token in the text
-    nextToken = getNextToken()
-    # List to store all cursor objects
-    cursors = []
-
-    # Variables for calculating numerical (distance) features of the cursor
-    lastWhitespacePosition = None
-    lastUpperAlphabeticalPosition = None
-    lastLowerAlphabeticalPosition = None
-    lastNumberPosition = None
-    lastPeriodPosition = None
-    lastApostrophePosition = None
-    lastOtherEOSPosition = None
-    lastOtherPosition = None
-
-    # For each cursor position in the text (if text is of size N, it has N+1 cursor positions)
-    for i in range(len(text) + 1):
-        # Create cursor object
-        cursor = Cursor(i)
-
-        # Check for numerical features (which are limited to a maximum distance of 100)
-        cursor.numericalFeatures["distanceToLeftWhitespace"] = min(i - lastWhitespacePosition,
-                                                                   100) if lastWhitespacePosition is not None else 100
-        cursor.numericalFeatures["distanceToLeftUpperAlphabetical"] = min(i - lastUpperAlphabeticalPosition,
-                                                                          100) if lastUpperAlphabeticalPosition is not None else 100
-        cursor.numericalFeatures["distanceToLeftLowerAlphabetical"] = min(i - lastLowerAlphabeticalPosition,
-                                                                          100) if lastLowerAlphabeticalPosition is not None else 100
-        cursor.numericalFeatures["distanceToLeftNumber"] = min(i - lastNumberPosition,
-                                                               100) if lastNumberPosition is not None else 100
-        cursor.numericalFeatures["distanceToLeftPeriod"] = min(i - lastPeriodPosition,
-                                                               100) if lastPeriodPosition is not None else 100
-        cursor.numericalFeatures["distanceToLeftApostrophe"] = min(i - lastApostrophePosition,
-                                                                   100) if lastApostrophePosition is not None else 100
-        cursor.numericalFeatures["distanceToLeftOtherEOS"] = min(i - lastOtherEOSPosition,
-                                                                 100) if lastOtherEOSPosition is not None else 100
-        cursor.numericalFeatures["distanceToLeftOther"] = min(i - lastOtherPosition,
-                                                              100) if lastOtherPosition is not None else 100
-
-        # Check for binary features of the char to the left of the current cursor position
-        if i < 1:
-            cursor.leftCharBinaryFeatures["isLeftWhitespace"] = 1
-        else:
-            if Patterns.WHITESPACE.value.match(text[i - 1]) is not None:
-                cursor.leftCharBinaryFeatures["isLeftWhitespace"] = 1
-            elif Patterns.UPPER_ALPHABETICAL.value.match(text[i - 1]) is not None:
-                cursor.leftCharBinaryFeatures["isLeftUpperAlphabetical"] = 1
-            elif Patterns.LOWER_ALPHABETICAL.value.match(text[i - 1]) is not None:
-                cursor.leftCharBinaryFeatures["isLeftLowerAlphabetical"] = 1
-            elif Patterns.NUMBER.value.match(text[i - 1]) is not None:
-                cursor.leftCharBinaryFeatures["isLeftNumber"] = 1
-            elif Patterns.PERIOD.value.match(text[i - 1]) is not None:
-                cursor.leftCharBinaryFeatures["isLeftPeriod"] = 1
-            elif Patterns.APOSTROPHE.value.match(text[i - 1]) is not None:
-                cursor.leftCharBinaryFeatures["isLeftApostrophe"] = 1
-            elif Patterns.OTHER_EOS.value.match(text[i - 1]) is not None:
-                cursor.leftCharBinaryFeatures["isLeftOtherEOS"] = 1
-            else:
-                cursor.leftCharBinaryFeatures["isLeftOther"] = 1
-
-        # Check for binary features of the char to the right of the current cursor position
-        if i > len(text) - 1:
-            cursor.rightCharBinaryFeatures["isRightWhitespace"] = 1
-        else:
-            if Patterns.WHITESPACE.value.match(text[i]) is not None:
-                cursor.rightCharBinaryFeatures["isRightWhitespace"] = 1
-                lastWhitespacePosition = i
-            elif Patterns.UPPER_ALPHABETICAL.value.match(text[i]) is not None:
-                cursor.rightCharBinaryFeatures["isRightUpperAlphabetical"] = 1
-                lastUpperAlphabeticalPosition = i
-            elif Patterns.LOWER_ALPHABETICAL.value.match(text[i]) is not None:
-                cursor.rightCharBinaryFeatures["isRightLowerAlphabetical"] = 1
-                lastLowerAlphabeticalPosition = i
-            elif Patterns.NUMBER.value.match(text[i]) is not None:
-                cursor.rightCharBinaryFeatures["isRightNumber"] = 1
-                lastNumberPosition = i
-            elif Patterns.PERIOD.value.match(text[i]) is not None:
-                cursor.rightCharBinaryFeatures["isRightPeriod"] = 1
-                lastPeriodPosition = i
-            elif Patterns.APOSTROPHE.value.match(text[i]) is not None:
-                cursor.rightCharBinaryFeatures["isRightApostrophe"] = 1
-                lastApostrophePosition = i
-            elif Patterns.OTHER_EOS.value.match(text[i]) is not None:
-                cursor.rightCharBinaryFeatures["isRightOtherEOS"] = 1
-                lastOtherEOSPosition = i
-            else:
-                cursor.rightCharBinaryFeatures["isRightOther"] = 1
-                lastOtherPosition = i
-
-        # # Check for bigram features
-        # if (i > 1) and (i < len(text) - 1):
-        #     cursor.bigramFeatures["bigramLeft"] = text[i-2:i]
-        #     cursor.bigramFeatures["bigramRight"] = text[i:i+2]
-        # else:
-        #     if i == 0:
-        #         cursor.bigramFeatures["bigramLeft"] = ". "
-        #         cursor.bigramFeatures["bigramRight"] = text[i:i+2]
-        #     elif i == 1:
-        #         cursor.bigramFeatures["bigramLeft"] = " " + text[i-1:i]
-        #         cursor.bigramFeatures["bigramRight"] = text[i:i+2]
-        #     elif i == len(text) - 1:
-        #         cursor.bigramFeatures["bigramLeft"] = text[i-2:i]
-        #         cursor.bigramFeatures["bigramRight"] = text[i:i+1] + " "
-        #     elif i == len(text):
-        #         cursor.bigramFeatures["bigramLeft"] = text[i-2:i]
-        #         cursor.bigramFeatures["bigramRight"] = " ."
-
-        # Check for the label (if current cursor position is the start of a new token or not)
-        if nextToken is not None:
-            if text[i: i + len(nextToken)] == nextToken:
-                cursor.label = 1
-                nextToken = getNextToken()
-        else:
-            if i == len(text):
-                cursor.label = 1
-
-        cursors.append(cursor)
-
-    return cursors
-
-
-# Load the train text file
-train_text_path = "/Users/lkk/Documents/BOUN CMPE/CMPE 561-Natural Language Processing/Application Project 1/corpora/UD_Turkish-BOUN/tr_boun-ud-train.txt"
-with open(train_text_path, "r", encoding="utf-8") as file:
-    text = file.read()
-
-# Load the token list corresponding to the train text file
-tokens_path = "/Users/lkk/Documents/BOUN CMPE/CMPE 561-Natural Language Processing/Application Project 1/tokenizer/token_list_boun_train.pkl"
-with open(tokens_path, "rb") as file:
-    tokens = pickle.load(file)
-
-cursors = analyzeEachCursorPosition(text, tokens)
-
-# Create lists of dictionaries (feature lists) to create corresponding dataframes
-indices = []
-leftCharFeatures = []
-rightCharFeatures = []
-numericalFeatures = []
-labels = []
-
-# For each cursor position, populate dictionary lists with corresponding features
-for cursor in cursors:
-    indices.append(cursor.position)
-    leftCharFeatures.append(cursor.leftCharBinaryFeatures)
-    rightCharFeatures.append(cursor.rightCharBinaryFeatures)
-    numericalFeatures.append(cursor.numericalFeatures)
-    labels.append(cursor.label)
-
-# Create the dataframes
-dfLeft = pd.DataFrame(leftCharFeatures, index=indices)
-dfRight = pd.DataFrame(rightCharFeatures, index=indices)
-dfNum = pd.DataFrame(numericalFeatures, index=indices)
-dfLabels = pd.DataFrame(labels, index=indices)
-
-# Scale the dfNum dataframe (as it contains numerical features)
-scaler = MinMaxScaler()
-scaledValues = scaler.fit_transform(dfNum)
-dfNumScaled = pd.DataFrame(scaledValues, columns=dfNum.columns)
-
-# Concatenate all feature dataframes
-dfAllFeatures = pd.concat([dfLeft, dfRight, dfNumScaled], axis=1)
-
-# Create numpy arrays for training feature and label matrices
-X_train = np.array(dfAllFeatures)
-y_train = np.array(dfLabels).ravel()
-
-# Train the model
-model = LogisticRegression()
-model.fit(X_train, y_train)
-
-# Dump the trained model to later use it in another module
-model_file_path = "/Users/lkk/Documents/BOUN CMPE/CMPE 561-Natural Language Processing/Application Project 1/tokenizer/ml_model.joblib"
-dump(model, model_file_path)
\ No newline at end of file
+CORPORA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "corpora")
+# Checkpoint of the streaming training (model and progress), saved regularly so that training can be resumed
+CHECKPOINT_FILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ml_model_checkpoint.joblib")
+
+# Prefix of the comment line holding the text of a sentence in the .conllu files
+TEXT_COMMENT_PREFIX = "# text = "
+
+
+def iterTrainingDocuments(conlluPaths):
+    """
+    Stream the training documents of the .conllu files: the text of each sentence (its "# text = " comment) and
+    the surface tokens of the sentence. Only one sentence of a file is kept in memory.
+
+    Args:
+        conlluPaths (list): Paths of the .conllu files (e.g. the train files of all UD_Turkish-* treebanks).
+
+    Yields:
+        text (string): Text of the sentence.
+        tokens (list): Tokens of the sentence.
+    """
+    for conlluPath in conlluPaths:
+        for sentence in read_sentences(conlluPath):
+            text = None
+            for comment in sentence.comments:
+                if comment.startswith(TEXT_COMMENT_PREFIX):
+                    text = comment[len(TEXT_COMMENT_PREFIX):]
+            # Sentences without their text can't be labeled
+            if text is None:
+                continue
+            yield text, [columns[1] for columns, _ in sentence.tokens()]
+
+
+def createTrainingMatrices(texts, tokenLists, numericalScaling=DEFAULT_NUMERICAL_SCALING):
+    """
+    Create the training matrices of a batch of documents: the feature matrix of all documents is built at once
+    (see createBatchFeatureMatrix), and the labels of each document are concatenated in the same row order.
+
+    Args:
+        texts (list): Texts of the documents.
+        tokenLists (list): Gold tokens of each document.
+        numericalScaling (tuple): Scale and offset arrays of the numerical features (see createFeatureMatrix).
+
+    Returns:
+        X (np.ndarray): Feature matrix (a document of size N has N+1 rows).
+        y (np.ndarray): Labels (1 for the cursor positions that start a token).
+    """
+    X, _ = createBatchFeatureMatrix(texts, numericalScaling)
+    y = np.concatenate([createLabelMatrix(text, tokens) for text, tokens in zip(texts, tokenLists)]
+                       or [np.zeros(0, dtype=np.int64)])
+
+    return X, y
+
+
+def iterTrainingBatches(documents, batchSize, numericalScaling=DEFAULT_NUMERICAL_SCALING):
+    """
+    Group a stream of documents into mini-batches of (at least) batchSize cursor positions, and yield their
+    feature and label matrices. Memory depends on the batch size, not on the size of the training set.
+
+    Args:
+        documents (iterable): (text, tokens) pairs (e.g. from iterTrainingDocuments).
+        batchSize (int): Minimum number of rows of a batch (the last batch may be smaller).
+        numericalScaling (tuple): Scale and offset arrays of the numerical features.
+
+    Yields:
+        X (np.ndarray): Feature matrix of the batch.
+        y (np.ndarray): Labels of the batch.
+        documentCount (int): Number of documents in the batch.
+    """
+    texts = []
+    tokenLists = []
+    rowCount = 0
+    for text, tokens in documents:
+        texts.append(text)
+        tokenLists.append(tokens)
+        rowCount += len(text) + 1
+
+        if rowCount >= batchSize:
+            X, y = createTrainingMatrices(texts, tokenLists, numericalScaling)
+            yield X, y, len(texts)
+            texts = []
+            tokenLists = []
+            rowCount = 0
+
+    if texts:
+        X, y = createTrainingMatrices(texts, tokenLists, numericalScaling)
+        yield X, y, len(texts)
+
+
+def saveCheckpoint(path, model, epoch, documentCount, rngState, conlluPaths, batchSize):
+    """
+    Save the model and the training progress (epoch, number of documents of the epoch already trained on, and the
+    state of the shuffling random generator), with the inputs the progress refers to (training files and batch
+    size). The checkpoint is written to a temporary file first, so an interrupted save doesn't corrupt the last one.
+    """
+    dump({"model": model, "epoch": epoch, "documentCount": documentCount, "rngState": rngState,
+          "conlluPaths": [os.path.abspath(conlluPath) for conlluPath in conlluPaths], "batchSize": batchSize},
+         path + ".tmp")
+    os.replace(path + ".tmp", path)
+
+
+def getFixedScaler():
+    """
+    Get a MinMaxScaler fitted to the range of the numerical features ([1, MAX_DISTANCE]). Streaming training can't
+    fit the scaler to the whole training set before training, so the (input independent) fixed range is used, which
+    is what the scaler fits on any text long enough to have all the distances.
+    """
+    numericalFeatureCount = len(FEATURE_NAMES) - NUMERICAL_FEATURES_OFFSET
+    scaler = MinMaxScaler()
+    scaler.fit(np.array([[1] * numericalFeatureCount, [MAX_DISTANCE] * numericalFeatureCount]))
+    return scaler
+
+
+def trainStreaming(conlluPaths, batchSize=100000, epochs=1, checkpointPath=CHECKPOINT_FILE_PATH,
+                   checkpointEvery=50, resume=True, seed=0):
+    """
+    Train the ml tokenizer out of core: feature and label mini-batches are streamed from the .conllu files, and an
+    SGDClassifier with the log loss (logistic regression) is fitted with partial_fit, batch by batch. The model and
+    the progress are checkpointed every checkpointEvery batches (and at the end of each epoch), and training
+    continues from the checkpoint if it exists, with the same shuffles an uninterrupted run would make.
+
+    Args:
+        conlluPaths (list): Paths of the .conllu files to train on.
+        batchSize (int): Number of cursor positions (rows) in each mini-batch.
+        epochs (int): Number of passes over the training files.
+        checkpointPath (string): Path of the checkpoint file.
+        checkpointEvery (int): Number of batches between the checkpoints.
+        resume (bool): If False, an existing checkpoint is ignored (and overwritten).
+        seed (int): Seed of the model and of the shuffling of the rows of each batch.
+
+    Returns:
+        model (SGDClassifier): The trained model.
+
+    Raises:
+        ValueError: If the checkpoint was saved with other training files or another batch size (its progress
+            doesn't apply to these inputs).
+    """
+    classes = np.array([0, 1])
+    rng = np.random.default_rng(seed)
+
+    model = SGDClassifier(loss="log_loss", random_state=seed)
+    startEpoch = 0
+    skipDocuments = 0
+    if resume and os.path.exists(checkpointPath):
+        checkpoint = load(checkpointPath)
+        if (checkpoint.get("conlluPaths") != [os.path.abspath(conlluPath) for conlluPath in conlluPaths]
+                or checkpoint.get("batchSize") != batchSize):
+            raise ValueError(f"The checkpoint was saved with other training files or another batch size, restart "
+                             f"the training (resume=False) to overwrite it: {checkpointPath}")
+        model, startEpoch, skipDocuments = checkpoint["model"], checkpoint["epoch"], checkpoint["documentCount"]
+        # Continue the sequence of shuffles instead of replaying it from the seed
+        rng.bit_generator.state = checkpoint["rngState"]
+        print(f"Resuming from epoch {startEpoch + 1}, after {skipDocuments} documents")
+
+    for epoch in range(startEpoch, epochs):
+        # Skip the documents the checkpointed model was already trained on in this epoch
+        documents = islice(iterTrainingDocuments(conlluPaths), skipDocuments, None)
+        documentCount = skipDocuments
+        skipDocuments = 0
+
+        for batchIndex, (X, y, batchDocumentCount) in enumerate(iterTrainingBatches(documents, batchSize), start=1):
+            # Shuffle the rows of the batch (the stream itself is in the order of the files)
+            order = rng.permutation(len(y))
+            model.partial_fit(X[order], y[order], classes=classes)
+            documentCount += batchDocumentCount
+
+            if batchIndex % checkpointEvery == 0:
+                saveCheckpoint(checkpointPath, model, epoch, documentCount, rng.bit_generator.state, conlluPaths,
+                               batchSize)
+                print(f"Epoch {epoch + 1}: {documentCount} documents, checkpoint saved")
+
+        saveCheckpoint(checkpointPath, model, epoch + 1, 0, rng.bit_generator.state, conlluPaths, batchSize)
+        print(f"Epoch {epoch + 1} completed ({documentCount} documents)")
+
+    return model
+
+
+def trainInMemory(trainTextPath, tokensPath, cacheDir=FEATURE_CACHE_DIR, useCache=True):
+    """
+    Train the ml tokenizer on a whole text (and its token list) in memory, with a LogisticRegression model. The
+    features and labels of the text are taken from the feature cache (see feature_cache.getTrainingMatrices), so
+    they are computed only once for the same text, token list and feature schema.
+
+    Returns:
+        model (LogisticRegression): The trained model.
+        scaler (MinMaxScaler): The scaler fitted to the numerical features of the text.
+    """
+    # Load the train text file
+    with open(trainTextPath, "r", encoding="utf-8") as file:
+        text = file.read()
+
+    # Unscaled features (same columns as the Cursor features) and labels of each cursor position
+    XRaw, yRaw = getTrainingMatrices(text, tokensPath, cacheDir, useCache)
+
+    # Scale the numerical features (fitting the scaler to them, as for the numerical features dataframe)
+    scaler = MinMaxScaler()
+    scaler.fit(XRaw[:, NUMERICAL_FEATURES_OFFSET:])
+
+    # Create numpy arrays for training feature and label matrices
+    X_train = XRaw.astype(np.float64)
+    X_train[:, NUMERICAL_FEATURES_OFFSET:] = scaler.transform(X_train[:, NUMERICAL_FEATURES_OFFSET:])
+    y_train = yRaw.astype(np.int64)
+
+    # Train the model
+    model = LogisticRegression()
+    model.fit(X_train, y_train)
+
+    return model, scaler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the ml based tokenizer.")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Train out of core on the .conllu files, with an SGD (log loss) model")
+    parser.add_argument("--text", default=os.path.join(CORPORA_DIR, "UD_Turkish-BOUN", "tr_boun-ud-train.txt"),
+                        help="Train text file (in memory training)")
+    parser.add_argument("--tokens", default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                         "token_list_boun_train.pkl"),
+                        help="Token list (pickle) of the train text file (in memory training)")
+    parser.add_argument("--conllu", nargs="+", default=None,
+                        help="Train .conllu files (streaming training, all UD_Turkish-* train files by default)")
+    parser.add_argument("--batch-size", type=int, default=100000, help="Rows per mini-batch (streaming training)")
+    parser.add_argument("--epochs", type=int, default=1, help="Passes over the training files (streaming training)")
+    parser.add_argument("--checkpoint-every", type=int, default=50,
+                        help="Batches between the checkpoints (streaming training)")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint (streaming training)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Compute the features without reading or writing the feature cache (in memory training)")
+    args = parser.parse_args()
+
+    if args.streaming:
+        conlluPaths = args.conllu or sorted(glob.glob(os.path.join(CORPORA_DIR, "UD_Turkish-*", "*-ud-train.conllu")))
+        model = trainStreaming(conlluPaths, args.batch_size, args.epochs, CHECKPOINT_FILE_PATH,
+                               args.checkpoint_every, not args.restart)
+        scaler = getFixedScaler()
+    else:
+        model, scaler = trainInMemory(args.text, args.tokens, FEATURE_CACHE_DIR, not args.no_cache)
+
+    # Dump the trained model to later use it in another module
+    dump(model, MODEL_FILE_PATH)
+
+    # Also dump the fitted scaler, so that inference applies the same scaling instead of refitting on its input
+    dump(scaler, SCALER_FILE_PATH)
+
+    # Regenerate the native model too, as inference prefers it over the joblib files
+    exportModel(model, NATIVE_MODEL_FILE_PATH, scaler)
+    print(f"Training completed, model exported to files:\n\t{MODEL_FILE_PATH}\n\t{NATIVE_MODEL_FILE_PATH}")
@@ -0,0 +1,137 @@
+from array import array
+
+
+class Sentence:
+    """
+    A sentence of a .conllu (or .cupt) file.
+
+    The lines of the syntactic words (lines with a single integer ID) are kept in the words list, as lists of
+    columns. Lines of the multiword tokens (lines with an ID range, e.g. 10-11) are resolved to the words they
+    span: multiword_tokens maps the index (in words) of the first word of the token to the pair (columns of the
+    token line, index after the last word of the token). Empty nodes (decimal IDs, e.g. 8.1) are skipped.
+    """
+    __slots__ = ("comments", "words", "multiword_tokens")
+
+    def __init__(self, comments, words, multiword_tokens):
+        self.comments = comments
+        self.words = words
+        self.multiword_tokens = multiword_tokens
+
+    def __len__(self):
+        return len(self.words)
+
+    def tokens(self):
+        """
+        Iterate over the surface tokens of the sentence.
+
+        Yields:
+            columns (list): Columns of the token line (of the multiword token line, or of the word line).
+            parts (list): Columns of the words of a multiword token (None for a single word token).
+        """
+        words = self.words
+        multiword_tokens = self.multiword_tokens
+        i = 0
+        while i < len(words):
+            multiword_token = multiword_tokens.get(i)
+            if multiword_token is None:
+                yield words[i], None
+                i += 1
+            else:
+                columns, end = multiword_token
+                yield columns, words[i:end]
+                i = end
+
+
+def read_sentences(file_path, min_columns=10):
+    """
+    Read a .conllu (or .cupt) file line by line and yield its sentences. Only one sentence is kept in memory.
+
+    Args:
+        file_path (string): Path to the .conllu file.
+        min_columns (int): Minimum number of columns of a token line (.conllu has 10, .cupt has 11). Lines with
+            less columns are assumed invalid and skipped.
+
+    Yields:
+        sentence (Sentence): The next sentence in the file.
+    """
+    comments = []
+    words = []
+    multiword_tokens = {}
+
+    with open(file_path, "r", encoding="utf-8") as file:
+        for line in file:
+            # Trailing whitespace (and the newline) is removed, as the builders did with strip()
+            line = line.rstrip()
+
+            # An empty line marks the end of the sentence
+            if not line:
+                if words:
+                    yield Sentence(comments, words, multiword_tokens)
+                    comments = []
+                    words = []
+                    multiword_tokens = {}
+                elif comments:
+                    comments = []
+                continue
+
+            # Comment (id/info) line
+            if line[0] == "#":
+                comments.append(line)
+                continue
+
+            columns = line.split("\t")
+            if len(columns) < min_columns:
+                continue
+
+            ID_info = columns[0]
+            # Single ID word line (the common case)
+            if ID_info.isdigit():
+                words.append(columns)
+                continue
+
+            # Multiword token line (ID range). Its words are the next lines, until the word with the end ID.
+            dash = ID_info.find("-")
+            if dash > 0:
+                start_ID = int(ID_info[:dash])
+                end_ID = int(ID_info[dash + 1:])
+                multiword_tokens[len(words)] = (columns, len(words) + end_ID - start_ID + 1)
+
+            # Any other line is an empty node, which isn't part of the surface tokens
+
+    # Last sentence, if the file doesn't end with an empty line
+    if words:
+        yield Sentence(comments, words, multiword_tokens)
+
+
+def iter_sentences(source, min_columns=10):
+    """
+    Get the sentences of a source, which is either the path to a .conllu file (read by read_sentences) or
+    already read sentences (e.g. a list, so that a corpus can be parsed once and given to several builders).
+    """
+    if isinstance(source, str):
+        return read_sentences(source, min_columns)
+    return source
+
+
+def read_columns(source, column_indices, min_columns=10):
+    """
+    Read the given columns of all words in a corpus into columnar lists.
+
+    Args:
+        source (string or iterable): Path to the .conllu file, or already read sentences.
+        column_indices (list): Indices of the columns to read (e.g. [1, 2] for surface and lemma forms).
+        min_columns (int): Minimum number of columns of a token line.
+
+    Returns:
+        columns (list): One list per column index, holding the values of that column for each word.
+        sentence_starts (array): Index of the first word of each sentence, followed by the number of words.
+    """
+    columns = [[] for _ in column_indices]
+    sentence_starts = array("q", [0])
+
+    for sentence in iter_sentences(source, min_columns):
+        for values, column_index in zip(columns, column_indices):
+            values.extend([word[column_index] for word in sentence.words])
+        sentence_starts.append(sentence_starts[-1] + len(sentence.words))
+
+    return columns, sentence_starts
@@ -0,0 +1,39 @@
+import os
+from utils.resource_registry import load_pickle
+from tokenizer.mwe_trie import MWETrie, load_mwe_trie
+from tokenizer.rule_based_tokenizer import MWE_TRIE_PATH
+from stemmer.suffix_automaton import SuffixAutomaton, save_replacement_dict, load_suffix_automaton, \
+    load_replacement_dict
+from stemmer.stemmer import SUFFIX_DICT_PATH, REPLACEMENT_DICT_PATH, SUFFIX_AUTOMATON_PATH, REPLACEMENT_LEXICON_PATH
+
+# Pickle of the nested MWE dictionary (exported by build_mwe_lexicon.py next to the trie)
+MWE_DICT_PATH = os.path.join(os.path.dirname(MWE_TRIE_PATH), "mwe_dict.pkl")
+
+
+def convert_lexicons():
+    """
+    Convert the pickled nested dictionaries of the lexicons (built before the binary lexicon format) into the
+    binary lexicon files used at runtime. Missing pickle files are skipped. The checksum of each written file is
+    verified (the runtime loaders don't verify it).
+    """
+    conversions = [(MWE_DICT_PATH, MWE_TRIE_PATH, lambda mwe_dict: MWETrie.from_dict(mwe_dict).save(MWE_TRIE_PATH),
+                    load_mwe_trie),
+                   (SUFFIX_DICT_PATH, SUFFIX_AUTOMATON_PATH,
+                    lambda suffix_dict: SuffixAutomaton.from_dict(suffix_dict).save(SUFFIX_AUTOMATON_PATH),
+                    load_suffix_automaton),
+                   (REPLACEMENT_DICT_PATH, REPLACEMENT_LEXICON_PATH,
+                    lambda replacement_dict: save_replacement_dict(replacement_dict, REPLACEMENT_LEXICON_PATH),
+                    load_replacement_dict)]
+
+    for pickle_path, binary_path, convert, load in conversions:
+        if not os.path.exists(pickle_path):
+            print(f"Skipped (missing file):\n\t{pickle_path}")
+            continue
+
+        convert(load_pickle(pickle_path))
+        load(binary_path, verify=True)
+        print(f"Converted:\n\t{pickle_path}\n\t-> {binary_path}")
+
+
+if __name__ == "__main__":
+    convert_lexicons()
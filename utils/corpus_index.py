@@ -0,0 +1,272 @@
+import argparse
+import json
+import mmap
+import os
+import numpy as np
+from utils.split_corpus import CORPORA_DIR, SENTENCE_BOUNDARY_PATTERN
+
+# Index files, next to the corpus (e.g. ts_corpus_ver_2-export.txt.lines.u64). The offset files are raw arrays of
+# little endian uint64 start offsets (in bytes), so that they can be appended to while building and memory-mapped
+# when reading. The progress file records how far the build got, so that an interrupted build can resume.
+LINE_OFFSETS_SUFFIX = ".lines.u64"
+SENTENCE_OFFSETS_SUFFIX = ".sentences.u64"
+PROGRESS_SUFFIX = ".index.json"
+OFFSET_DTYPE = np.dtype("<u8")
+
+# Size (in bytes) of the blocks the corpus is scanned in (the progress is saved after each block)
+DEFAULT_BLOCK_SIZE = 64 * 1024 * 1024
+
+NEWLINE = ord("\n")
+CARRIAGE_RETURN = ord("\r")
+
+
+def get_index_paths(corpus_path):
+    """
+    Get the paths of the index files of a corpus.
+
+    Returns:
+        line_offsets_path (string): Path of the line offsets file.
+        sentence_offsets_path (string): Path of the sentence offsets file.
+        progress_path (string): Path of the progress file.
+    """
+    return (corpus_path + LINE_OFFSETS_SUFFIX, corpus_path + SENTENCE_OFFSETS_SUFFIX,
+            corpus_path + PROGRESS_SUFFIX)
+
+
+def find_block_offsets(data, block_start, block_end):
+    """
+    Find the line and sentence start offsets in a block of the corpus.
+
+    A line starts after every line break. A sentence starts at the start of every non empty line, and at every
+    sentence boundary inside a line (a period between whitespaces followed by an uppercase letter, see
+    split_corpus.SENTENCE_BOUNDARY_PATTERN). An offset belongs to the block it is in (not to the block of the line
+    break before it), so that the offsets of consecutive blocks don't overlap and the index doesn't depend on the
+    block size.
+
+    Args:
+        data (mmap.mmap): The corpus.
+        block_start (int): Offset of the first byte of the block.
+        block_end (int): Offset after the last byte of the block.
+
+    Returns:
+        line_starts (np.ndarray): Start offsets of the lines starting in the block (after the start of the corpus).
+        sentence_starts (np.ndarray): Start offsets of the sentences starting in the block.
+    """
+    # The byte before the block is also read, as a line break there starts a line at the start of the block
+    scan_start = max(block_start - 1, 0)
+    block = np.frombuffer(data, dtype=np.uint8, count=block_end - scan_start, offset=scan_start)
+
+    # Lines starting in [block_start, block_end) follow the line breaks in [block_start - 1, block_end - 1)
+    line_starts = np.flatnonzero(block[:-1] == NEWLINE) + 1
+    first_bytes = block[line_starts]
+    non_empty_line_starts = line_starts[(first_bytes != NEWLINE) & (first_bytes != CARRIAGE_RETURN)]
+    line_starts = line_starts.astype(OFFSET_DTYPE) + scan_start
+
+    # Boundaries whose split point is in the block (a boundary pattern may start a few bytes before the block,
+    # and its uppercase letter may end a few bytes after it)
+    boundary_starts = [match.start(1) for match in
+                       SENTENCE_BOUNDARY_PATTERN.finditer(data, max(block_start - 3, 0), min(block_end + 2, len(data)))
+                       if block_start <= match.start(1) < block_end]
+
+    sentence_starts = np.union1d(non_empty_line_starts.astype(OFFSET_DTYPE) + scan_start,
+                                 np.array(boundary_starts, dtype=OFFSET_DTYPE))
+    # The first line starts at the start of the corpus
+    if block_start == 0 and block[0] != NEWLINE and block[0] != CARRIAGE_RETURN:
+        sentence_starts = np.union1d(np.zeros(1, dtype=OFFSET_DTYPE), sentence_starts)
+
+    return line_starts, sentence_starts.astype(OFFSET_DTYPE)
+
+
+def build_corpus_index(corpus_path, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Build the line and sentence offsets of a corpus in a single streaming pass over the memory-mapped corpus. The
+    offsets are appended to the offset files block by block, and the progress is saved after each block, so an
+    interrupted build continues from the last saved block when it is called again. If the corpus has changed since
+    the saved progress (different size or modification time), the index is built from scratch.
+
+    Args:
+        corpus_path (string): Path of the corpus (UTF-8 text file).
+        block_size (int): Size of the blocks the corpus is scanned in (in bytes).
+
+    Returns:
+        line_count (int): Number of lines.
+        sentence_count (int): Number of sentences.
+    """
+    line_offsets_path, sentence_offsets_path, progress_path = get_index_paths(corpus_path)
+    stat = os.stat(corpus_path)
+
+    progress = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "position": 0, "lines": 0, "sentences": 0,
+                "complete": False}
+    if os.path.exists(progress_path):
+        with open(progress_path, "r", encoding="utf-8") as file:
+            saved_progress = json.load(file)
+        if (saved_progress["size"], saved_progress["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+            progress = saved_progress
+    if progress["complete"]:
+        return progress["lines"], progress["sentences"]
+
+    # Drop the offsets written after the last saved progress (the build may have stopped in the middle of a block)
+    for path, count in [(line_offsets_path, progress["lines"]), (sentence_offsets_path, progress["sentences"])]:
+        with open(path, "ab") as file:
+            file.truncate(count * OFFSET_DTYPE.itemsize)
+
+    def save_progress():
+        with open(progress_path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(progress, file)
+        os.replace(progress_path + ".tmp", progress_path)
+
+    if stat.st_size > 0:
+        with open(corpus_path, "rb") as corpus_file, \
+                mmap.mmap(corpus_file.fileno(), 0, access=mmap.ACCESS_READ) as data, \
+                open(line_offsets_path, "ab") as line_file, open(sentence_offsets_path, "ab") as sentence_file:
+            # The first line starts at the start of the corpus
+            if progress["position"] == 0:
+                np.zeros(1, dtype=OFFSET_DTYPE).tofile(line_file)
+                progress["lines"] = 1
+
+            while progress["position"] < stat.st_size:
+                block_start = progress["position"]
+                block_end = min(block_start + block_size, stat.st_size)
+                line_starts, sentence_starts = find_block_offsets(data, block_start, block_end)
+
+                line_starts.tofile(line_file)
+                sentence_starts.tofile(sentence_file)
+                line_file.flush()
+                sentence_file.flush()
+
+                progress["position"] = block_end
+                progress["lines"] += len(line_starts)
+                progress["sentences"] += len(sentence_starts)
+                save_progress()
+
+    progress["complete"] = True
+    save_progress()
+
+    return progress["lines"], progress["sentences"]
+
+
+def load_offsets(path):
+    """
+    Memory-map an offsets file (an empty file can't be memory-mapped, so an empty array is returned for it).
+    """
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=OFFSET_DTYPE)
+    return np.memmap(path, dtype=OFFSET_DTYPE, mode="r")
+
+
+class CorpusIndex:
+    """
+    Random access to the lines and sentences of an indexed corpus (see build_corpus_index). The corpus and the
+    offset files are memory-mapped, so getting an item is O(1): its start offset and the start offset of the next
+    item are looked up, and only the bytes between them are read.
+    """
+
+    def __init__(self, corpus_path):
+        line_offsets_path, sentence_offsets_path, progress_path = get_index_paths(corpus_path)
+        with open(progress_path, "r", encoding="utf-8") as file:
+            progress = json.load(file)
+        stat = os.stat(corpus_path)
+        if not progress["complete"] or (progress["size"], progress["mtime_ns"]) != (stat.st_size, stat.st_mtime_ns):
+            raise ValueError(f"The index of {corpus_path} is incomplete or out of date, build it again")
+
+        self.size = stat.st_size
+        self.line_offsets = load_offsets(line_offsets_path)
+        self.sentence_offsets = load_offsets(sentence_offsets_path)
+
+        self._file = open(corpus_path, "rb")
+        self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size > 0 else b""
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self.sentence_offsets)
+
+    def line_count(self):
+        return len(self.line_offsets)
+
+    def _get_item(self, offsets, index):
+        start = int(offsets[index])
+        end = int(offsets[index + 1]) if index + 1 < len(offsets) else self.size
+        return self.data[start:end].decode("utf-8").strip()
+
+    def sentence(self, index):
+        """
+        Get the sentence with the given index (without the surrounding whitespace).
+        """
+        return self._get_item(self.sentence_offsets, index)
+
+    def line(self, index):
+        """
+        Get the line with the given index (without the surrounding whitespace).
+        """
+        return self._get_item(self.line_offsets, index)
+
+    def sample(self, count, seed=None):
+        """
+        Take a uniform random sample of sentences (without replacement).
+
+        Args:
+            count (int): Number of sentences.
+            seed (int): Seed of the random number generator.
+
+        Returns:
+            sentences (list): The sampled sentences, in the order of the corpus.
+        """
+        rng = np.random.default_rng(seed)
+        indices = np.sort(rng.choice(len(self), size=min(count, len(self)), replace=False))
+        return [self.sentence(index) for index in indices.tolist()]
+
+    def stratified_sample(self, count, strata=10, seed=None):
+        """
+        Take a stratified random sample of sentences: the corpus is divided into consecutive strata (parts with
+        equal numbers of sentences), and the same number of sentences is sampled from each stratum, so that the
+        sample covers the whole corpus (e.g. all sources or dates of a corpus concatenated from many documents).
+
+        Args:
+            count (int): Number of sentences (divided evenly between the strata, the first strata take the
+                remainder).
+            strata (int): Number of strata.
+            seed (int): Seed of the random number generator.
+
+        Returns:
+            sentences (list): The sampled sentences, in the order of the corpus.
+        """
+        rng = np.random.default_rng(seed)
+        boundaries = np.linspace(0, len(self), strata + 1).astype(np.int64)
+
+        indices = []
+        for stratum in range(strata):
+            stratum_start, stratum_end = int(boundaries[stratum]), int(boundaries[stratum + 1])
+            stratum_count = count // strata + (1 if stratum < count % strata else 0)
+            stratum_count = min(stratum_count, stratum_end - stratum_start)
+            indices.append(np.sort(rng.choice(stratum_end - stratum_start, size=stratum_count, replace=False))
+                           + stratum_start)
+
+        return [self.sentence(index) for index in np.concatenate(indices).tolist()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the line and sentence index of a corpus (resumable).")
+    parser.add_argument("corpus", nargs="?", default=os.path.join(CORPORA_DIR, "TS-Corpus", "ts_corpus_ver_2-export.txt"),
+                        help="Corpus file to index")
+    parser.add_argument("-b", "--block-size", type=int, default=DEFAULT_BLOCK_SIZE,
+                        help="Size of the blocks the corpus is scanned in (in bytes)")
+    parser.add_argument("--sample", type=int, default=0, help="Print a random sample of this many sentences")
+    args = parser.parse_args()
+
+    line_count, sentence_count = build_corpus_index(args.corpus, args.block_size)
+    print(f"{line_count} lines, {sentence_count} sentences indexed:\n\t{args.corpus}")
+
+    if args.sample > 0:
+        with CorpusIndex(args.corpus) as index:
+            for sentence in index.sample(args.sample):
+                print(sentence)
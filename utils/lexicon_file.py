@@ -0,0 +1,129 @@
+import mmap
+import struct
+import zlib
+import numpy as np
+
+# Binary lexicon file layout (all integers little endian):
+#   header:        magic (4 bytes), format version (uint32), kind (16 bytes, ascii), number of sections (uint32),
+#                  CRC32 of everything after the header (uint32)
+#   section table: for each section, name (32 bytes, ascii), dtype (8 bytes, numpy dtype string),
+#                  offset from the start of the file (uint64), number of items (uint64)
+#   sections:      raw array data, each section aligned to 8 bytes
+MAGIC = b"LEXB"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sI16sII")
+SECTION_ENTRY = struct.Struct("<32s8sQQ")
+ALIGNMENT = 8
+
+
+def encode_strings(strings):
+    """
+    Encode a list of strings into a string table: the concatenated UTF-8 bytes of the strings and the offsets
+    of each string in them (string i is data[offsets[i]:offsets[i + 1]]).
+
+    Args:
+        strings (list): List of strings.
+
+    Returns:
+        offsets (np.ndarray): int64 array with len(strings) + 1 offsets.
+        data (np.ndarray): uint8 array of the concatenated UTF-8 bytes.
+    """
+    encoded = [string.encode("utf-8") for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(string) for string in encoded], out=offsets[1:])
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return offsets, data
+
+
+def decode_strings(offsets, data):
+    """
+    Decode a string table created by encode_strings back into a list of strings.
+    """
+    data = data.tobytes()
+    offsets = offsets.tolist()
+    return [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+
+def as_memoryview(array, format):
+    """
+    Get a memoryview of an array (NumPy array, array.array, bytes or bytearray) with the given native format
+    (e.g. "i" for int32, "B" for uint8), without copying it. Indexing a memoryview returns Python ints, which is
+    faster than indexing a NumPy array, so the lookups walk the (memory-mapped) arrays directly through it.
+    """
+    view = memoryview(array)
+    if view.format != format:
+        view = view.cast("B").cast(format)
+    return view
+
+
+def write_lexicon(path, kind, sections):
+    """
+    Write arrays into a binary lexicon file.
+
+    Args:
+        path (string): Path of the file.
+        kind (string): Kind of the lexicon (e.g. "mwe_trie"), checked when the file is read.
+        sections (dict): Dictionary of section names (at most 32 chars) and arrays (anything np.asarray accepts).
+    """
+    if len(kind) > 16 or any(len(name) > 32 for name in sections):
+        raise ValueError("Lexicon kinds are limited to 16 chars, and section names to 32 chars")
+    arrays = [(name, np.ascontiguousarray(array)) for name, array in sections.items()]
+
+    # Place the sections after the header and the section table
+    entries = []
+    position = HEADER.size + SECTION_ENTRY.size * len(arrays)
+    for name, array in arrays:
+        position += -position % ALIGNMENT
+        dtype = array.dtype.newbyteorder("<") if array.dtype.byteorder == "=" else array.dtype
+        entries.append(SECTION_ENTRY.pack(name.encode("ascii"), dtype.str.encode("ascii"), position, array.size))
+        position += array.nbytes
+
+    # Body of the file (everything after the header), whose checksum is kept in the header
+    body = bytearray(b"".join(entries))
+    for (name, array), entry in zip(arrays, entries):
+        offset = SECTION_ENTRY.unpack(entry)[2] - HEADER.size
+        body.extend(b"\0" * (offset - len(body)))
+        body.extend(array.astype(array.dtype.newbyteorder("<"), copy=False).tobytes())
+
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, kind.encode("ascii"), len(arrays), zlib.crc32(body)))
+        file.write(body)
+
+
+def read_lexicon(path, kind=None, verify=True):
+    """
+    Map a binary lexicon file into memory and get its sections. The sections are read only NumPy arrays backed
+    by the memory map (nothing is copied), so processes loading the same file share its pages through the page
+    cache.
+
+    Args:
+        path (string): Path of the file.
+        kind (string): Expected kind of the lexicon (not checked if None).
+        verify (bool): Check the CRC32 checksum of the file (reads the whole file once).
+
+    Returns:
+        sections (dict): Dictionary of section names and arrays.
+    """
+    with open(path, "rb") as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(buffer) < HEADER.size:
+        raise ValueError(f"Invalid lexicon file (too short): {path}")
+    magic, version, file_kind, section_count, checksum = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError(f"Invalid lexicon file (bad magic): {path}")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported lexicon format version {version} (expected {FORMAT_VERSION}): {path}")
+    file_kind = file_kind.rstrip(b"\0").decode("ascii")
+    if kind is not None and file_kind != kind:
+        raise ValueError(f"Lexicon file holds a {file_kind} (expected {kind}): {path}")
+    if verify and zlib.crc32(memoryview(buffer)[HEADER.size:]) != checksum:
+        raise ValueError(f"Lexicon file is corrupt (checksum mismatch): {path}")
+
+    sections = {}
+    for i in range(section_count):
+        name, dtype, offset, count = SECTION_ENTRY.unpack_from(buffer, HEADER.size + i * SECTION_ENTRY.size)
+        dtype = np.dtype(dtype.rstrip(b"\0").decode("ascii"))
+        sections[name.rstrip(b"\0").decode("ascii")] = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+
+    return sections
@@ -0,0 +1,81 @@
+import os
+import pickle
+import threading
+
+
+class ResourceRegistry:
+    """
+    Process wide cache of the artifacts (models, lexicons) used by the pipelines. Each artifact is loaded
+    lazily on its first request, and kept in memory for the later requests. If the modification time of
+    the artifact's file changes, the artifact is loaded again on its next request.
+    """
+
+    def __init__(self):
+        # Loaded resources, keyed by (file path, loader), holding (modification time, resource) pairs
+        self._resources = {}
+        # One lock for each key (so that loading one resource doesn't block requests for the others)
+        self._locks = {}
+        # Lock guarding the creation of the per key locks
+        self._locks_lock = threading.Lock()
+
+    def _get_lock(self, key):
+        with self._locks_lock:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def get(self, path, loader):
+        """
+        Get the resource stored in a file, loading it if it isn't loaded yet or if the file has changed.
+
+        Args:
+            path (string): Path of the file.
+            loader (function): Function that takes the file path and returns the loaded resource.
+
+        Returns:
+            resource (object): The loaded resource.
+        """
+        path = os.path.abspath(path)
+        key = (path, loader)
+        mtime = os.stat(path).st_mtime_ns
+
+        # Fast path, the resource is already loaded and up to date
+        entry = self._resources.get(key)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+
+        with self._get_lock(key):
+            # Another thread may have loaded the resource while waiting for the lock
+            entry = self._resources.get(key)
+            if entry is not None and entry[0] == mtime:
+                return entry[1]
+
+            resource = loader(path)
+            self._resources[key] = (mtime, resource)
+            return resource
+
+    def clear(self):
+        """
+        Remove all loaded resources (they will be loaded again on their next request).
+        """
+        with self._locks_lock:
+            self._resources.clear()
+
+
+def load_pickle(path):
+    """
+    Load a resource serialized with pickle.
+    """
+    with open(path, "rb") as file:
+        return pickle.load(file)
+
+
+# Registry shared by the whole process
+registry = ResourceRegistry()
+
+
+def get_resource(path, loader=load_pickle):
+    """
+    Get a resource from the shared registry (see ResourceRegistry.get).
+    """
+    return registry.get(path, loader)
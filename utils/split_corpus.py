@@ -1,75 +1,195 @@
+import argparse
+import mmap
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 
+CORPORA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "corpora")
 
-def split_corpus(input_corpus_path, output_dir, output_files_prefix, file_size):
+# Try to split corpora from the sentence boundaries (try not to divide a sentence into 2 different files). It's not
+# a perfect sentence splitter at this point, but based on observation of the corpora, a period between whitespaces,
+# and followed by an uppercase letter is selected. The corpus is searched as bytes (UTF-8), so the Turkish
+# uppercase letters are matched by their encodings. The split point is the start of the uppercase letter (group 1).
+SENTENCE_BOUNDARY_PATTERN = re.compile(rb"\s\.\s([A-Z]|" + b"|".join(re.escape(letter.encode("utf-8"))
+                                                                    for letter in "ÇĞİÖŞÜ") + rb")")
+# Fallback split points, if there isn't a sentence boundary near the target offset
+LINE_BOUNDARY_PATTERN = re.compile(rb"\n")
+WHITESPACE_PATTERN = re.compile(rb"\s")
+
+# Size (in bytes) of the window searched for a split point after each target offset
+DEFAULT_WINDOW_SIZE = 1024 * 1024
+
+# Name of the index file (in the output directory) listing the shards and their byte offsets in the input file
+INDEX_FILE_SUFFIX = ".index.tsv"
+
+
+def find_split_point(data, target, window_size=DEFAULT_WINDOW_SIZE):
+    """
+    Find a split point near a target offset, searching only the window after the target. A sentence boundary is
+    preferred, then a line break, then a whitespace. If the window has none of them, the target is moved to the
+    start of a UTF-8 character, so that no character is divided into 2 different files.
+
+    Args:
+        data (mmap.mmap or bytes): The corpus.
+        target (int): Target offset (in bytes) of the split point.
+        window_size (int): Size of the searched window (in bytes).
+
+    Returns:
+        split_point (int): Offset of the first byte of the next shard.
+    """
+    window_end = min(target + window_size, len(data))
+
+    match = SENTENCE_BOUNDARY_PATTERN.search(data, target, window_end)
+    if match:
+        return match.start(1)
+
+    for pattern in [LINE_BOUNDARY_PATTERN, WHITESPACE_PATTERN]:
+        match = pattern.search(data, target, window_end)
+        if match:
+            return match.end()
+
+    # Skip the continuation bytes (10xxxxxx) of a multibyte character
+    split_point = target
+    while split_point < len(data) and (data[split_point] & 0xC0) == 0x80:
+        split_point += 1
+    return split_point
+
+
+def compute_shard_offsets(data, shard_size, window_size=DEFAULT_WINDOW_SIZE):
     """
-    Split a large text file into smaller chunks, ensuring that chunks end with the end of a sentence.
+    Compute the byte offsets of the shards: a split point is searched near every shard_size bytes.
+
+    Args:
+        data (mmap.mmap or bytes): The corpus.
+        shard_size (int): Target size of the shards (in bytes).
+        window_size (int): Size of the window searched for each split point (in bytes).
+
+    Returns:
+        offsets (list): List of (start, end) byte offsets of the shards.
+    """
+    boundaries = [0]
+    target = shard_size
+    while target < len(data):
+        split_point = find_split_point(data, target, window_size)
+        if split_point >= len(data):
+            break
+        boundaries.append(split_point)
+        target = split_point + shard_size
+    boundaries.append(len(data))
+
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
 
-    :param input_file: Path to the large input text file.
-    :param output_dir: Directory where the output chunks will be stored.
-    :param max_chunk_size: Maximum size of each chunk in bytes (e.g., 100 MB = 100 * 1024 * 1024).
+def write_shard(input_path, output_path, start, end):
+    """
+    Write the bytes [start, end) of the input file to a shard file. The input file is memory-mapped in the worker,
+    and the shard is written from a slice of the map (without copying it into a bytes object).
+
+    Returns:
+        output_path (string): Path of the written shard.
+    """
+    with open(input_path, "rb") as input_file, \
+            mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as data, \
+            open(output_path, "wb") as output_file:
+        with memoryview(data) as view:
+            output_file.write(view[start:end])
+
+    return output_path
+
+
+def write_shard_index(index_path, input_path, shards):
+    """
+    Write the index of the shards: one line per shard with the shard file name and its start and end byte offsets
+    in the input file (tab separated), so that downstream jobs can seek to a shard in the input file directly.
+    """
+    with open(index_path, "w", encoding="utf-8") as index_file:
+        index_file.write(f"# {os.path.abspath(input_path)}\n")
+        for file_name, start, end in shards:
+            index_file.write(f"{file_name}\t{start}\t{end}\n")
+
+
+def read_shard_index(index_path):
+    """
+    Read an index written by write_shard_index.
+
+    Returns:
+        input_path (string): Path of the split input file.
+        shards (list): List of (shard file name, start, end) tuples.
+    """
+    input_path = None
+    shards = []
+    with open(index_path, "r", encoding="utf-8") as index_file:
+        for line in index_file:
+            if line.startswith("# "):
+                input_path = line[2:].rstrip("\n")
+                continue
+            file_name, start, end = line.rstrip("\n").split("\t")
+            shards.append((file_name, int(start), int(end)))
+
+    return input_path, shards
+
+
+def split_corpus(input_corpus_path, output_dir, output_files_prefix, file_size, window_size=DEFAULT_WINDOW_SIZE,
+                 workers=None):
+    """
+    Split a large text file into smaller files, ensuring that the files end with the end of a sentence (where
+    possible). The input file is memory-mapped, the split points are searched only in a small window after every
+    file_size bytes, and the shards are written in parallel.
+
+    Args:
+        input_corpus_path (string): Path to the large input text file (UTF-8).
+        output_dir (string): Directory where the split files (and the index) will be stored.
+        output_files_prefix (string): Common prefix of the split files.
+        file_size (int): Target size of the split files in bytes (e.g., 100 MB = 100 * 1024 * 1024).
+        window_size (int): Size of the window searched for each split point (in bytes).
+        workers (int): Number of worker processes writing the shards (number of CPUs if None).
+
+    Returns:
+        index_path (string): Path of the index file (see write_shard_index).
     """
     # Create the output directory if it doesn't exist
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-
-    # Try to split corpora from the sentence boundaries (try not to divide a sentence into 2 different
-    # files). It's not a perfect sentence splitter at this point, but based on observation of the corpora,
-    # a period between whitespaces, and followed by an uppercase letter is selected.
-    sentence_boundary_regex = re.compile(r'\s\.\s[A-Z]')
-
-    # Open the large input file in read mode
-    with open(input_file, 'r', encoding='utf-8') as f:
-        chunk_index = 1
-        buffer = ""
-
-        while True:
-            # Read the next chunk of the file
-            chunk = f.read(max_chunk_size)
-
-            if not chunk:
-                # If no more content to read, write the remaining buffer and break
-                if buffer:
-                    output_file = os.path.join(output_dir, f"chunk_{chunk_index}.txt")
-                    with open(output_file, 'w', encoding='utf-8') as chunk_file:
-                        chunk_file.write(buffer)
-                    print(f"Created: {output_file}")
-                break
-
-            buffer += chunk
-
-            # Read ahead to find the next sentence boundary after the chunk
-            extra_chunk = f.read(1024 * 1024)  # Read an additional 1MB to find the next sentence boundary
-            match = sentence_boundary_regex.search(extra_chunk)
-
-            if match:
-                # If we find a match in the extra_chunk, split at that point
-                split_point = match.end() - 1  # -1 to stop at the period
-                chunk_to_write = buffer + extra_chunk[:split_point + 1]  # Include up to the period
-                buffer = extra_chunk[split_point + 1:]  # Save the rest of the extra_chunk for the next round
-
-                # Write the current chunk
-                output_file = os.path.join(output_dir, f"chunk_{chunk_index}.txt")
-                with open(output_file, 'w', encoding='utf-8') as chunk_file:
-                    chunk_file.write(chunk_to_write)
-
-                print(f"Created: {output_file}")
-
-                # Increment chunk index
-                chunk_index += 1
-            else:
-                # If no sentence boundary found, append extra_chunk to the buffer
-                buffer += extra_chunk
-
-
-# Path to the large corpora to split
-input_corpus_path = "../corpora/TS-Corpus/ts_corpus_ver_2-export.txt"
-# Output directory path for the split files
-output_dir = "../corpora/split-corpora"
-# Common prefix for the split files (each file name starts with this string)
-output_files_prefix = "ts-corpora-v2"
-# Size of the split files in MB (selected as 100 MB)
-file_size = 100
-
-split_corpus(input_corpus_path, output_dir, output_files_prefix, file_size)
\ No newline at end of file
+    os.makedirs(output_dir, exist_ok=True)
+
+    # An empty file can't be memory-mapped (and has no shards)
+    offsets = []
+    if os.path.getsize(input_corpus_path) > 0:
+        with open(input_corpus_path, "rb") as input_file, \
+                mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offsets = compute_shard_offsets(data, file_size, window_size)
+
+    width = max(4, len(str(len(offsets))))
+    shards = [(f"{output_files_prefix}_{index:0{width}d}.txt", start, end)
+              for index, (start, end) in enumerate(offsets, start=1)]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(write_shard, input_corpus_path, os.path.join(output_dir, file_name), start, end)
+                   for file_name, start, end in shards]
+        for future in futures:
+            print(f"Created: {future.result()}")
+
+    index_path = os.path.join(output_dir, output_files_prefix + INDEX_FILE_SUFFIX)
+    write_shard_index(index_path, input_corpus_path, shards)
+    print(f"{len(shards)} files, index exported to file:\n\t{index_path}")
+
+    return index_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Split a large corpus into files ending at sentence boundaries.")
+    # Path to the large corpora to split
+    parser.add_argument("input", nargs="?",
+                        default=os.path.join(CORPORA_DIR, "TS-Corpus", "ts_corpus_ver_2-export.txt"),
+                        help="Corpus file to split")
+    # Output directory path for the split files
+    parser.add_argument("-o", "--output-dir", default=os.path.join(CORPORA_DIR, "split-corpora"),
+                        help="Directory to write the split files to")
+    # Common prefix for the split files (each file name starts with this string)
+    parser.add_argument("-p", "--prefix", default="ts-corpora-v2", help="Common prefix of the split files")
+    # Size of the split files in MB (selected as 100 MB)
+    parser.add_argument("-s", "--size", type=int, default=100, help="Size of the split files in MB")
+    parser.add_argument("-w", "--window", type=int, default=DEFAULT_WINDOW_SIZE,
+                        help="Size of the window searched for a sentence boundary in bytes")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Number of worker processes")
+    args = parser.parse_args()
+
+    split_corpus(args.input, args.output_dir, args.prefix, args.size * 1024 * 1024, args.window, args.workers)
@@ -0,0 +1,24 @@
+import re
+
+# Tokenized shards (written by tokenizer/tokenize_corpora.py) hold one token per line. Tokens may contain line
+# breaks (e.g. a MWE spanning two lines), so line breaks are written as backslash escapes, and backslashes are
+# escaped too so that the escapes can be undone.
+ESCAPES = str.maketrans({"\\": "\\\\", "\n": "\\n", "\r": "\\r"})
+UNESCAPES = {"\\\\": "\\", "\\n": "\n", "\\r": "\r"}
+ESCAPE_PATTERN = re.compile(r"\\[\\nr]")
+
+
+def escape_token(token):
+    """
+    Escape the backslashes and line breaks of a token, so that it fits on a single line of a shard.
+    """
+    return token.translate(ESCAPES)
+
+
+def unescape_token(escaped_token):
+    """
+    Undo escape_token.
+    """
+    if "\\" not in escaped_token:
+        return escaped_token
+    return ESCAPE_PATTERN.sub(lambda match: UNESCAPES[match.group()], escaped_token)